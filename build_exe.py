@@ -9,8 +9,12 @@ import subprocess
 from pathlib import Path
 
 
-def build_executable(version=None):
-    """実行ファイルをビルド"""
+def build_executable(version=None, onedir=False):
+    """実行ファイルをビルド
+
+    onedir: 単一ファイルではなくフォルダとして出力する。--onefileは起動のたびに
+    一時フォルダへ展開するため、フォルダ形式の方が起動が速い。
+    """
     print("Building tModLoader Installer executable...")
     
     # バージョンが指定されている場合はバージョン付きの名前にする
@@ -22,7 +26,7 @@ def build_executable(version=None):
     # PyInstallerコマンド
     cmd = [
         "pyinstaller",
-        "--onefile",  # 単一ファイルとして出力
+        "--onedir" if onedir else "--onefile",  # フォルダ / 単一ファイルとして出力
         "--windowed",  # コンソールウィンドウを非表示
         f"--name={exe_name}",  # 実行ファイル名（バージョン付き）
         # "--icon=icon.ico",  # アイコンファイル（存在する場合）
@@ -39,7 +43,7 @@ def build_executable(version=None):
         # ビルド実行
         result = subprocess.run(cmd, check=True, capture_output=True, text=True)
         print("Build completed!")
-        print(f"Executable: dist/{exe_name}.exe")
+        print(f"Executable: {executable_path(exe_name, onedir)}")
         return True
 
     except subprocess.CalledProcessError as e:
@@ -53,6 +57,13 @@ def build_executable(version=None):
         return False
 
 
+def executable_path(exe_name, onedir=False):
+    """ビルドされた実行ファイルのパス"""
+    if onedir:
+        return f"dist/{exe_name}/{exe_name}.exe"
+    return f"dist/{exe_name}.exe"
+
+
 def create_icon():
     """アイコンファイルを作成（簡単な例）"""
     try:
@@ -86,21 +97,20 @@ def main():
     print("tModLoader Installer Build Script")
     print("=" * 50)
 
-    # コマンドライン引数からバージョンを取得
-    version = None
-    if len(sys.argv) > 1:
-        version = sys.argv[1]
+    # コマンドライン引数からバージョンと出力形式を取得
+    args = sys.argv[1:]
+    onedir = "--onedir" in args
+    args = [arg for arg in args if arg != "--onedir"]
+    version = args[0] if args else None
 
     # アイコンファイルの作成
     create_icon()
 
     # 実行ファイルのビルド
-    if build_executable(version):
+    if build_executable(version, onedir):
         print("\nBuild completed successfully!")
-        if version:
-            print(f"Run dist/tModLoaderInstaller-{version}.exe")
-        else:
-            print("Run dist/tModLoaderInstaller.exe")
+        exe_name = f"tModLoaderInstaller-{version}" if version else "tModLoaderInstaller"
+        print(f"Run {executable_path(exe_name, onedir)}")
     else:
         print("\nBuild failed.")
         sys.exit(1)
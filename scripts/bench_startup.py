@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+起動時間のベンチマーク
+
+CLI（--help）とGUI（メインウィンドウの表示まで）の起動時間を、
+バイトコードキャッシュなし（コールド）とあり（ウォーム）で計測する。
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 起動後に読み込まれていないことを確認するモジュール
+WATCHED_MODULES = ("tkinter", "requests")
+
+CLI_CODE = """
+import sys
+from tmodloader_installer.cli import main
+try:
+    main(["--help"])
+except SystemExit:
+    pass
+"""
+
+# ディスプレイがない環境ではウィンドウを作らずimportだけを計測する
+GUI_CODE = """
+import sys
+from tmodloader_installer.gui import MainWindow
+try:
+    app = MainWindow()
+    app.root.update()
+    app.root.destroy()
+except Exception:
+    pass
+"""
+
+REPORT_CODE = """
+import json, sys
+print(json.dumps({{name: name in sys.modules for name in {watched!r}}}), file=sys.stderr)
+"""
+
+ENTRY_POINTS = {"cli": CLI_CODE, "gui": GUI_CODE}
+
+
+def run_once(code, pycache_dir):
+    """1回起動して所要時間と読み込まれた監視対象モジュールを返す"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(PROJECT_ROOT)
+    env["PYTHONPYCACHEPREFIX"] = str(pycache_dir)
+    code = code + REPORT_CODE.format(watched=WATCHED_MODULES)
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    elapsed = time.perf_counter() - start
+    loaded = json.loads(result.stderr.strip().splitlines()[-1])
+    return elapsed, [name for name, is_loaded in loaded.items() if is_loaded]
+
+
+def bench(code, runs):
+    """コールド・ウォームそれぞれの起動時間（秒）の中央値を計測"""
+    cold = []
+    for _ in range(runs):
+        # 毎回空のキャッシュディレクトリを使ってバイトコードのコンパイルから計測
+        with tempfile.TemporaryDirectory() as pycache_dir:
+            elapsed, loaded = run_once(code, pycache_dir)
+            cold.append(elapsed)
+
+    warm = []
+    with tempfile.TemporaryDirectory() as pycache_dir:
+        run_once(code, pycache_dir)
+        for _ in range(runs):
+            elapsed, loaded = run_once(code, pycache_dir)
+            warm.append(elapsed)
+
+    return statistics.median(cold), statistics.median(warm), loaded
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="起動時間のベンチマーク")
+    parser.add_argument("--runs", type=int, default=5, help="計測回数（既定: 5）")
+    parser.add_argument(
+        "--entry",
+        choices=sorted(ENTRY_POINTS),
+        action="append",
+        help="計測するエントリーポイント（既定: すべて）",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="CLIがtkinter・requestsを読み込んでいたら終了コード1で終了",
+    )
+    args = parser.parse_args()
+
+    failed = False
+    for entry in args.entry or sorted(ENTRY_POINTS):
+        cold, warm, loaded = bench(ENTRY_POINTS[entry], max(1, args.runs))
+        print(
+            f"{entry}: コールド {cold * 1000:.0f}ms / ウォーム {warm * 1000:.0f}ms"
+            f" (読み込み済み: {', '.join(loaded) or 'なし'})"
+        )
+        if entry == "cli" and loaded:
+            failed = True
+
+    if args.check and failed:
+        print("CLIの起動時に不要なモジュールが読み込まれています")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
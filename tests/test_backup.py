@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+バックアッププロファイルのテスト
+"""
+
+import copy
+import sys
+
+import pytest
+
+from tmodloader_installer.core import backup, history, journal
+from tmodloader_installer.utils.config import DEFAULT_CONFIG, load_config
+
+
+@pytest.fixture(autouse=True)
+def journal_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "journal_dir", lambda: tmp_path / "journal")
+    monkeypatch.setattr(history, "history_path", lambda: tmp_path / "history.db")
+
+
+@pytest.fixture
+def config():
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    config["backup"]["exclude_patterns"] = ["*.log"]
+    config["backup"]["profiles"] = {
+        "saves": {"include_folders": ["Players", "Worlds"], "exclude_patterns": ["*.bak"]}
+    }
+    return config
+
+
+def make_install(root):
+    files = {
+        "tModLoader.dll": b"game",
+        "client.log": b"log",
+        "Players/player.plr": b"player",
+        "Worlds/world.wld": b"world",
+        "Worlds/world.wld.bak": b"old",
+        "Mods/Example.tmod": b"mod",
+    }
+    for name, data in files.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_bytes(data)
+    return root
+
+
+def backed_up(path):
+    return sorted(
+        p.relative_to(path).as_posix()
+        for p in path.rglob("*")
+        if p.is_file() and p.name != backup.BACKUP_INFO_NAME
+    )
+
+
+def test_profiles_select_files(config, tmp_path):
+    install = make_install(tmp_path / "tModLoader")
+    assert backup.list_backup_profiles(config) == ["full", "data-only", "saves"]
+
+    backup.create_backup(install, tmp_path / "full", backup.get_backup_profile("full", config))
+    backup.create_backup(install, tmp_path / "saves", backup.get_backup_profile("saves", config))
+
+    # 共通の除外パターンは全てのプロファイルに適用される
+    assert "client.log" not in backed_up(tmp_path / "full")
+    assert "tModLoader.dll" in backed_up(tmp_path / "full")
+    assert backed_up(tmp_path / "saves") == ["Players/player.plr", "Worlds/world.wld"]
+
+
+def test_unknown_profile_is_rejected(config):
+    with pytest.raises(ValueError):
+        backup.get_backup_profile("missing", config)
+
+
+def test_partial_restore_replaces_only_profile_folders(config, tmp_path):
+    install = make_install(tmp_path / "tModLoader")
+    backup.create_backup(install, tmp_path / "saves", backup.get_backup_profile("saves", config))
+    (install / "Worlds" / "world.wld").write_bytes(b"changed")
+    (install / "Worlds" / "new.wld").write_bytes(b"new")
+    (install / "Mods" / "Example.tmod").write_bytes(b"updated")
+
+    profile = backup.restore_backup(tmp_path / "saves", install, log=lambda message: None)
+
+    assert profile.name == "saves"
+    assert (install / "Worlds" / "world.wld").read_bytes() == b"world"
+    assert not (install / "Worlds" / "new.wld").exists()
+    # プロファイルの対象外のフォルダは変更しない
+    assert (install / "Mods" / "Example.tmod").read_bytes() == b"updated"
+
+
+def test_missing_pyyaml_is_reported(tmp_path, monkeypatch, capsys):
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("backup:\n  default_profile: saves\n", encoding="utf-8")
+    monkeypatch.setitem(sys.modules, "yaml", None)
+
+    config = load_config(config_file)
+
+    assert config["backup"]["default_profile"] == "full"
+    assert "PyYAML" in capsys.readouterr().out
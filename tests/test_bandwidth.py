@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+帯域制限のテスト
+"""
+
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from tmodloader_installer.core import bandwidth
+from tmodloader_installer.core.bandwidth import (
+    BandwidthLimiter,
+    TokenBucket,
+    parse_rate,
+    scheduled_rate,
+)
+
+
+def test_parse_rate():
+    assert parse_rate("500K") == 500 * 1024
+    assert parse_rate("1.5MB/s") == int(1.5 * 1024 * 1024)
+    assert parse_rate("2m") == 2 * 1024 * 1024
+    assert parse_rate("") == 0
+    assert parse_rate(None) == 0
+    with pytest.raises(ValueError):
+        parse_rate("fast")
+
+
+def test_schedule_wraps_midnight():
+    schedule = [{"start": "22:00", "end": "06:00", "limit": "1M"}]
+    assert scheduled_rate(schedule, 0, datetime(2025, 1, 1, 23, 30)) == 1024 * 1024
+    assert scheduled_rate(schedule, 0, datetime(2025, 1, 1, 5, 59)) == 1024 * 1024
+    assert scheduled_rate(schedule, 7, datetime(2025, 1, 1, 12, 0)) == 7
+
+
+def test_bucket_total_stays_under_rate_across_threads():
+    rate = 400 * 1024
+    bucket = TokenBucket(rate)
+
+    def worker():
+        for _ in range(10):
+            bucket.consume(16 * 1024)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    # 640KB - 初回に貯まっているトークン分（上限0.5秒分）
+    assert elapsed >= (640 * 1024 - rate * bandwidth.BURST_SECONDS) / rate * 0.9
+
+
+def test_latest_adjustment_wins(tmp_path, monkeypatch):
+    monkeypatch.setattr(bandwidth, "override_file_path", lambda: tmp_path / "bandwidth.json")
+    limiter = BandwidthLimiter(limit=parse_rate("5M"))
+    limiter.refresh(force=True)
+    assert limiter.rate == parse_rate("5M")
+
+    limiter.set_limit("1M")
+    assert limiter.rate == parse_rate("1M")
+
+    bandwidth.write_override(parse_rate("2M"))
+    limiter.refresh(force=True)
+    assert limiter.rate == parse_rate("2M")
+
+    bandwidth.clear_override()
+    limiter.set_limit(None)
+    assert limiter.rate == parse_rate("5M")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+キャッシュサーバーのテスト
+"""
+
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from tmodloader_installer.core.archive_cache import ArchiveCache
+from tmodloader_installer.core.cache_server import CacheServer, parse_range
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=990-2000", 1000) == (990, 999)
+    # 複数範囲など解釈できない指定は全体を返す
+    assert parse_range("bytes=0-1,5-6", 1000) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=1000-", 1000)
+
+
+@pytest.fixture
+def server(tmp_path):
+    cache = ArchiveCache(tmp_path / "archives")
+    archive = cache.path("v2025.06.3.0")
+    archive.parent.mkdir(parents=True)
+    archive.write_bytes(bytes(range(256)) * 4)
+
+    server = CacheServer(cache, host="127.0.0.1", port=0, log=lambda message: None)
+    thread = threading.Thread(target=server.httpd.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join()
+
+
+def test_serves_cached_archive_range(server):
+    request = urllib.request.Request(
+        server.address + "v2025.06.3.0/tModLoader.zip", headers={"Range": "bytes=256-511"}
+    )
+    with urllib.request.urlopen(request) as response:
+        assert response.status == 206
+        assert response.headers["Content-Range"] == "bytes 256-511/1024"
+        assert response.read() == bytes(range(256))
+
+
+def test_unknown_tag_is_looked_up_once(server):
+    server.pull_through = True
+    calls = []
+    server.upstream.release = lambda tag: calls.append(tag)
+
+    for _ in range(3):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(server.address + "v9999.1.1.1/tModLoader.zip")
+        assert error.value.code == 404
+    assert calls == ["v9999.1.1.1"]
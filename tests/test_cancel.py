@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+処理のキャンセルのテスト
+"""
+
+import threading
+import time
+
+import pytest
+
+from tmodloader_installer.core import backup, history, journal
+from tmodloader_installer.core.bandwidth import TokenBucket
+from tmodloader_installer.core.cancel import CancelToken, OperationCancelled
+
+
+@pytest.fixture(autouse=True)
+def journal_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "journal"
+    monkeypatch.setattr(journal, "journal_dir", lambda: directory)
+    monkeypatch.setattr(history, "history_path", lambda: tmp_path / "history.db")
+    return directory
+
+
+def make_tree(root, count=20):
+    (root / "Mods").mkdir(parents=True)
+    for i in range(count):
+        (root / "Mods" / f"{i}.tmod").write_bytes(b"x" * 1024)
+    return root
+
+
+def cancel_after_first_file(token):
+    def callback(progress):
+        if progress.files_done >= 1:
+            token.cancel()
+
+    return callback
+
+
+def test_cancelled_backup_is_removed(tmp_path):
+    source = make_tree(tmp_path / "tModLoader")
+    token = CancelToken()
+
+    with pytest.raises(OperationCancelled):
+        backup.create_backup(
+            source,
+            tmp_path / "backup",
+            backup.get_backup_profile("full"),
+            workers=1,
+            progress_callback=cancel_after_first_file(token),
+            cancel=token,
+        )
+
+    assert not (tmp_path / "backup").exists()
+
+
+def test_cancelled_restore_keeps_current_files(tmp_path, journal_dir):
+    install = make_tree(tmp_path / "tModLoader")
+    backup.create_backup(install, tmp_path / "backup", backup.get_backup_profile("full"))
+    (install / "Mods" / "0.tmod").write_bytes(b"current")
+    token = CancelToken()
+
+    with pytest.raises(OperationCancelled):
+        backup.restore_backup(
+            tmp_path / "backup",
+            install,
+            log=lambda message: None,
+            workers=1,
+            progress_callback=cancel_after_first_file(token),
+            cancel=token,
+        )
+
+    assert (install / "Mods" / "0.tmod").read_bytes() == b"current"
+    assert len(list((install / "Mods").iterdir())) == 20
+    assert not list(journal_dir.iterdir())
+
+
+def test_cancel_interrupts_throttle_wait():
+    bucket = TokenBucket(1024)
+    bucket.consume(1024)
+    token = CancelToken()
+    threading.Timer(0.1, token.cancel).start()
+
+    start = time.monotonic()
+    with pytest.raises(OperationCancelled):
+        bucket.consume(10 * 1024, token)
+    assert time.monotonic() - start < 1.0
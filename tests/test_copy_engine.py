@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+並列ディレクトリコピーのテスト
+"""
+
+import os
+import stat
+import sys
+
+import pytest
+
+from tmodloader_installer.core.cancel import CancelToken, OperationCancelled
+from tmodloader_installer.core.copy_engine import ParallelCopier
+
+MTIME = 1_700_000_000
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / "src"
+    (root / "Libraries").mkdir(parents=True)
+    (root / "tModLoader.dll").write_bytes(b"small")
+    # チャンクの境界で割り切れないサイズにする
+    (root / "Libraries" / "large.bin").write_bytes(os.urandom(10 * 1024 + 123))
+    (root / "start.sh").write_text("#!/bin/sh\n")
+    os.chmod(root / "start.sh", 0o755)
+    os.chmod(root / "Libraries" / "large.bin", 0o640)
+    for path in (root / "tModLoader.dll", root / "Libraries" / "large.bin", root / "start.sh"):
+        os.utime(path, (MTIME, MTIME))
+    return root
+
+
+def copier(**kwargs):
+    return ParallelCopier(workers=4, chunk_size=1024, large_file_threshold=4096, **kwargs)
+
+
+def test_chunked_copy_keeps_content_mtime_and_mode(source, tmp_path):
+    dst = tmp_path / "dst"
+    copied = []
+    progress = copier().copy_tree(source, dst, file_callback=copied.append)
+
+    for rel_path in ("tModLoader.dll", "Libraries/large.bin", "start.sh"):
+        src_stat = (source / rel_path).stat()
+        dst_stat = (dst / rel_path).stat()
+        assert (dst / rel_path).read_bytes() == (source / rel_path).read_bytes()
+        assert dst_stat.st_mtime == MTIME
+        if sys.platform != "win32":
+            assert stat.S_IMODE(dst_stat.st_mode) == stat.S_IMODE(src_stat.st_mode)
+
+    assert sorted(copied) == ["Libraries/large.bin", "start.sh", "tModLoader.dll"]
+    assert progress.files_done == progress.files_total == 3
+    assert progress.bytes_done == progress.bytes_total
+    assert progress.percent == 100.0
+
+
+def test_filters_skip_dirs_and_files(source, tmp_path):
+    dst = tmp_path / "dst"
+    copier().copy_tree(
+        source,
+        dst,
+        include_dir=lambda rel_path: rel_path != "Libraries",
+        include_file=lambda rel_path: not rel_path.endswith(".sh"),
+    )
+
+    assert sorted(path.name for path in dst.iterdir()) == ["tModLoader.dll"]
+
+
+def test_cancel_stops_copy(source, tmp_path):
+    token = CancelToken()
+    token.cancel()
+    with pytest.raises(OperationCancelled):
+        copier(cancel=token).copy_tree(source, tmp_path / "dst")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+リリース間の差分更新のテスト
+"""
+
+import zipfile
+
+import pytest
+
+from tmodloader_installer.core import delta, journal
+from tmodloader_installer.core.backup import installed_tag
+from tmodloader_installer.core.delta import DeltaStore, apply_delta, compute_delta
+from tmodloader_installer.utils.config import load_config
+
+OLD = {
+    "tModLoader.dll": b"old-dll",
+    "Libraries/kept.dll": b"kept",
+    "Libraries/removed.dll": b"removed",
+}
+NEW = {
+    "tModLoader.dll": b"new-dll",
+    "Libraries/kept.dll": b"kept",
+    "Libraries/added.dll": b"added",
+}
+
+
+@pytest.fixture(autouse=True)
+def journal_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "journal"
+    monkeypatch.setattr(journal, "journal_dir", lambda: directory)
+    return directory
+
+
+def make_archive(path, files):
+    with zipfile.ZipFile(path, "w") as zip_ref:
+        for name, data in files.items():
+            zip_ref.writestr(name, data)
+    return path
+
+
+@pytest.fixture
+def delta_path(tmp_path):
+    path = tmp_path / "v1_to_v2.zip"
+    compute_delta(
+        make_archive(tmp_path / "v1.zip", OLD),
+        make_archive(tmp_path / "v2.zip", NEW),
+        path,
+        "v1",
+        "v2",
+    )
+    return path
+
+
+def make_install(root, files):
+    for name, data in files.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_bytes(data)
+    (root / "Mods").mkdir()
+    (root / "Mods" / "enable.json").write_text("[]")
+    return root
+
+
+def test_apply_swaps_in_new_release(delta_path, tmp_path, journal_dir):
+    install = make_install(tmp_path / "tModLoader", OLD)
+
+    manifest = apply_delta(delta_path, install, log=lambda message: None)
+
+    assert manifest["added"] == ["Libraries/added.dll"]
+    assert manifest["removed"] == ["Libraries/removed.dll"]
+    for name, data in NEW.items():
+        assert (install / name).read_bytes() == data
+    assert not (install / "Libraries" / "removed.dll").exists()
+    assert (install / "Mods" / "enable.json").read_text() == "[]"
+    assert installed_tag(install) == "v2"
+    assert not (tmp_path / "tModLoader.staging").exists()
+    assert not list(journal_dir.iterdir())
+
+
+def test_same_size_different_content_is_rejected(delta_path, tmp_path, journal_dir):
+    # サイズは旧バージョンと同じだが内容が異なる
+    install = make_install(tmp_path / "tModLoader", dict(OLD, **{"tModLoader.dll": b"mod-dll"}))
+
+    with pytest.raises(ValueError):
+        apply_delta(delta_path, install, log=lambda message: None)
+
+    assert (install / "tModLoader.dll").read_bytes() == b"mod-dll"
+    assert (install / "Libraries" / "removed.dll").exists()
+    assert not journal_dir.exists() or not list(journal_dir.iterdir())
+
+
+def test_store_dir_from_config(tmp_path, monkeypatch):
+    monkeypatch.setitem(load_config()["delta"], "store_dir", str(tmp_path / "shared"))
+    assert DeltaStore().path("v1", "v2") == tmp_path / "shared" / "v1_to_v2.zip"
+
+    monkeypatch.setitem(load_config()["delta"], "store_dir", "")
+    monkeypatch.setattr(delta, "get_app_base_path", lambda: tmp_path)
+    assert DeltaStore().store_dir == tmp_path / "cache" / "deltas"
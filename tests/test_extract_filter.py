@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+展開対象の絞り込みルールのテスト
+"""
+
+import io
+import zipfile
+
+import pytest
+
+from tmodloader_installer.core.extract_filter import ExtractFilter, get_extract_filter
+
+MEMBERS = [
+    "tModLoader.dll",
+    "start-tModLoader.bat",
+    "start-tModLoader.sh",
+    "start-tModLoaderServer.sh",
+    "LaunchUtils/busybox.exe",
+    "LaunchUtils/ScriptCaller.sh",
+    "Libraries/Native/Windows/steam_api64.dll",
+    "Libraries/Native/Linux/libsteam_api.so",
+    "Libraries/Native/OSX/libsteam_api.dylib",
+    "Libraries/Newtonsoft.Json/13.0.1/Newtonsoft.Json.dll",
+]
+
+
+def selected(extract_filter):
+    return [name for name in MEMBERS if extract_filter.allows(name)]
+
+
+def test_no_options_means_no_filter():
+    assert get_extract_filter() is None
+    assert selected(get_extract_filter("all")) == MEMBERS
+
+
+def test_linux_server_profile_drops_other_platforms():
+    assert selected(get_extract_filter("linux-server")) == [
+        "tModLoader.dll",
+        "start-tModLoaderServer.sh",
+        "LaunchUtils/ScriptCaller.sh",
+        "Libraries/Native/Linux/libsteam_api.so",
+        "Libraries/Newtonsoft.Json/13.0.1/Newtonsoft.Json.dll",
+    ]
+
+
+def test_windows_client_profile_drops_other_platforms():
+    assert selected(get_extract_filter("windows-client")) == [
+        "tModLoader.dll",
+        "start-tModLoader.bat",
+        "LaunchUtils/busybox.exe",
+        "Libraries/Native/Windows/steam_api64.dll",
+        "Libraries/Newtonsoft.Json/13.0.1/Newtonsoft.Json.dll",
+    ]
+
+
+def test_include_limits_and_exclude_wins():
+    extract_filter = get_extract_filter(include=["Libraries/*"], exclude=["*/OSX/*"])
+
+    assert extract_filter.name == "custom"
+    # includeに一致してもexcludeに一致するものは除外する（*は/にも一致する）
+    assert selected(extract_filter) == [
+        "Libraries/Native/Windows/steam_api64.dll",
+        "Libraries/Native/Linux/libsteam_api.so",
+        "Libraries/Newtonsoft.Json/13.0.1/Newtonsoft.Json.dll",
+    ]
+
+
+def test_extra_patterns_extend_profile():
+    extract_filter = get_extract_filter("linux-server", exclude=["LaunchUtils/*"])
+
+    assert extract_filter.name == "linux-server"
+    assert "LaunchUtils/ScriptCaller.sh" not in selected(extract_filter)
+    assert "tModLoader.dll" in selected(extract_filter)
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        get_extract_filter("android")
+
+
+def test_select_returns_members_and_skipped_count():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_ref:
+        for name in MEMBERS:
+            zip_ref.writestr(name, b"x")
+
+    with zipfile.ZipFile(buffer) as zip_ref:
+        members, skipped = ExtractFilter(exclude_patterns=["*.sh", "*.bat"]).select(zip_ref)
+
+    assert [info.filename for info in members] == [
+        name for name in MEMBERS if not name.endswith((".sh", ".bat"))
+    ]
+    assert skipped == 4
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+操作の履歴と統計のテスト
+"""
+
+import pytest
+
+from tmodloader_installer.core.cancel import OperationCancelled
+from tmodloader_installer.core.history import (
+    HistoryStore,
+    Operation,
+    degraded_hosts,
+    duration_summary,
+    load_operations,
+    maintenance_window,
+    percentile,
+)
+
+DAY = 86400
+NOW = 100 * DAY
+
+
+def add_installs(store, host, rates, start):
+    """1日ごとに1件、指定したダウンロード速度（バイト/秒）のインストールを記録"""
+    for i, rate in enumerate(rates):
+        store.add(
+            "install",
+            start + i * DAY,
+            10.0 + i,
+            "success",
+            phases=[("download", 1.0, rate)],
+            host=host,
+            version="v2025.06.3.0",
+        )
+
+
+def test_percentile_interpolates():
+    assert percentile([], 50) is None
+    assert percentile([10], 90) == 10
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([3, 1, 2], 100) == 3
+
+
+def test_operation_records_outcome_and_phases(tmp_path):
+    store = HistoryStore(tmp_path / "history.db")
+    with Operation("backup", tmp_path, "v1", store=store) as operation:
+        operation.phase("copy", 0.5, 2048)
+    with pytest.raises(OperationCancelled):
+        with Operation("restore", tmp_path, store=store):
+            raise OperationCancelled()
+
+    backup, restore = store.operations()
+    assert (backup["kind"], backup["outcome"], backup["bytes"]) == ("backup", "success", 2048)
+    assert backup["phases"] == {"copy": (0.5, 2048)}
+    assert (restore["kind"], restore["outcome"]) == ("restore", "cancelled")
+
+
+def test_stats_across_hosts_detects_degraded_disk(tmp_path):
+    good = HistoryStore(tmp_path / "good.db")
+    slow = HistoryStore(tmp_path / "slow.db")
+    add_installs(good, "good", [100] * 10, NOW - 10 * DAY)
+    add_installs(slow, "slow", [100] * 6 + [20] * 4, NOW - 10 * DAY)
+
+    operations = load_operations([good.path, slow.path], kind="install")
+    assert len(operations) == 20
+    assert duration_summary(operations)[("good", "install")]["count"] == 10
+    assert maintenance_window(operations, "good") == pytest.approx(percentile(range(10, 20), 90))
+
+    degraded = degraded_hosts(operations, now=NOW, recent_days=5, ratio=0.7)
+    assert [(host, phase) for host, phase, _, _ in degraded] == [("slow", "install:download")]
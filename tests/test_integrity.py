@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+アーカイブの検証のテスト
+"""
+
+import hashlib
+
+import pytest
+
+from tmodloader_installer.core import integrity
+from tmodloader_installer.core.integrity import (
+    DigestMismatchError,
+    archive_digest,
+    expected_digest,
+    parse_digest,
+    read_digest_record,
+    verify_digest,
+    write_digest_record,
+)
+
+
+def _release(digest=None):
+    return {
+        "tag_name": "v2025.06.3.0",
+        "assets": [
+            {"name": "tModLoader.zip", "browser_download_url": "x", "digest": digest}
+        ],
+    }
+
+
+def test_parse_digest():
+    digest = "ab" * 32
+    assert parse_digest(f"sha256:{digest.upper()}") == digest
+    assert parse_digest(digest) == digest
+    assert parse_digest(f"sha512:{digest}") is None
+    assert parse_digest("sha256:xyz") is None
+    assert parse_digest(None) is None
+
+
+def test_pinned_digest_takes_precedence():
+    release = _release("sha256:" + "aa" * 32)
+    assert expected_digest(release) == ("aa" * 32, "release")
+    assert expected_digest(release, pinned={"v2025.06.3.0": "bb" * 32}) == (
+        "bb" * 32,
+        "pinned",
+    )
+    assert expected_digest(_release()) == (None, None)
+
+
+def test_verify_digest_rejects_mismatch():
+    verify_digest("aa" * 32, None, "tModLoader.zip")
+    verify_digest("aa" * 32, "aa" * 32, "tModLoader.zip")
+    with pytest.raises(DigestMismatchError):
+        verify_digest("aa" * 32, "bb" * 32, "tModLoader.zip")
+
+
+def test_record_skips_rehash_until_archive_changes(tmp_path, monkeypatch):
+    archive = tmp_path / "tModLoader.zip"
+    archive.write_bytes(b"archive")
+    digest = hashlib.sha256(b"archive").hexdigest()
+    write_digest_record(archive, digest, "release")
+
+    monkeypatch.setattr(integrity, "hash_file", lambda path: pytest.fail("再計算された"))
+    assert archive_digest(archive) == digest
+
+    archive.write_bytes(b"changed archive")
+    assert read_digest_record(archive) is None
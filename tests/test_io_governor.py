@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+ディスクI/Oの制限のテスト
+"""
+
+import os
+import time
+import zipfile
+
+from tmodloader_installer.core.copy_engine import ParallelCopier
+from tmodloader_installer.core.io_governor import IOGovernor, member_path
+
+
+def test_member_path_stays_inside_destination(tmp_path):
+    root = str(tmp_path)
+    assert member_path("../../etc/passwd", tmp_path) == os.path.join(root, "etc", "passwd")
+    assert member_path("/abs/./file.txt", tmp_path) == os.path.join(root, "abs", "file.txt")
+
+
+def test_extract_member_matches_extractall(tmp_path):
+    archive = tmp_path / "tModLoader.zip"
+    with zipfile.ZipFile(archive, "w") as zip_ref:
+        zip_ref.writestr("Libraries/", "")
+        zip_ref.writestr("Libraries/a.dll", b"a" * 5000)
+        zip_ref.writestr("tModLoader.dll", b"b" * 300)
+
+    governor = IOGovernor(drop_cache=True)
+    with zipfile.ZipFile(archive) as zip_ref:
+        for info in zip_ref.infolist():
+            governor.extract_member(zip_ref, info, tmp_path / "out")
+
+    assert (tmp_path / "out" / "Libraries" / "a.dll").read_bytes() == b"a" * 5000
+    assert (tmp_path / "out" / "tModLoader.dll").read_bytes() == b"b" * 300
+
+
+def test_copy_tree_with_governor_limits_rate(tmp_path):
+    src = tmp_path / "src"
+    (src / "Worlds").mkdir(parents=True)
+    for i in range(4):
+        (src / "Worlds" / f"{i}.wld").write_bytes(os.urandom(64 * 1024))
+
+    rate = 512 * 1024
+    governor = IOGovernor(bytes_per_second=rate, ops_per_second=1000, workers=2)
+    copier = ParallelCopier(
+        workers=8, large_file_threshold=32 * 1024, chunk_size=16 * 1024, governor=governor
+    )
+    assert copier.workers == 2
+
+    start = time.monotonic()
+    progress = copier.copy_tree(src, tmp_path / "dst")
+    elapsed = time.monotonic() - start
+
+    assert progress.files_done == 4
+    for i in range(4):
+        name = f"Worlds/{i}.wld"
+        assert (tmp_path / "dst" / name).read_bytes() == (src / name).read_bytes()
+    assert elapsed >= (256 * 1024 - rate * 0.5) / rate * 0.9
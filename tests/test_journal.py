@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+展開・復元のジャーナルのテスト
+"""
+
+import zipfile
+
+import pytest
+
+from tmodloader_installer.core import journal
+from tmodloader_installer.core.journal import ExtractJob, RestoreJob, load_job
+
+
+class Crash(Exception):
+    pass
+
+
+class CrashingGovernor:
+    """指定したメンバーの展開中にプロセスが終了したことを再現"""
+
+    def __init__(self, crash_at):
+        self.crash_at = crash_at
+
+    def extract_member(self, zip_ref, info, dest_dir, cancel=None):
+        if info.filename == self.crash_at:
+            (dest_dir / info.filename).write_bytes(b"partial")
+            raise Crash()
+        zip_ref.extract(info, dest_dir)
+
+
+class RecordingGovernor:
+    """展開したメンバーを記録"""
+
+    def __init__(self):
+        self.extracted = []
+
+    def extract_member(self, zip_ref, info, dest_dir, cancel=None):
+        self.extracted.append(info.filename)
+        zip_ref.extract(info, dest_dir)
+
+
+@pytest.fixture(autouse=True)
+def journal_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "journal"
+    monkeypatch.setattr(journal, "journal_dir", lambda: directory)
+    return directory
+
+
+def make_install(tmp_path):
+    archive = tmp_path / "tModLoader.zip"
+    with zipfile.ZipFile(archive, "w") as zip_ref:
+        zip_ref.writestr("tModLoader.dll", b"new dll")
+        zip_ref.writestr("Libraries/a.dll", b"new a")
+        zip_ref.writestr("start.sh", b"new start")
+
+    install = tmp_path / "tModLoader"
+    install.mkdir()
+    (install / "tModLoader.dll").write_bytes(b"old dll")
+    (install / "start.sh").write_bytes(b"old start")
+    (install / "user.txt").write_bytes(b"user")
+    return archive, install
+
+
+def interrupted_extract(archive, install, crash_at):
+    with zipfile.ZipFile(archive) as zip_ref:
+        job = ExtractJob.start(archive, install, install, zip_ref.infolist(), in_place=True)
+        job.governor = CrashingGovernor(crash_at)
+        with pytest.raises(Crash):
+            job.run(zip_ref)
+    return job.journal.path
+
+
+def test_resume_extracts_only_remaining_members(tmp_path, journal_dir):
+    archive, install = make_install(tmp_path)
+    path = interrupted_extract(archive, install, crash_at="start.sh")
+
+    job = load_job(path)
+    assert job.can_resume
+    job.governor = RecordingGovernor()
+    job.resume()
+
+    assert job.governor.extracted == ["start.sh"]
+    assert (install / "tModLoader.dll").read_bytes() == b"new dll"
+    assert (install / "start.sh").read_bytes() == b"new start"
+    assert (install / "user.txt").read_bytes() == b"user"
+    assert not list(journal_dir.iterdir())
+    assert [p.name for p in tmp_path.iterdir() if ".journal_" in p.name] == []
+
+
+def test_rollback_restores_original_files(tmp_path, journal_dir):
+    archive, install = make_install(tmp_path)
+    path = interrupted_extract(archive, install, crash_at="start.sh")
+
+    load_job(path).rollback()
+
+    assert (install / "tModLoader.dll").read_bytes() == b"old dll"
+    assert (install / "start.sh").read_bytes() == b"old start"
+    assert (install / "user.txt").read_bytes() == b"user"
+    assert not (install / "Libraries").exists()
+    assert not list(journal_dir.iterdir())
+
+
+def test_restore_rollback_puts_folders_back(tmp_path, journal_dir):
+    backup = tmp_path / "backup"
+    (backup / "Mods").mkdir(parents=True)
+    for i in range(3):
+        (backup / "Mods" / f"{i}.tmod").write_bytes(b"backup")
+    install = tmp_path / "tModLoader"
+    (install / "Mods").mkdir(parents=True)
+    (install / "Mods" / "current.tmod").write_bytes(b"current")
+
+    job = RestoreJob.start(backup, install, [install / "Mods"])
+
+    def crash(rel_path):
+        if rel_path == "Mods/2.tmod":
+            raise Crash()
+        return True
+
+    with pytest.raises(Crash):
+        job.run(workers=1, include_file=crash)
+
+    load_job(job.journal.path).rollback()
+
+    assert [p.name for p in (install / "Mods").iterdir()] == ["current.tmod"]
+    assert [p.name for p in tmp_path.iterdir() if ".restore_" in p.name] == []
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Modsフォルダ同期のテスト
+"""
+
+import json
+
+import pytest
+
+from tmodloader_installer.core.mod_sync import (
+    MODS_MANIFEST_NAME,
+    ModSyncer,
+    check_mod_file_name,
+    publish_mods,
+    read_enabled,
+    write_enabled,
+)
+
+
+def quiet(message):
+    pass
+
+
+@pytest.fixture
+def published(tmp_path):
+    """2件のModを書き出した同期元"""
+    source_mods = tmp_path / "server" / "Mods"
+    source_mods.mkdir(parents=True)
+    (source_mods / "CalamityMod.tmod").write_bytes(b"calamity")
+    (source_mods / "MagicStorage.tmod").write_bytes(b"storage")
+    write_enabled(source_mods, ["CalamityMod"])
+
+    output = tmp_path / "published"
+    publish_mods(source_mods, output)
+    return output
+
+
+def test_publish_writes_manifest_and_files(published):
+    manifest = json.loads((published / MODS_MANIFEST_NAME).read_text(encoding="utf-8"))
+    assert [mod["file"] for mod in manifest["mods"]] == ["CalamityMod.tmod", "MagicStorage.tmod"]
+    assert [mod["enabled"] for mod in manifest["mods"]] == [True, False]
+    assert (published / "MagicStorage.tmod").read_bytes() == b"storage"
+
+
+def test_pull_fetches_only_changed_mods_and_updates_enable_json(published, tmp_path):
+    mods_dir = tmp_path / "client" / "Mods"
+    mods_dir.mkdir(parents=True)
+    (mods_dir / "CalamityMod.tmod").write_bytes(b"calamity")
+    (mods_dir / "MagicStorage.tmod").write_bytes(b"outdated")
+    (mods_dir / "Extra.tmod").write_bytes(b"extra")
+
+    fetched, removed = ModSyncer(mods_dir, str(published), log=quiet).sync()
+
+    assert [mod["file"] for mod in fetched] == ["MagicStorage.tmod"]
+    assert removed == []
+    assert (mods_dir / "MagicStorage.tmod").read_bytes() == b"storage"
+    # pruneしない場合は一覧にないModも残す
+    assert (mods_dir / "Extra.tmod").exists()
+    assert read_enabled(mods_dir) == ["CalamityMod"]
+
+
+def test_prune_removes_unlisted_mods(published, tmp_path):
+    mods_dir = tmp_path / "client" / "Mods"
+    mods_dir.mkdir(parents=True)
+    (mods_dir / "Extra.tmod").write_bytes(b"extra")
+
+    fetched, removed = ModSyncer(mods_dir, published.as_uri(), prune=True, log=quiet).sync()
+
+    assert len(fetched) == 2
+    assert removed == ["Extra.tmod"]
+    assert sorted(path.name for path in mods_dir.glob("*.tmod")) == [
+        "CalamityMod.tmod",
+        "MagicStorage.tmod",
+    ]
+
+
+def test_hash_mismatch_keeps_existing_file(published, tmp_path):
+    (published / "MagicStorage.tmod").write_bytes(b"tampered")
+    mods_dir = tmp_path / "client" / "Mods"
+    mods_dir.mkdir(parents=True)
+    (mods_dir / "MagicStorage.tmod").write_bytes(b"old")
+
+    with pytest.raises(ValueError):
+        ModSyncer(mods_dir, str(published), log=quiet).sync()
+    assert (mods_dir / "MagicStorage.tmod").read_bytes() == b"old"
+    assert not (mods_dir / "MagicStorage.tmod.part").exists()
+
+
+@pytest.mark.parametrize(
+    "file_name",
+    ["../../escaped.tmod", "sub/Mod.tmod", "..\\Mod.tmod", "C:Mod.tmod", "..", "Mod.dll", ""],
+)
+def test_unsafe_file_names_are_rejected(file_name):
+    with pytest.raises(ValueError):
+        check_mod_file_name(file_name)
+
+
+def test_manifest_cannot_write_outside_mods_dir(tmp_path):
+    source = tmp_path / "source"
+    source.mkdir()
+    (source / "escaped.tmod").write_bytes(b"payload")
+    manifest = {
+        "mods": [
+            {"name": "escaped", "file": "../../escaped.tmod", "sha256": "0", "size": 7, "enabled": True}
+        ]
+    }
+    (source / MODS_MANIFEST_NAME).write_text(json.dumps(manifest), encoding="utf-8")
+    mods_dir = tmp_path / "install" / "tModLoader" / "Mods"
+
+    with pytest.raises(ValueError):
+        ModSyncer(mods_dir, str(source), log=quiet).sync()
+    assert not (tmp_path / "install" / "escaped.tmod").exists()
+    assert not mods_dir.exists()
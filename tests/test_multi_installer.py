@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+複数インストール先への一括インストールのテスト
+"""
+
+import zipfile
+
+import pytest
+
+from tmodloader_installer.cli.main import run_install
+from tmodloader_installer.core import history, installer, journal, multi_installer, planner
+from tmodloader_installer.core.backup import installed_tag
+from tmodloader_installer.core.cancel import CancelToken, OperationCancelled
+from tmodloader_installer.core.copy_engine import ParallelCopier
+from tmodloader_installer.core.multi_installer import MultiTargetInstaller
+
+TAG = "v2025.06.3.0"
+
+
+class Crash(BaseException):
+    """プロセスの異常終了を再現（Exceptionとして捕捉されない）"""
+
+
+@pytest.fixture(autouse=True)
+def app_base(tmp_path, monkeypatch):
+    base = tmp_path / "app"
+    monkeypatch.setattr(installer, "get_app_base_path", lambda: base)
+    monkeypatch.setattr(multi_installer, "get_app_base_path", lambda: base)
+    monkeypatch.setattr(journal, "journal_dir", lambda: base / "journal")
+    monkeypatch.setattr(history, "history_path", lambda: base / "history.db")
+    monkeypatch.setattr(planner, "_throughput_file", lambda: base / "throughput.json")
+    return base
+
+
+@pytest.fixture
+def releases(tmp_path):
+    root = tmp_path / "releases"
+    (root / TAG).mkdir(parents=True)
+    with zipfile.ZipFile(root / TAG / "tModLoader.zip", "w") as zip_ref:
+        zip_ref.writestr("tModLoader.dll", b"new")
+        for i in range(10):
+            zip_ref.writestr(f"Libraries/lib{i}.dll", b"x" * 1024)
+    return root
+
+
+def make_install(path):
+    (path / "Libraries").mkdir(parents=True)
+    (path / "tModLoader.dll").write_bytes(b"old")
+    (path / "Libraries" / "removed.dll").write_bytes(b"old")
+    (path / "Mods").mkdir()
+    (path / "Mods" / "enable.json").write_text("[]")
+    return path
+
+
+def make_installer(releases, targets, **kwargs):
+    return MultiTargetInstaller(
+        TAG, targets, release_source=str(releases), log=lambda message: None, **kwargs
+    )
+
+
+def test_fanout_swaps_each_target(releases, tmp_path, app_base):
+    targets = [make_install(tmp_path / "a" / "tModLoader"), tmp_path / "b" / "tModLoader"]
+
+    results = make_installer(releases, targets).download_and_install()
+
+    assert all(result.succeeded for result in results)
+    for target in targets:
+        assert (target / "tModLoader.dll").read_bytes() == b"new"
+        assert installed_tag(target) == TAG
+        assert not (target.parent / "tModLoader.staging").exists()
+    # リリースに含まれないファイル（ユーザーデータなど）は引き継ぐ
+    assert (targets[0] / "Mods" / "enable.json").read_text() == "[]"
+    assert not list((app_base / "journal").iterdir())
+
+
+def test_history_records_bytes_per_phase(releases, tmp_path):
+    archive = releases / TAG / "tModLoader.zip"
+    targets = [make_install(tmp_path / "a" / "tModLoader"), tmp_path / "b" / "tModLoader"]
+
+    make_installer(releases, targets).download_and_install()
+
+    operations = history.load_operations(kind="install")
+    assert len(operations) == 2
+    for operation in operations:
+        phases = operation["phases"]
+        assert phases["download"][1] == archive.stat().st_size
+        assert phases["extract"][1] == 3 + 10 * 1024
+        assert phases["copy"][1] == 3 + 10 * 1024
+        assert operation["bytes"] == sum(size for _, size in phases.values())
+    backed_up = next(op for op in operations if op["install_path"] == str(targets[0]))
+    assert backed_up["phases"]["backup"][1] > 0
+
+
+def test_interrupted_fanout_is_rolled_back(releases, tmp_path, app_base, monkeypatch):
+    target = make_install(tmp_path / "a" / "tModLoader")
+    copy_file = ParallelCopier._copy_file
+    copied = []
+
+    def crash_after_first_file(self, *args):
+        if copied:
+            raise Crash()
+        copied.append(args)
+        return copy_file(self, *args)
+
+    monkeypatch.setattr(ParallelCopier, "_copy_file", crash_after_first_file)
+    with pytest.raises(Crash):
+        make_installer(
+            releases, [target, tmp_path / "b" / "tModLoader"], max_workers=1
+        ).download_and_install()
+    monkeypatch.setattr(ParallelCopier, "_copy_file", copy_file)
+
+    # 次回の起動時の回復でステージングを破棄し、インストール先は元のまま
+    assert journal.pending_journals()
+    journal.recover_jobs(log=lambda message: None)
+    assert not journal.pending_journals()
+    assert not (target.parent / "tModLoader.staging").exists()
+    assert (target / "tModLoader.dll").read_bytes() == b"old"
+    assert (target / "Libraries" / "removed.dll").exists()
+
+
+def test_cancelled_fanout_leaves_targets_and_backups_untouched(
+    releases, tmp_path, app_base, monkeypatch
+):
+    target = make_install(tmp_path / "a" / "tModLoader")
+    token = CancelToken()
+    copy_file = ParallelCopier._copy_file
+
+    def cancel_after_first_file(self, *args):
+        copy_file(self, *args)
+        token.cancel()
+
+    monkeypatch.setattr(ParallelCopier, "_copy_file", cancel_after_first_file)
+    installer = make_installer(releases, [target, tmp_path / "b" / "tModLoader"], cancel=token)
+    with pytest.raises(OperationCancelled):
+        installer.download_and_install()
+
+    assert [result.status for result in installer.results] == ["cancelled", "cancelled"]
+    assert (target / "tModLoader.dll").read_bytes() == b"old"
+    assert (target / "Libraries" / "removed.dll").exists()
+    assert installed_tag(target) is None
+    assert not (tmp_path / "b" / "tModLoader").exists()
+    assert not (target.parent / "tModLoader.staging").exists()
+    assert not list((app_base / "backups").iterdir())
+    assert not journal.pending_journals()
+
+
+@pytest.mark.parametrize("count", ["0", "-2"])
+def test_non_positive_parallel_targets_is_rejected(count, tmp_path):
+    with pytest.raises(SystemExit) as excinfo:
+        run_install([TAG, str(tmp_path / "a"), str(tmp_path / "b"), "--parallel-targets", count])
+    assert excinfo.value.code == 2
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+事前確認（Rangeリクエストでの読み込み・スループットの記録）のテスト
+"""
+
+import io
+import json
+import threading
+import zipfile
+
+import pytest
+
+from tmodloader_installer.core import planner
+from tmodloader_installer.core.planner import HttpRangeFile, load_throughput, record_throughput
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, content=b"", url="http://example.invalid/a.zip"):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = content
+        self.url = url
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    """HEADとRange付きGETに応答するサーバー
+
+    ignore_range: Rangeを無視して200で全体を返す（プロキシなど）
+    """
+
+    def __init__(self, data, head_headers=None, ignore_range=False):
+        self.data = data
+        self.head_headers = (
+            {"Accept-Ranges": "bytes", "Content-Length": str(len(data))}
+            if head_headers is None
+            else head_headers
+        )
+        self.ignore_range = ignore_range
+        self.ranges = []
+
+    def head(self, url, allow_redirects=True, timeout=None):
+        return FakeResponse(200, self.head_headers, url=url)
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        if self.ignore_range:
+            return FakeResponse(200, {}, self.data, url=url)
+        start, end = headers["Range"][len("bytes=") :].split("-")
+        start, end = int(start), int(end)
+        self.ranges.append((start, end))
+        content_range = f"bytes {start}-{end}/{len(self.data)}"
+        return FakeResponse(206, {"Content-Range": content_range}, self.data[start : end + 1], url=url)
+
+
+def make_zip(count=50):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_ref:
+        for i in range(count):
+            zip_ref.writestr(f"Libraries/lib{i}.dll", b"x" * 4096)
+    return buffer.getvalue()
+
+
+def test_reads_central_directory_with_ranges():
+    data = make_zip()
+    session = FakeSession(data)
+    with zipfile.ZipFile(HttpRangeFile("http://example.invalid/a.zip", session)) as zip_ref:
+        assert len(zip_ref.infolist()) == 50
+    # 全体ではなく必要な部分だけを取得する
+    assert sum(end - start + 1 for start, end in session.ranges) < len(data)
+
+
+def test_server_ignoring_range_is_rejected():
+    data = make_zip()
+    session = FakeSession(data, ignore_range=True)
+    source = HttpRangeFile("http://example.invalid/a.zip", session)
+    with pytest.raises(ValueError):
+        source.read(10)
+
+
+def test_missing_accept_ranges_is_probed():
+    data = make_zip()
+    session = FakeSession(data, head_headers={"Content-Length": str(len(data))})
+    HttpRangeFile("http://example.invalid/a.zip", session)
+    assert session.ranges
+
+    session = FakeSession(data, head_headers={"Content-Length": str(len(data))}, ignore_range=True)
+    with pytest.raises(ValueError):
+        HttpRangeFile("http://example.invalid/a.zip", session)
+
+
+def test_missing_content_length_fails_cleanly():
+    session = FakeSession(b"data", head_headers={"Accept-Ranges": "bytes"})
+    with pytest.raises(ValueError):
+        HttpRangeFile("http://example.invalid/a.zip", session)
+
+
+def test_record_throughput_from_parallel_threads(tmp_path, monkeypatch):
+    path = tmp_path / "cache" / "throughput.json"
+    monkeypatch.setattr(planner, "_throughput_file", lambda: path)
+
+    threads = [
+        threading.Thread(target=record_throughput, args=(f"phase{i}", 1000, 1.0)) for i in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 同時に書き込んでも記録が失われず、壊れたJSONも一時ファイルも残らない
+    assert sorted(load_throughput()) == sorted(f"phase{i}" for i in range(8))
+    assert json.loads(path.read_text(encoding="utf-8"))["phase0"] == 1000.0
+    assert not list(path.parent.glob("*.tmp"))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+リリースインデックスのテスト
+"""
+
+import sys
+import types
+
+from tmodloader_installer.core import release_index
+from tmodloader_installer.core.release_index import ReleaseIndex, parse_version
+
+
+def _release(tag, prerelease=False):
+    return {
+        "tag_name": tag,
+        "name": tag,
+        "prerelease": prerelease,
+        "draft": False,
+        "published_at": None,
+        "html_url": f"https://github.com/tModLoader/tModLoader/releases/tag/{tag}",
+        "assets": [
+            {"name": "tModLoader.zip", "browser_download_url": f"https://example.com/{tag}.zip", "size": 1}
+        ],
+    }
+
+
+def _index(tmp_path, tags):
+    index = ReleaseIndex(tmp_path / "releases.json")
+    for i, (tag, prerelease) in enumerate(tags):
+        index.data["releases"][str(i)] = _release(tag, prerelease)
+    return index
+
+
+def test_parse_version():
+    """タグ名が数値として比較されること"""
+    assert parse_version("v2025.06.3.0") == (2025, 6, 3, 0)
+    assert parse_version("v2025.10.1.0") > parse_version("v2025.9.3.0")
+    assert parse_version("invalid") == (-1,)
+
+
+def test_select_latest_and_pattern(tmp_path):
+    """latest・パターン指定・タグ指定で選択できること"""
+    index = _index(
+        tmp_path,
+        [
+            ("v2025.05.3.0", False),
+            ("v2025.06.2.1", False),
+            ("v2025.06.3.0", False),
+            ("v2025.07.0.1", True),
+        ],
+    )
+
+    assert index.select("latest")["tag_name"] == "v2025.06.3.0"
+    assert index.select("latest", include_prerelease=True)["tag_name"] == "v2025.07.0.1"
+    assert index.select("2025.05.*")["tag_name"] == "v2025.05.3.0"
+    assert index.select("latest 2025.06.*")["tag_name"] == "v2025.06.3.0"
+    assert index.select("2025.06.2.1")["tag_name"] == "v2025.06.2.1"
+    assert index.select("2024.*") is None
+    assert ReleaseIndex.asset_url(index.get("v2025.05.3.0")) == "https://example.com/v2025.05.3.0.zip"
+
+
+class _Response:
+    def __init__(self, status_code, releases=(), etag=None):
+        self.status_code = status_code
+        self.releases = list(releases)
+        self.headers = {"ETag": etag} if etag else {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.releases
+
+
+def _fake_api(monkeypatch, releases, etag):
+    """ページ単位でリリースを返し、ETagが一致すれば304を返すAPI"""
+    api = types.SimpleNamespace(releases=releases, etag=etag, pages=[])
+
+    def get(url, params=None, headers=None, timeout=None):
+        if headers.get("If-None-Match") == api.etag:
+            api.pages.append(304)
+            return _Response(304)
+        page, per_page = params["page"], params["per_page"]
+        api.pages.append(page)
+        start = (page - 1) * per_page
+        return _Response(200, api.releases[start : start + per_page], api.etag)
+
+    monkeypatch.setitem(sys.modules, "requests", types.SimpleNamespace(get=get))
+    monkeypatch.setattr(release_index, "RELEASES_PER_PAGE", 2)
+    return api
+
+
+def test_sync_cut_short_by_max_pages_does_not_save_etag(tmp_path, monkeypatch):
+    """max_pagesで打ち切った同期の後も、次回の同期で残りを取得すること"""
+    releases = [dict(_release(f"v2025.0{i}.1.0"), id=i) for i in range(5, 0, -1)]
+    api = _fake_api(monkeypatch, releases, '"etag-1"')
+    index = ReleaseIndex(tmp_path / "releases.json")
+
+    assert index.sync(max_pages=1) == 2
+    assert not index.data.get("complete")
+    assert index.data["etag"] is None
+
+    api.pages.clear()
+    assert index.sync() == 3
+    assert api.pages == [1, 2, 3]
+    assert index.data["complete"]
+    assert index.data["etag"] == '"etag-1"'
+
+    # 最後まで取得した後は未変更なら1ページ目も取得しない
+    api.pages.clear()
+    assert ReleaseIndex(tmp_path / "releases.json").sync() == 0
+    assert api.pages == [304]
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+リリースの取得元のテスト
+"""
+
+import zipfile
+
+import pytest
+
+from tmodloader_installer.core.release_index import ReleaseIndex
+from tmodloader_installer.core.release_source import (
+    LocalDirectorySource,
+    ReleaseSource,
+    get_release_source,
+    local_asset_path,
+)
+
+
+def _make_release(root, tag):
+    release_dir = root / tag
+    release_dir.mkdir(parents=True)
+    with zipfile.ZipFile(release_dir / "tModLoader.zip", "w") as zip_ref:
+        zip_ref.writestr("tModLoader.dll", tag)
+
+
+def test_local_directory_source_selects_release(tmp_path):
+    _make_release(tmp_path, "v2025.05.1.0")
+    _make_release(tmp_path, "v2025.06.3.0")
+
+    source = get_release_source(str(tmp_path))
+    assert isinstance(source, LocalDirectorySource)
+
+    release = source.select("latest")
+    assert release["tag_name"] == "v2025.06.3.0"
+    archive = local_asset_path(ReleaseIndex.asset_url(release))
+    assert archive == tmp_path / "v2025.06.3.0" / "tModLoader.zip"
+
+
+def test_manifest_uses_relative_urls(tmp_path):
+    _make_release(tmp_path, "v2025.06.3.0")
+
+    manifest_path, count = LocalDirectorySource(tmp_path).write_manifest()
+
+    assert count == 1
+    assert '"v2025.06.3.0/tModLoader.zip"' in manifest_path.read_text(encoding="utf-8")
+    release = LocalDirectorySource(tmp_path).release("2025.06.3.0")
+    assert local_asset_path(ReleaseIndex.asset_url(release)).is_file()
+
+
+def test_directories_without_v_prefix_are_listed(tmp_path):
+    _make_release(tmp_path, "2025.06.3.0")
+
+    source = LocalDirectorySource(tmp_path)
+
+    release = source.release("v2025.06.3.0")
+    assert release["tag_name"] == "v2025.06.3.0"
+    assert source.select("2025.06.*") == release
+    archive = local_asset_path(ReleaseIndex.asset_url(release))
+    assert archive == tmp_path / "2025.06.3.0" / "tModLoader.zip"
+
+
+def test_release_source_is_abstract():
+    with pytest.raises(TypeError):
+        ReleaseSource()
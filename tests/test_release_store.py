@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+展開済みリリースの保存領域のテスト
+"""
+
+import os
+import stat
+import sys
+import zipfile
+
+import pytest
+
+from tmodloader_installer.core.backup import installed_tag
+from tmodloader_installer.core.release_store import ReleaseStore
+
+
+def make_archive(path, files):
+    with zipfile.ZipFile(path, "w") as zip_ref:
+        for name, data in files.items():
+            zip_ref.writestr(name, data)
+    return path
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ReleaseStore(tmp_path / "releases")
+    store.add(
+        "v1",
+        make_archive(tmp_path / "v1.zip", {"tModLoader.dll": b"one", "Libraries/old.dll": b"old"}),
+        log=lambda message: None,
+    )
+    store.add(
+        "v2",
+        make_archive(tmp_path / "v2.zip", {"tModLoader.dll": b"two", "Libraries/new.dll": b"new"}),
+        log=lambda message: None,
+    )
+    return store
+
+
+def test_add_keeps_complete_read_only_trees(store, tmp_path):
+    assert store.tags() == ["v2", "v1"]
+    assert not (tmp_path / "releases" / "v1.part").exists()
+    if sys.platform != "win32":
+        assert not (store.path("v1") / "tModLoader.dll").stat().st_mode & stat.S_IWUSR
+
+
+def test_switching_versions_links_and_keeps_user_files(store, tmp_path):
+    install = tmp_path / "tModLoader"
+    assert store.install("v1", install, "hardlink") == "hardlink"
+    (install / "tModLoader-Logs").mkdir()
+    (install / "tModLoader-Logs" / "client.log").write_text("log")
+
+    store.install("v2", install, "hardlink")
+
+    assert installed_tag(install) == "v2"
+    assert (install / "tModLoader.dll").read_bytes() == b"two"
+    assert os.path.samefile(install / "tModLoader.dll", store.path("v2") / "tModLoader.dll")
+    # 以前のバージョンのファイルは残さず、ユーザーのファイルは引き継ぐ
+    assert not (install / "Libraries" / "old.dll").exists()
+    assert (install / "tModLoader-Logs" / "client.log").read_text() == "log"
+    assert not (tmp_path / "tModLoader.staging").exists()
+    assert installed_tag(store.path("v1")) == "v1"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="シンボリックリンクの作成に権限が必要")
+def test_symlink_slot_switches_in_place(store, tmp_path):
+    install = tmp_path / "tModLoader"
+    store.install("v1", install, "symlink")
+    store.install("v2", install, "symlink")
+
+    assert install.is_symlink()
+    assert installed_tag(install) == "v2"
+
+    # スロットから通常のフォルダに戻しても保存したツリーは変わらない
+    store.install("v1", install, "copy")
+    assert not install.is_symlink()
+    assert (install / "tModLoader.dll").read_bytes() == b"one"
+    assert (store.path("v2") / "tModLoader.dll").read_bytes() == b"two"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="シンボリックリンクの作成に権限が必要")
+def test_symlink_slot_refuses_install_with_user_files(store, tmp_path):
+    install = tmp_path / "tModLoader"
+    store.install("v1", install, "copy")
+    (install / "Mods").mkdir()
+    (install / "Mods" / "enable.json").write_text("[]")
+
+    # ユーザーのファイルは保存領域に書き込めないので、スロットにせずそのまま残す
+    with pytest.raises(ValueError, match="Mods/enable.json"):
+        store.install("v2", install, "symlink")
+    assert not install.is_symlink()
+    assert installed_tag(install) == "v1"
+    assert (install / "Mods" / "enable.json").read_text() == "[]"
+    assert not list(tmp_path.glob("tModLoader.old_*"))
+    assert not (store.path("v2") / "Mods").exists()
+
+    # 以前のバージョンのファイルだけならスロットに切り替えられる
+    (install / "Mods" / "enable.json").unlink()
+    store.install("v2", install, "symlink")
+    assert install.is_symlink()
+    assert installed_tag(install) == "v2"
+    # 退避したフォルダはリンクに切り替えた後に削除する
+    assert not list(tmp_path.glob("tModLoader.old_*"))
+    assert (store.path("v1") / "tModLoader.dll").read_bytes() == b"one"
+
+
+def test_failed_symlink_slot_restores_folder(store, tmp_path, monkeypatch):
+    install = tmp_path / "tModLoader"
+    store.install("v1", install, "copy")
+
+    def fail_symlink(*args, **kwargs):
+        raise OSError("symlink not permitted")
+
+    monkeypatch.setattr(os, "symlink", fail_symlink)
+    with pytest.raises(OSError):
+        store.install("v2", install, "symlink")
+
+    assert not install.is_symlink()
+    assert installed_tag(install) == "v1"
+    assert not list(tmp_path.glob("tModLoader.old_*"))
+
+
+def test_missing_tag_is_rejected(store, tmp_path):
+    with pytest.raises(ValueError):
+        store.install("v3", tmp_path / "tModLoader")
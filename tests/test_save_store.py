@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+セーブデータのスナップショットのテスト
+"""
+
+import os
+
+from tmodloader_installer.core.save_store import SaveStore
+
+
+def test_snapshot_stores_only_changed_chunks(tmp_path):
+    install_path = tmp_path / "install"
+    world = install_path / "Worlds" / "world.wld"
+    world.parent.mkdir(parents=True)
+    data = os.urandom(1024 * 1024)
+    world.write_bytes(data)
+
+    store = SaveStore(tmp_path / "store", folders=["Worlds", "Players"])
+    first = store.snapshot(install_path, log=lambda message: None)
+
+    # 先頭付近への挿入は後続のチャンクの境界をずらさない
+    changed = data[:1000] + b"inserted" + data[1000:]
+    world.write_bytes(changed)
+    second = store.snapshot(install_path, log=lambda message: None)
+
+    first_chunks = set(first["files"][0]["chunks"])
+    second_chunks = second["files"][0]["chunks"]
+    assert len([c for c in second_chunks if c not in first_chunks]) <= 2
+
+    world.unlink()
+    store.restore(first["id"], install_path, log=lambda message: None)
+    assert world.read_bytes() == data
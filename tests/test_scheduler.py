@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+ジョブのスケジューラとロックのテスト
+"""
+
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from tmodloader_installer.core import scheduler
+from tmodloader_installer.core.cancel import CancelToken, OperationCancelled
+from tmodloader_installer.core.file_lock import FileLock, LockTimeout
+from tmodloader_installer.utils.config import load_config
+
+
+@pytest.fixture(autouse=True)
+def lock_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "locks"
+    monkeypatch.setattr(scheduler, "lock_dir", lambda: directory)
+    return directory
+
+
+def test_file_lock_is_exclusive_and_records_owner(tmp_path):
+    first = FileLock(tmp_path / "a.lock", "インストール")
+    second = FileLock(tmp_path / "a.lock")
+
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    assert second.owner()["description"] == "インストール"
+    with pytest.raises(LockTimeout):
+        second.acquire(timeout=0.3)
+
+    first.release()
+    assert second.try_acquire()
+    second.release()
+
+
+def test_lock_held_by_other_process_is_released_when_it_exits(tmp_path):
+    install = tmp_path / "tModLoader"
+    code = (
+        "import sys, time\n"
+        "from tmodloader_installer.core.scheduler import install_lock\n"
+        f"lock = install_lock({str(install)!r}, 'other')\n"
+        "lock.try_acquire()\n"
+        "print('locked', flush=True)\n"
+        "time.sleep(60)\n"
+    )
+    process = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, text=True)
+    try:
+        assert process.stdout.readline().strip() == "locked"
+        messages = []
+        with pytest.raises(LockTimeout):
+            with scheduler.job_resources([install], timeout=0.3, log=messages.append):
+                pass
+        assert "other" in messages[0]
+    finally:
+        process.kill()
+        process.wait()
+
+    with scheduler.job_resources([install], timeout=1):
+        pass
+
+
+def test_jobs_on_same_path_do_not_overlap(tmp_path, monkeypatch):
+    monkeypatch.setitem(load_config()["jobs"], "disk_jobs", 0)
+    jobs = scheduler.JobScheduler(workers=2, log=lambda message: None)
+    running = []
+    overlaps = []
+
+    def work(cancel):
+        running.append(1)
+        overlaps.append(len(running))
+        time.sleep(0.2)
+        running.pop()
+
+    first = jobs.submit("a", work, paths=[tmp_path / "tModLoader"])
+    second = jobs.submit("b", work, paths=[tmp_path / "tModLoader"])
+    assert first.wait(5) and second.wait(5)
+    jobs.shutdown()
+
+    assert (first.status, second.status) == ("done", "done")
+    assert overlaps == [1, 1]
+
+
+def test_disk_limit_and_cancel_while_waiting(tmp_path, monkeypatch):
+    monkeypatch.setitem(load_config()["jobs"], "disk_jobs", 1)
+    jobs = scheduler.JobScheduler(workers=2, log=lambda message: None)
+    started = threading.Event()
+    release = threading.Event()
+
+    def hold(cancel):
+        started.set()
+        release.wait(5)
+
+    blocking = jobs.submit("a", hold, paths=[tmp_path / "a"], disk=True)
+    # 先のジョブが枠を取得してから次のジョブを登録する
+    assert started.wait(5)
+    waiting = jobs.submit("b", lambda cancel: None, paths=[tmp_path / "b"], disk=True)
+    time.sleep(0.3)
+    assert waiting.status == "waiting"
+
+    waiting.cancel.cancel()
+    assert waiting.wait(5)
+    assert waiting.status == "cancelled"
+    release.set()
+    assert blocking.wait(5) and blocking.status == "done"
+    jobs.shutdown()
+
+
+def test_cancelled_token_stops_lock_wait(tmp_path):
+    holder = scheduler.install_lock(tmp_path / "tModLoader")
+    assert holder.try_acquire()
+    token = CancelToken()
+    token.cancel()
+    try:
+        with pytest.raises(OperationCancelled):
+            with scheduler.job_resources([tmp_path / "tModLoader"], cancel=token, log=lambda m: None):
+                pass
+    finally:
+        holder.release()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+プロセス間で共有するダウンロードのテスト
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from tmodloader_installer.core import journal
+from tmodloader_installer.core.installer import SimpleInstaller
+from tmodloader_installer.core.shared_download import (
+    SharedDownload,
+    discard_unused,
+    live_refs,
+    shared_download_path,
+)
+
+
+def slow_download(calls, data=b"zip"):
+    def download(part):
+        calls.append(part)
+        time.sleep(0.3)
+        part.write_bytes(data)
+
+    return download
+
+
+def test_second_user_waits_and_reuses_file(tmp_path):
+    path = shared_download_path(tmp_path, "https://example.com/tModLoader.zip")
+    first, second = SharedDownload(path), SharedDownload(path)
+    calls = []
+
+    thread = threading.Thread(target=first.acquire, args=(slow_download(calls),))
+    thread.start()
+    time.sleep(0.1)
+    assert second.acquire(slow_download(calls)) == path
+    thread.join()
+
+    assert len(calls) == 1
+    assert first.downloaded and not second.downloaded
+    assert live_refs(path) == 2
+
+    # 参照が残っている間は削除しない
+    first.release()
+    assert path.read_bytes() == b"zip"
+    second.release()
+    assert not path.exists()
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_failed_download_lets_next_user_retry(tmp_path):
+    path = tmp_path / "tModLoader.zip"
+
+    def broken(part):
+        part.write_bytes(b"partial")
+        raise ValueError("ダイジェストが一致しません")
+
+    with pytest.raises(ValueError):
+        SharedDownload(path).acquire(broken)
+    assert not path.exists()
+    assert live_refs(path) == 0
+
+    retry = SharedDownload(path)
+    calls = []
+    retry.acquire(slow_download(calls, b"ok"))
+    assert calls and path.read_bytes() == b"ok"
+    retry.release()
+
+
+def test_refs_of_exited_processes_are_not_counted(tmp_path):
+    path = tmp_path / "tModLoader.zip"
+    code = (
+        "from pathlib import Path\n"
+        "from tmodloader_installer.core.shared_download import SharedDownload\n"
+        f"shared = SharedDownload({str(path)!r})\n"
+        "shared.acquire(lambda part: part.write_bytes(b'zip'))\n"
+        "import os\n"
+        "os._exit(0)\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+    assert path.exists()
+    assert discard_unused(path)
+    assert not path.exists()
+
+
+@pytest.mark.parametrize("staged", [False, True])
+def test_failed_extract_releases_shared_download(tmp_path, monkeypatch, staged):
+    monkeypatch.setattr(journal, "journal_dir", lambda: tmp_path / "journal")
+    url = "https://example.invalid/v2025.06.3.0/tModLoader.zip"
+    installer = SimpleInstaller(
+        "https://github.com/tModLoader/tModLoader/releases/tag/v2025.06.3.0",
+        tmp_path / "tModLoader",
+        download_url=url,
+        staged=staged,
+    )
+    path = shared_download_path(tmp_path, url)
+    installer.shared_download = SharedDownload(path)
+    installer.temp_file = installer.shared_download.acquire(
+        lambda part: part.write_bytes(b"not a zip")
+    )
+
+    with pytest.raises(zipfile.BadZipFile):
+        installer._extract_files()
+
+    # 展開に失敗しても参照を外し、使われていないダウンロードは削除する
+    assert installer.shared_download is None
+    assert live_refs(path) == 0
+    assert not path.exists()
+
+
+INSTALL_SCRIPT = """
+import json, sys, time
+from pathlib import Path
+
+base, archive, install_path = Path(sys.argv[1]), Path(sys.argv[2]), sys.argv[3]
+
+# 作業用のフォルダを実行ファイルの場所の代わりに使う
+import tmodloader_installer.utils as utils
+from tmodloader_installer.utils import config, helpers
+
+for module in (utils, config, helpers):
+    module.get_app_base_path = lambda: base
+
+
+class Response:
+    def __init__(self, url):
+        self.url = url
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"releases": [{
+            "tag_name": "v2025.06.3.0", "name": "v2025.06.3.0", "prerelease": False,
+            "draft": False, "html_url": "",
+            "assets": [{"name": "tModLoader.zip",
+                        "browser_download_url": "v2025.06.3.0/tModLoader.zip"}],
+        }]}
+
+    def iter_content(self, chunk_size=None):
+        with open(base / "downloads.log", "a") as log:
+            log.write(self.url + "\\n")
+        data = archive.read_bytes()
+        for start in range(0, len(data), 256):
+            time.sleep(0.05)
+            yield data[start:start + 256]
+
+    def close(self):
+        pass
+
+
+class requests:
+    RequestException = OSError
+
+    @staticmethod
+    def get(url, **kwargs):
+        return Response(url)
+
+
+sys.modules["requests"] = requests
+from tmodloader_installer.cli.main import run_install
+
+run_install(["v2025.06.3.0", install_path, "--source", "http://mirror.invalid/"])
+"""
+
+
+def test_concurrent_installs_share_one_download_with_default_limits(tmp_path):
+    """同時実行数の既定値（ディスク1件）で待たされても、ダウンロードは1回だけ"""
+    base = tmp_path / "app"
+    base.mkdir()
+    archive = tmp_path / "tModLoader.zip"
+    with zipfile.ZipFile(archive, "w") as zip_ref:
+        zip_ref.writestr("tModLoader.dll", b"new")
+        for i in range(10):
+            zip_ref.writestr(f"Libraries/lib{i}.dll", bytes([i]) * 512)
+    env = dict(os.environ, PYTHONPATH=str(Path(__file__).resolve().parent.parent))
+    env.pop("TMODLOADER_INSTALLER_CONFIG", None)
+
+    def start(name):
+        return subprocess.Popen(
+            [sys.executable, "-c", INSTALL_SCRIPT, str(base), str(archive), str(tmp_path / name)],
+            cwd=tmp_path,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+
+    first = start("a")
+    # 最初のプロセスがダウンロードを始めてから次のプロセスを起動
+    deadline = time.monotonic() + 30
+    while not (base / "downloads.log").exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    second = start("b")
+    outputs = [process.communicate(timeout=120)[0].decode() for process in (first, second)]
+
+    assert [first.returncode, second.returncode] == [0, 0], outputs
+    assert len((base / "downloads.log").read_text().splitlines()) == 1
+    assert "他のプロセスがダウンロードしたファイルを使用" in outputs[1]
+    for name in ("a", "b"):
+        assert (tmp_path / name / "tModLoader.dll").read_bytes() == b"new"
+    # 最後のプロセスが参照を外した時に共有のアーカイブを削除
+    assert not list((base / "downloads").glob("*.zip"))
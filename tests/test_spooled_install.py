@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+メモリ上のバッファへのダウンロード・展開（--in-memory）のテスト
+"""
+
+import io
+import sys
+import types
+import zipfile
+
+import pytest
+
+from tmodloader_installer.cli.main import run_install
+from tmodloader_installer.core import installer, journal, planner
+from tmodloader_installer.core.installer import SimpleInstaller
+
+DOWNLOAD_URL = "https://example.invalid/v2025.06.3.0/tModLoader.zip"
+
+
+@pytest.fixture(autouse=True)
+def app_base(tmp_path, monkeypatch):
+    base = tmp_path / "app"
+    base.mkdir()
+    monkeypatch.setattr(installer, "get_app_base_path", lambda: base)
+    monkeypatch.setattr(journal, "journal_dir", lambda: base / "journal")
+    monkeypatch.setattr(planner, "_throughput_file", lambda: base / "throughput.json")
+    return base
+
+
+@pytest.fixture
+def archive_data():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_ref:
+        zip_ref.writestr("tModLoader.dll", b"new")
+        for i in range(4):
+            zip_ref.writestr(f"Libraries/lib{i}.dll", bytes([i]) * 4096)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def fake_requests(archive_data, monkeypatch):
+    """アーカイブを小さなチャンクで返すrequestsモジュール"""
+
+    class Response:
+        def raise_for_status(self):
+            pass
+
+        def iter_content(self, chunk_size=None):
+            for start in range(0, len(archive_data), 1024):
+                yield archive_data[start : start + 1024]
+
+        def close(self):
+            pass
+
+    module = types.SimpleNamespace(urls=[])
+
+    def get(url, stream=False, **kwargs):
+        module.urls.append(url)
+        return Response()
+
+    module.get = get
+    monkeypatch.setitem(sys.modules, "requests", module)
+    return module
+
+
+def make_installer(install_path, **kwargs):
+    return SimpleInstaller(
+        "https://github.com/tModLoader/tModLoader/releases/tag/v2025.06.3.0",
+        install_path,
+        download_url=DOWNLOAD_URL,
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize("staged", [False, True])
+def test_spooled_download_is_extracted_without_writing_archive(
+    fake_requests, archive_data, tmp_path, app_base, staged
+):
+    install = tmp_path / "tModLoader"
+    install.mkdir()
+    (install / "tModLoader.dll").write_bytes(b"old")
+    (install / "enable.json").write_text("[]")
+    simple = make_installer(install, spool_threshold=1024, staged=staged)
+
+    simple._download_file()
+
+    assert fake_requests.urls == [DOWNLOAD_URL]
+    assert simple.temp_file is None
+    # 閾値を超えた分は一時ファイルに退避するが、内容はそのまま読み出せる
+    assert simple.archive_buffer._rolled
+    assert simple.archive_buffer.tell() == 0
+    assert simple.archive_buffer.read() == archive_data
+    simple.archive_buffer.seek(0)
+
+    simple._extract_files()
+
+    assert simple.archive_buffer is None
+    assert (install / "tModLoader.dll").read_bytes() == b"new"
+    assert (install / "Libraries" / "lib3.dll").read_bytes() == b"\x03" * 4096
+    assert (install / "enable.json").read_text() == "[]"
+    assert not list((app_base / "downloads").iterdir())
+    assert not (tmp_path / "tModLoader.staging").exists()
+    assert not journal.pending_journals()
+
+
+def test_spool_without_rollover_stays_in_memory(fake_requests, tmp_path):
+    simple = make_installer(tmp_path / "tModLoader", spool_threshold=1024 * 1024)
+
+    simple._download_file()
+
+    assert not simple.archive_buffer._rolled
+    simple._extract_files()
+    assert (tmp_path / "tModLoader" / "tModLoader.dll").read_bytes() == b"new"
+
+
+@pytest.mark.parametrize("threshold", ["0", "-1", "abc"])
+def test_non_positive_spool_threshold_is_rejected(threshold, tmp_path):
+    with pytest.raises(SystemExit) as excinfo:
+        run_install(
+            ["latest", str(tmp_path / "tModLoader"), "--in-memory", "--spool-threshold", threshold]
+        )
+    assert excinfo.value.code == 2
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+ステージングを使った切り替えインストールのテスト
+"""
+
+import os
+import sys
+import zipfile
+
+import pytest
+
+from tmodloader_installer.core import journal
+from tmodloader_installer.core.backup import installed_tag
+from tmodloader_installer.core.journal import ExtractJob
+from tmodloader_installer.core.installer import write_installed_marker
+from tmodloader_installer.core.staging import link_missing_files, staging_path, swap_directories
+from tmodloader_installer.utils.constants import INSTALLED_MARKER_NAME
+
+
+@pytest.fixture(autouse=True)
+def journal_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "journal"
+    monkeypatch.setattr(journal, "journal_dir", lambda: directory)
+    return directory
+
+
+def make_install(root):
+    (root / "Mods").mkdir(parents=True)
+    (root / "Mods" / "enable.json").write_text("[]")
+    (root / "tModLoader.dll").write_bytes(b"old")
+    return root
+
+
+def test_carry_over_links_user_files(tmp_path):
+    live = make_install(tmp_path / "tModLoader")
+    staging = tmp_path / "tModLoader.staging"
+    staging.mkdir()
+    (staging / "tModLoader.dll").write_bytes(b"new")
+
+    assert link_missing_files(live, staging, skip={"Mods/skipped.tmod"}) == 1
+    assert (staging / "Mods" / "enable.json").read_text() == "[]"
+    # ステージングにあるファイルは上書きしない
+    assert (staging / "tModLoader.dll").read_bytes() == b"new"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="シンボリックリンクの作成に権限が必要")
+def test_carry_over_keeps_directory_symlinks(tmp_path):
+    live = make_install(tmp_path / "tModLoader")
+    worlds = tmp_path / "other_drive" / "Worlds"
+    worlds.mkdir(parents=True)
+    (worlds / "world.wld").write_bytes(b"world")
+    os.symlink(worlds, live / "Worlds", target_is_directory=True)
+    staging = tmp_path / "tModLoader.staging"
+    staging.mkdir()
+
+    link_missing_files(live, staging)
+
+    assert (staging / "Worlds").is_symlink()
+    assert os.readlink(staging / "Worlds") == str(worlds)
+    assert (staging / "Worlds" / "world.wld").read_bytes() == b"world"
+
+
+def test_swap_keeps_previous_tree(tmp_path):
+    live = make_install(tmp_path / "tModLoader")
+    staging = staging_path(live)
+    staging.mkdir()
+    (staging / "tModLoader.dll").write_bytes(b"new")
+
+    previous = swap_directories(staging, live)
+
+    assert (live / "tModLoader.dll").read_bytes() == b"new"
+    assert (previous / "tModLoader.dll").read_bytes() == b"old"
+    assert not staging.exists()
+
+    # 新規インストールは名前を変えるだけ
+    fresh = tmp_path / "fresh"
+    staging_path(fresh).mkdir()
+    assert swap_directories(staging_path(fresh), fresh) is None
+    assert fresh.is_dir()
+
+
+class Crash(BaseException):
+    """プロセスの異常終了を再現"""
+
+
+def test_staged_extract_rolls_back_after_swap(tmp_path, journal_dir):
+    live = make_install(tmp_path / "tModLoader")
+    archive = tmp_path / "tModLoader.zip"
+    with zipfile.ZipFile(archive, "w") as zip_ref:
+        zip_ref.writestr("tModLoader.dll", b"new")
+
+    with zipfile.ZipFile(archive) as zip_ref:
+        job = ExtractJob.start(
+            archive,
+            staging_path(live),
+            live,
+            zip_ref.infolist(),
+            in_place=False,
+            tag="v2",
+            log=lambda message: None,
+        )
+        job.run(zip_ref)
+
+    # 入れ替えた後、確定を記録する前に中断された
+    append = job.journal.append
+
+    def crash_before_commit(op, **fields):
+        if op == "committed":
+            raise Crash()
+        append(op, **fields)
+
+    job.journal.append = crash_before_commit
+    with pytest.raises(Crash):
+        job.finish()
+    assert (live / "tModLoader.dll").read_bytes() == b"new"
+    assert installed_tag(live) == "v2"
+
+    journal.load_job(job.journal.path, log=lambda message: None).rollback()
+
+    assert (live / "tModLoader.dll").read_bytes() == b"old"
+    assert (live / "Mods" / "enable.json").read_text() == "[]"
+    assert installed_tag(live) is None
+    assert not staging_path(live).exists()
+    assert not list(journal_dir.iterdir())
+
+
+def test_failed_swap_leaves_live_marker_untouched(tmp_path, journal_dir, monkeypatch):
+    live = make_install(tmp_path / "tModLoader")
+    write_installed_marker(live, "v1")
+    marker = (live / INSTALLED_MARKER_NAME).read_bytes()
+    archive = tmp_path / "tModLoader.zip"
+    with zipfile.ZipFile(archive, "w") as zip_ref:
+        zip_ref.writestr("tModLoader.dll", b"new")
+
+    with zipfile.ZipFile(archive) as zip_ref:
+        job = ExtractJob.start(
+            archive,
+            staging_path(live),
+            live,
+            zip_ref.infolist(),
+            in_place=False,
+            tag="v2",
+            log=lambda message: None,
+        )
+        job.run(zip_ref)
+
+    def fail_swap(*args):
+        raise OSError("rename failed")
+
+    monkeypatch.setattr("tmodloader_installer.core.staging.swap_directories", fail_swap)
+    with pytest.raises(OSError):
+        job.finish()
+    job.rollback()
+
+    # ステージングで書いた記録が既存フォルダの記録に及ばない
+    assert (live / INSTALLED_MARKER_NAME).read_bytes() == marker
+    assert installed_tag(live) == "v1"
+    assert (live / "tModLoader.dll").read_bytes() == b"old"
+    assert not staging_path(live).exists()
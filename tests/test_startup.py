@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+起動時に読み込むモジュールのテスト
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_cli_does_not_import_gui_or_network_modules():
+    code = (
+        "import json, sys\n"
+        "from tmodloader_installer.cli import main\n"
+        "try:\n"
+        "    main(['--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(json.dumps(sorted(name for name in ('tkinter', 'requests') if name in sys.modules)))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+
+
+def test_gui_module_does_not_import_network_modules():
+    pytest.importorskip("tkinter")
+    code = (
+        "import json, sys\n"
+        "import tmodloader_installer.gui.main_window\n"
+        "print(json.dumps(sorted(name for name in ('urllib.request', 'http.client', 'requests')"
+        " if name in sys.modules)))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
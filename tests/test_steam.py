@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Steamライブラリの検出のテスト
+"""
+
+from tmodloader_installer.core.steam import parse_vdf
+
+
+def test_parse_vdf_library_folders():
+    text = """
+    "libraryfolders"
+    {
+        "0"
+        {
+            "path"  "C:\\\\Program Files (x86)\\\\Steam"
+            "apps" { "1281930" "123" }
+        }
+        // 古い形式
+        "1"  "D:\\\\SteamLibrary"
+    }
+    """
+    folders = parse_vdf(text)["libraryfolders"]
+
+    assert folders["0"]["path"] == "C:\\Program Files (x86)\\Steam"
+    assert folders["0"]["apps"] == {"1281930": "123"}
+    assert folders["1"] == "D:\\SteamLibrary"
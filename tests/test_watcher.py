@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+リリース監視・事前展開済みリリースの差し替えのテスト
+"""
+
+import json
+import sys
+import types
+import zipfile
+
+import pytest
+
+from tmodloader_installer.core import archive_cache, journal
+from tmodloader_installer.core import watcher as watcher_module
+from tmodloader_installer.core.archive_cache import ArchiveCache
+from tmodloader_installer.core.backup import installed_tag
+from tmodloader_installer.core.installer import write_installed_marker
+from tmodloader_installer.core.watcher import ReleaseWatcher
+
+
+@pytest.fixture(autouse=True)
+def app_base(tmp_path, monkeypatch):
+    base = tmp_path / "app"
+    monkeypatch.setattr(archive_cache, "get_app_base_path", lambda: base)
+    monkeypatch.setattr(journal, "journal_dir", lambda: base / "journal")
+    return base
+
+
+def make_archive(path, files):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(path, "w") as zip_ref:
+        for name, data in files.items():
+            zip_ref.writestr(name, data)
+    return path
+
+
+def prepare(state_dir, tag, files):
+    """watchが事前展開した状態を作成"""
+    release_dir = state_dir / tag
+    archive = make_archive(release_dir / "tModLoader.zip", files)
+    with zipfile.ZipFile(archive) as zip_ref:
+        zip_ref.extractall(release_dir / "extracted")
+    state = {
+        "known_tag": tag,
+        "prepared": {
+            "tag": tag,
+            "path": str(release_dir / "extracted"),
+            "html_url": f"https://github.com/tModLoader/tModLoader/releases/tag/{tag}",
+            "download_url": f"https://example.invalid/{tag}/tModLoader.zip",
+            "prepared_at": "2026-10-19 12:00:00",
+        },
+    }
+    (state_dir / "watch_state.json").write_text(json.dumps(state), encoding="utf-8")
+
+
+def test_apply_swaps_in_prepared_release(tmp_path, app_base):
+    install = tmp_path / "tModLoader"
+    old_files = {"tModLoader.dll": b"old", "Libraries/removed.dll": b"old"}
+    make_archive(ArchiveCache().path("v1"), old_files)
+    for name, data in old_files.items():
+        (install / name).parent.mkdir(parents=True, exist_ok=True)
+        (install / name).write_bytes(data)
+    (install / "Mods").mkdir()
+    (install / "Mods" / "enable.json").write_text("[]")
+    write_installed_marker(install, "v1")
+
+    state_dir = tmp_path / "staging"
+    prepare(state_dir, "v2", {"tModLoader.dll": b"new", "Libraries/added.dll": b"new"})
+
+    watcher = ReleaseWatcher(state_dir=state_dir, log=lambda message: None)
+    watcher.apply_prepared(install, backup=False)
+
+    assert installed_tag(install) == "v2"
+    assert (install / "tModLoader.dll").read_bytes() == b"new"
+    assert (install / "Libraries" / "added.dll").exists()
+    # 以前のバージョンで削除されたファイルは残さず、ユーザーのファイルは引き継ぐ
+    assert not (install / "Libraries" / "removed.dll").exists()
+    assert (install / "Mods" / "enable.json").read_text() == "[]"
+    assert not list(tmp_path.glob("tModLoader.*"))
+    assert not (state_dir / "v2").exists()
+    assert ArchiveCache().has("v2")
+    assert "prepared" not in watcher.state
+    assert not journal.pending_journals()
+
+
+def test_installed_tag_is_not_prepared_again(tmp_path):
+    install = tmp_path / "tModLoader"
+    install.mkdir()
+    write_installed_marker(install, "v2025.06.3.0")
+
+    watcher = ReleaseWatcher(
+        state_dir=tmp_path / "staging", install_path=install, log=lambda message: None
+    )
+
+    assert watcher.state["known_tag"] == "v2025.06.3.0"
+    assert not watcher._is_newer("v2025.06.3.0")
+    assert watcher._is_newer("v2025.07.1.0")
+
+
+class StopWatching(Exception):
+    pass
+
+
+def test_failed_polls_back_off_from_min_interval(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "requests", types.SimpleNamespace(RequestException=OSError))
+    watcher = ReleaseWatcher(state_dir=tmp_path / "staging", interval=1, log=lambda message: None)
+    results = [OSError("offline")] * 7 + [(None, 60), OSError("offline")]
+
+    def poll():
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    waits = []
+
+    def sleep(seconds):
+        waits.append(seconds)
+        if not results:
+            raise StopWatching
+
+    monkeypatch.setattr(watcher, "poll", poll)
+    monkeypatch.setattr(watcher_module.time, "sleep", sleep)
+    with pytest.raises(StopWatching):
+        watcher.run()
+
+    # 下限の60秒から倍にしていき、上限で止める。成功したら最初から
+    assert waits == [60, 120, 240, 480, 960, 1920, 3600, 60, 60]
+
+
+def test_failed_apply_after_move_forgets_prepared_release(tmp_path, monkeypatch):
+    install = tmp_path / "tModLoader"
+    install.mkdir()
+    (install / "tModLoader.dll").write_bytes(b"old")
+    write_installed_marker(install, "v1")
+    state_dir = tmp_path / "staging"
+    prepare(state_dir, "v2", {"tModLoader.dll": b"new"})
+
+    def fail_swap(*args, **kwargs):
+        raise OSError("swap failed")
+
+    monkeypatch.setattr("tmodloader_installer.core.staging.swap_directories", fail_swap)
+    watcher = ReleaseWatcher(state_dir=state_dir, log=lambda message: None)
+    with pytest.raises(OSError):
+        watcher.apply_prepared(install, backup=False)
+
+    assert (install / "tModLoader.dll").read_bytes() == b"old"
+    assert installed_tag(install) == "v1"
+    # 移した事前展開は元に戻す時に消えるため、状態からも外して次回準備し直す
+    state = json.loads((state_dir / "watch_state.json").read_text(encoding="utf-8"))
+    assert "prepared" not in state
+    assert watcher._is_newer("v2")
+    assert not (state_dir / "v2").exists()
+    with pytest.raises(ValueError):
+        watcher.apply_prepared(install, backup=False)
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+CLI エントリーポイント（python -m tmodloader_installer.cli）
+
+GUIのモジュール（tkinter）は読み込まない。
+"""
+
+from tmodloader_installer.cli.main import main
+
+
+if __name__ == "__main__":
+    main()
@@ -4,32 +4,927 @@
 """
 
 import argparse
+import contextlib
+import signal
 import sys
-from tmodloader_installer.core import SimpleInstaller
+import time
+from tmodloader_installer.core.extract_filter import EXTRACT_PROFILES, get_extract_filter
+from tmodloader_installer.utils import (
+    DEFAULT_COPY_WORKERS,
+    DEFAULT_SERVE_PORT,
+    SPOOL_THRESHOLD_MB,
+    WATCH_INTERVAL,
+)
 
 
-def main():
-    """メイン関数"""
+def positive_int(value: str) -> int:
+    """1以上の整数の引数（0を指定して機能が無効になるのを防ぐ）"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"整数を指定してください: {value}")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"1以上の値を指定してください: {value}")
+    return number
+
+
+def copy_progress_printer(interval: float = 1.0):
+    """コピーの進捗（ファイル数・バイト数）を一定間隔で表示する関数を作成"""
+    last = [0.0]
+
+    def callback(progress):
+        now = time.monotonic()
+        done = progress.files_done >= progress.files_total
+        if now - last[0] < interval and not done:
+            return
+        last[0] = now
+        print(f"  コピー中: {progress.describe()} ({progress.percent:.0f}%)")
+
+    return callback
+
+
+def discovered_install_path(parser):
+    """Steamライブラリから検出したインストール先（見つからない場合はエラー終了）"""
+    from tmodloader_installer.core.steam import SteamDiscovery
+
+    installs = SteamDiscovery().installs()
+    if not installs:
+        parser.error("インストール先が検出できませんでした。インストール先パスを指定してください")
+    print(f"検出したインストール先: {installs[0]}")
+    return installs[0]
+
+
+def add_limit_rate_argument(parser):
+    """帯域制限の引数を追加"""
+    parser.add_argument(
+        "--limit-rate",
+        default=None,
+        metavar="RATE",
+        help="通信の上限（例: 500K, 5M、0で無制限。既定: config.yamlのbandwidth）",
+    )
+
+
+def apply_limit_rate(parser, args):
+    """--limit-rateの指定をこのプロセスの帯域制限に反映"""
+    if args.limit_rate is None:
+        return
+    from tmodloader_installer.core.bandwidth import get_limiter
+
+    try:
+        get_limiter().set_limit(args.limit_rate)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+def add_io_arguments(parser):
+    """ディスクI/Oの制限の引数を追加"""
+    parser.add_argument(
+        "--background",
+        action="store_true",
+        help="I/O優先度を下げ、config.yamlのio.backgroundの上限でバックアップ・展開（稼働中のサーバーを妨げない）",
+    )
+    parser.add_argument(
+        "--io-limit",
+        default=None,
+        metavar="RATE",
+        help="バックアップ・展開の読み書きの上限（例: 20M、0で無制限。既定: config.yamlのio）",
+    )
+    parser.add_argument(
+        "--io-ops",
+        type=int,
+        default=None,
+        help="バックアップ・展開のファイル操作数の上限（回/秒、0で無制限）",
+    )
+
+
+def io_governor_from_args(parser, args):
+    """引数からディスクI/Oの制限を作成（バックグラウンドモードでは優先度も下げる）"""
+    from tmodloader_installer.core.io_governor import get_io_governor, lower_io_priority
+
+    try:
+        governor = get_io_governor(args.background, limit=args.io_limit, ops=args.io_ops)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.background:
+        applied = lower_io_priority()
+        print(f"バックグラウンドモード: {'、'.join(applied) or '優先度の変更に未対応'}")
+    if governor:
+        print(f"ディスクI/Oの制限: {governor.describe()}")
+    return governor
+
+
+@contextlib.contextmanager
+def cancel_on_interrupt():
+    """Ctrl-Cで処理をキャンセルするCancelTokenを作成（2回目のCtrl-Cで強制終了）"""
+    from tmodloader_installer.core.cancel import CancelToken
+
+    token = CancelToken()
+
+    def handler(signum, frame):
+        if token.cancelled:
+            raise KeyboardInterrupt
+        token.cancel()
+        print("\nキャンセルしています。行った作業を元に戻します...（もう一度Ctrl-Cで強制終了）")
+
+    previous = signal.signal(signal.SIGINT, handler)
+    try:
+        yield token
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+
+def run_install(argv):
+    """インストール（既定のコマンド）"""
+    from tmodloader_installer.core.release_store import LINK_MODES
+
     parser = argparse.ArgumentParser(description="tModLoader インストーラー")
     parser.add_argument(
         "github_url",
-        help="GitHub Release URL (例: https://github.com/tModLoader/tModLoader/releases/tag/v2025.06.3.0)",
+        help="GitHub Release URL またはバージョン指定 (例: https://github.com/tModLoader/tModLoader/releases/tag/v2025.06.3.0, latest, 2025.06.*)",
     )
     parser.add_argument(
         "install_path",
-        help="インストール先パス (例: C:\\Program Files (x86)\\Steam\\steamapps\\common\\tModLoader)",
+        nargs="*",
+        help="インストール先パス（複数指定可、省略時はSteamライブラリから検出） (例: C:\\Program Files (x86)\\Steam\\steamapps\\common\\tModLoader)",
+    )
+    parser.add_argument(
+        "--source",
+        default=None,
+        help="リリースの取得元（github、ディレクトリのパス・file:// のURL、http(s):// のミラーURL。既定: config.yamlの設定）",
+    )
+    parser.add_argument(
+        "--parallel-targets",
+        type=positive_int,
+        default=None,
+        help="複数インストール先へ同時に配置する数（既定: インストール先の数）",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="ダウンロードしたアーカイブをキャッシュし、キャッシュ済みなら再ダウンロードしない",
+    )
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help="インストール済みバージョンからの差分のみを適用（--cacheを含む）",
+    )
+    parser.add_argument(
+        "--store",
+        action="store_true",
+        help="展開済みリリースを保存し、保存済みなら解凍せずにリンクで組み立てる",
+    )
+    parser.add_argument(
+        "--link-mode",
+        choices=LINK_MODES,
+        default=None,
+        help="--store時の組み立て方（既定: config.yamlのrelease_store.link_mode）",
+    )
+    parser.add_argument(
+        "--in-memory",
+        action="store_true",
+        help="アーカイブをディスクに書き出さずメモリ上で展開（--cache指定時は無効）",
+    )
+    parser.add_argument(
+        "--spool-threshold",
+        type=positive_int,
+        default=SPOOL_THRESHOLD_MB,
+        help=f"--in-memory時にメモリに保持する上限（MB、既定: {SPOOL_THRESHOLD_MB}）",
+    )
+    parser.add_argument(
+        "--staged",
+        action="store_true",
+        help="隣接するステージングフォルダに展開してからフォルダ名の変更で切り替え（複数のインストール先は常にこの方法）",
+    )
+    parser.add_argument(
+        "--backup-profile",
+        default=None,
+        help="バックアッププロファイル (full, data-only, config.yamlで定義したもの)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_COPY_WORKERS,
+        help=f"バックアップ・配置のコピー並列数（既定: {DEFAULT_COPY_WORKERS}）",
+    )
+    parser.add_argument(
+        "--extract-profile",
+        choices=sorted(EXTRACT_PROFILES),
+        default=None,
+        help="展開プロファイル（使わないプラットフォーム向けのファイルを展開しない）",
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="展開するファイルのパターン（複数指定可）",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="展開しないファイルのパターン（複数指定可）",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="インストールせずに必要な容量と所要時間の見積もりだけを表示",
     )
+    add_limit_rate_argument(parser)
+    add_io_arguments(parser)
+    parser.epilog = "サブコマンド: " + ", ".join(COMMANDS)
+
+    args = parser.parse_args(argv)
+    apply_limit_rate(parser, args)
+    if args.store and args.delta:
+        parser.error("--store と --delta は同時に指定できません")
+    from tmodloader_installer.core import OperationCancelled
+
+    if not args.install_path:
+        args.install_path = [discovered_install_path(parser)]
+    # 複数のインストール先へは展開済みのツリーを配置するため、差分は適用できない
+    # （配置は常にステージングで組み立ててから切り替える）
+    if args.delta and len(args.install_path) > 1:
+        parser.error("--delta は複数のインストール先と同時に指定できません")
 
-    args = parser.parse_args()
+    spool_threshold = args.spool_threshold * 1024 * 1024 if args.in_memory else None
 
     try:
-        installer = SimpleInstaller(args.github_url, args.install_path)
-        installer.download_and_install()
+        extract_filter = get_extract_filter(
+            args.extract_profile, include=args.include, exclude=args.exclude
+        )
+        if args.dry_run:
+            return show_plan(args, extract_filter)
+        io_governor = io_governor_from_args(parser, args)
+
+        from tmodloader_installer.core.scheduler import job_resources
+
+        with cancel_on_interrupt() as cancel:
+            install_targets(
+                args,
+                spool_threshold,
+                extract_filter,
+                io_governor,
+                cancel,
+                resources=lambda: job_resources(
+                    args.install_path, "インストール", disk=True, network=True, cancel=cancel
+                ),
+            )
         print("インストールが正常に完了しました！")
+    except OperationCancelled:
+        print("インストールをキャンセルしました")
+        sys.exit(130)
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        sys.exit(1)
+
+
+def install_targets(args, spool_threshold, extract_filter, io_governor, cancel, resources):
+    """引数に従って1つまたは複数のインストール先にインストール
+
+    resources: 同時実行数の枠とインストール先のロックを保持するコンテキストを返す関数。
+        共有するダウンロードへの参照は枠を待つ前に登録し、同じリリースを待っている間に
+        先のプロセスがアーカイブを削除しないようにする。
+    """
+    from tmodloader_installer.core import MultiTargetInstaller, SimpleInstaller
+
+    # 展開済みリリースから組み立てる場合は1回保存すれば各インストール先はリンクだけで済む
+    if len(args.install_path) == 1 or args.store:
+        installers = [
+            SimpleInstaller(
+                args.github_url,
+                install_path,
+                use_cache=args.cache,
+                use_delta=args.delta,
+                spool_threshold=spool_threshold,
+                staged=args.staged,
+                backup_profile=args.backup_profile,
+                extract_filter=extract_filter,
+                copy_workers=args.workers,
+                progress_callback=copy_progress_printer(),
+                release_source=args.source,
+                io_governor=io_governor,
+                cancel=cancel,
+                use_store=args.store,
+                link_mode=args.link_mode,
+            )
+            for install_path in args.install_path
+        ]
+        for installer in installers:
+            installer.reserve_download()
+        with resources():
+            for installer in installers:
+                installer.download_and_install()
+    else:
+        installer = MultiTargetInstaller(
+            args.github_url,
+            args.install_path,
+            max_workers=args.parallel_targets,
+            use_cache=args.cache,
+            spool_threshold=spool_threshold,
+            backup_profile=args.backup_profile,
+            extract_filter=extract_filter,
+            copy_workers=args.workers,
+            release_source=args.source,
+            io_governor=io_governor,
+            cancel=cancel,
+        )
+        installer.reserve_download()
+        try:
+            with resources():
+                results = installer.download_and_install()
+        finally:
+            for line in installer.summary_lines():
+                print(line)
+        if not all(result.succeeded for result in results):
+            print("一部のインストール先でエラーが発生しました")
+            sys.exit(1)
+
+
+def show_plan(args, extract_filter):
+    """インストールの見積もりを表示"""
+    from tmodloader_installer.core import SimpleInstaller
+    from tmodloader_installer.core.planner import plan_install
+
+    all_ok = True
+    for install_path in args.install_path:
+        installer = SimpleInstaller(
+            args.github_url,
+            install_path,
+            use_cache=args.cache,
+            spool_threshold=args.spool_threshold * 1024 * 1024 if args.in_memory else None,
+            staged=args.staged,
+            backup_profile=args.backup_profile,
+            extract_filter=extract_filter,
+            release_source=args.source,
+        )
+        plan = plan_install(installer)
+        print(f"=== {install_path} ===")
+        for line in plan.lines():
+            print(f"  {line}")
+        all_ok = all_ok and plan.ok
+
+    if not all_ok:
+        print("空き容量が不足しています")
+        sys.exit(1)
+
+
+def run_plan(argv):
+    """インストールの見積もりを表示（--dry-runと同じ）"""
+    return run_install(argv + ["--dry-run"])
+
+
+def run_watch(argv):
+    """新しいリリースを監視して事前にダウンロード・展開"""
+    from tmodloader_installer.core.watcher import ReleaseWatcher
+
+    parser = argparse.ArgumentParser(
+        prog="tmodloader-installer watch",
+        description="新しいリリースを監視して事前にダウンロード・展開します",
+    )
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=WATCH_INTERVAL,
+        help=f"ポーリング間隔（秒、既定: {WATCH_INTERVAL}）",
+    )
+    parser.add_argument("--once", action="store_true", help="1回だけ確認して終了")
+    parser.add_argument("--current-tag", help="現在インストール済みのタグ (例: v2025.06.3.0)")
+    parser.add_argument(
+        "--install-path",
+        help="インストール済みのタグを読み取るインストール先（既定: Steamライブラリから検出）",
+    )
+    parser.add_argument("--state-dir", help="事前展開先・監視状態の保存先ディレクトリ")
+    add_limit_rate_argument(parser)
+
+    args = parser.parse_args(argv)
+    apply_limit_rate(parser, args)
+
+    install_path = None
+    if not args.current_tag:
+        from tmodloader_installer.core.steam import default_install_path
+
+        install_path = args.install_path or default_install_path()
+    watcher = ReleaseWatcher(
+        state_dir=args.state_dir,
+        current_tag=args.current_tag,
+        interval=args.interval,
+        install_path=install_path,
+    )
+    try:
+        prepared = watcher.run(once=args.once)
+        if prepared:
+            print(f"準備済み: {prepared['tag']} ({prepared['path']})")
+    except KeyboardInterrupt:
+        print("監視を終了しました")
+
+
+def run_apply(argv):
+    """事前展開済みのリリースをインストール先に差し替え"""
+    from tmodloader_installer.core.watcher import ReleaseWatcher
+
+    parser = argparse.ArgumentParser(
+        prog="tmodloader-installer apply",
+        description="watchで事前展開したリリースをインストール先に差し替えます",
+    )
+    parser.add_argument("install_path", help="インストール先パス")
+    parser.add_argument("--state-dir", help="事前展開先・監視状態の保存先ディレクトリ")
+    parser.add_argument(
+        "--no-backup", action="store_true", help="差し替え前のバックアップを作成しない"
+    )
+
+    args = parser.parse_args(argv)
+
+    try:
+        from tmodloader_installer.core.scheduler import job_resources
+
+        watcher = ReleaseWatcher(state_dir=args.state_dir)
+        with job_resources([args.install_path], "差し替え", disk=True):
+            backup_path = watcher.apply_prepared(args.install_path, backup=not args.no_backup)
+        if backup_path:
+            print(f"バックアップはこちらに保存されました: {backup_path}")
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        sys.exit(1)
+
+
+def run_versions(argv):
+    """キャッシュ済みのリリース一覧を表示"""
+    from tmodloader_installer.core.release_index import filter_releases
+    from tmodloader_installer.core.release_source import GitHubSource, get_release_source
+
+    parser = argparse.ArgumentParser(
+        prog="tmodloader-installer versions",
+        description="リリース一覧をローカルキャッシュから表示します",
+    )
+    parser.add_argument(
+        "pattern", nargs="?", default="*", help="絞り込みパターン (例: 2025.06.*)"
+    )
+    parser.add_argument("--sync", action="store_true", help="表示前に新しいリリースを取得")
+    parser.add_argument("--prerelease", action="store_true", help="プレリリースも表示")
+    parser.add_argument("--limit", type=int, default=20, help="表示件数（既定: 20）")
+    parser.add_argument(
+        "--source", default=None, help="リリースの取得元（既定: config.yamlの設定）"
+    )
+
+    args = parser.parse_args(argv)
+
+    source = get_release_source(args.source)
+    if isinstance(source, GitHubSource):
+        index = source.index
+        try:
+            if args.sync or not index.data["releases"]:
+                added = index.sync()
+                print(f"リリース一覧を更新しました（新規 {added} 件）")
+        except Exception as e:
+            print(f"リリース一覧の更新に失敗しました: {e}")
+        releases = index.releases(include_prerelease=args.prerelease, pattern=args.pattern)
+    else:
+        try:
+            releases = filter_releases(source.releases(), args.prerelease, args.pattern)
+        except Exception as e:
+            print(f"リリース一覧の取得に失敗しました: {e}")
+            sys.exit(1)
+
+    for release in releases[: args.limit]:
+        label = " (プレリリース)" if release.get("prerelease") else ""
+        published = (release.get("published_at") or "")[:10]
+        print(f"{release['tag_name']:<20} {published}{label}")
+    if not releases:
+        print("該当するリリースがありません")
+
+
+def run_delta(argv):
+    """リリース間の差分パッケージを作成・適用"""
+    from tmodloader_installer.core.archive_cache import ArchiveCache
+    from tmodloader_installer.core.delta import DeltaStore, apply_delta
+
+    parser = argparse.ArgumentParser(
+        prog="tmodloader-installer delta",
+        description="キャッシュ済みリリース間の差分パッケージを作成・適用します",
+    )
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    create_parser = subparsers.add_parser("create", help="差分パッケージを作成")
+    create_parser.add_argument("from_tag", help="更新前のタグ (例: v2025.06.2.1)")
+    create_parser.add_argument("to_tag", help="更新後のタグ (例: v2025.06.3.0)")
+
+    apply_parser = subparsers.add_parser("apply", help="差分パッケージを適用")
+    apply_parser.add_argument("delta_path", help="差分パッケージのパス")
+    apply_parser.add_argument("install_path", help="インストール先パス")
+    apply_parser.add_argument(
+        "--no-verify", action="store_true", help="旧バージョンとの一致確認を省略"
+    )
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.action == "create":
+            cache = ArchiveCache()
+            for tag in (args.from_tag, args.to_tag):
+                if not cache.has(tag):
+                    raise ValueError(f"{tag} のアーカイブがキャッシュにありません")
+            path = DeltaStore().create(
+                cache.path(args.from_tag), cache.path(args.to_tag), args.from_tag, args.to_tag
+            )
+            print(f"差分パッケージを作成しました: {path}")
+        else:
+            manifest = apply_delta(
+                args.delta_path, args.install_path, verify=not args.no_verify
+            )
+            print(
+                f"差分を適用しました: {manifest['from']} -> {manifest['to']} "
+                f"(追加 {len(manifest['added'])}・変更 {len(manifest['changed'])}"
+                f"・削除 {len(manifest['removed'])})"
+            )
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        sys.exit(1)
+
+
+def run_mirror_index(argv):
+    """ローカルのリリースディレクトリのreleases.jsonを作成"""
+    from tmodloader_installer.core.release_source import LocalDirectorySource
+
+    parser = argparse.ArgumentParser(
+        prog="tmodloader-installer mirror-index",
+        description="<タグ>/tModLoader.zip を置いたディレクトリのreleases.jsonを作成し、HTTPミラーとして公開できるようにします",
+    )
+    parser.add_argument("directory", help="リリースのディレクトリ（例: cache/archives）")
+
+    args = parser.parse_args(argv)
+
+    try:
+        manifest_path, count = LocalDirectorySource(args.directory).write_manifest()
+        print(f"{manifest_path} を作成しました（{count} 件）")
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        sys.exit(1)
+
+
+def run_serve(argv):
+    """アーカイブキャッシュをLAN内にHTTPで公開"""
+    from tmodloader_installer.core.archive_cache import ArchiveCache
+    from tmodloader_installer.core.cache_server import CacheServer
+
+    parser = argparse.ArgumentParser(
+        prog="tmodloader-installer serve",
+        description="キャッシュ済みのリリースをHTTP（Range対応）で公開し、他のインストーラーの取得元にします",
+    )
+    parser.add_argument("--host", default="0.0.0.0", help="待ち受けるアドレス（既定: 0.0.0.0）")
+    parser.add_argument(
+        "--port", type=int, default=DEFAULT_SERVE_PORT, help=f"ポート番号（既定: {DEFAULT_SERVE_PORT}）"
+    )
+    parser.add_argument("--cache-dir", help="公開するアーカイブキャッシュのディレクトリ")
+    parser.add_argument(
+        "--pull-through",
+        action="store_true",
+        help="キャッシュにないリリースはGitHubから取得して保存してから返す",
+    )
+    add_limit_rate_argument(parser)
+
+    args = parser.parse_args(argv)
+    apply_limit_rate(parser, args)
+
+    try:
+        server = CacheServer(
+            ArchiveCache(args.cache_dir),
+            host=args.host,
+            port=args.port,
+            pull_through=args.pull_through,
+        )
+    except OSError as e:
+        print(f"サーバーを開始できません: {e}")
+        sys.exit(1)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("キャッシュサーバーを停止しました")
+    finally:
+        server.httpd.server_close()
+
+
+def run_sync_mods(argv):
+    """マニフェストに従ってModsフォルダを同期"""
+    from pathlib import Path
+
+    from tmodloader_installer.core.mod_sync import ModSyncer, publish_mods
+
+    parser = argparse.ArgumentParser(
+        prog="tmodloader-installer sync-mods",
+        description="Mod一覧（ファイル名・ハッシュ・有効状態）に従ってModsフォルダを揃えます",
+    )
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    pull_parser = subparsers.add_parser("pull", help="同期元から足りない・異なるModを取得")
+    pull_parser.add_argument(
+        "source", help="同期元（mods_manifest.jsonを置いたディレクトリ・file:// またはhttp(s)://のURL）"
+    )
+    pull_parser.add_argument("install_path", help="インストール先パス")
+    pull_parser.add_argument(
+        "--prune", action="store_true", help="一覧にない.tmodファイルを削除"
+    )
+    pull_parser.add_argument(
+        "--dry-run", action="store_true", help="取得せずに差分だけを表示"
+    )
+    add_limit_rate_argument(pull_parser)
+
+    publish_parser = subparsers.add_parser(
+        "publish", help="Modsフォルダを同期元として使えるディレクトリに書き出す"
+    )
+    publish_parser.add_argument("install_path", help="インストール先パス")
+    publish_parser.add_argument("output_dir", help="書き出し先ディレクトリ")
+
+    for sub in (pull_parser, publish_parser):
+        sub.add_argument("--mods-dir", help="Modsフォルダ（既定: <インストール先>/Mods）")
+        sub.add_argument(
+            "--workers",
+            type=int,
+            default=DEFAULT_COPY_WORKERS,
+            help=f"ハッシュ計算・取得の並列数（既定: {DEFAULT_COPY_WORKERS}）",
+        )
+
+    args = parser.parse_args(argv)
+    if args.action == "pull":
+        apply_limit_rate(parser, args)
+    mods_dir = Path(args.mods_dir) if args.mods_dir else Path(args.install_path) / "Mods"
+
+    try:
+        if args.action == "pull":
+            syncer = ModSyncer(mods_dir, args.source, workers=args.workers, prune=args.prune)
+            syncer.sync(dry_run=args.dry_run)
+        else:
+            manifest = publish_mods(mods_dir, args.output_dir, workers=args.workers)
+            print(f"{len(manifest['mods'])} 件のModを書き出しました: {args.output_dir}")
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        sys.exit(1)
+
+
+def run_saves(argv):
+    """ワールド・プレイヤーデータのスナップショットを作成・復元"""
+    from tmodloader_installer.core.save_store import SaveStore
+    from tmodloader_installer.utils.config import load_config
+
+    parser = argparse.ArgumentParser(
+        prog="tmodloader-installer saves",
+        description="Worlds・Playersをチャンク単位で重複を除いてスナップショットとして保存・復元します",
+    )
+    parser.add_argument("--store-dir", help="スナップショットの保存先ディレクトリ")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    snapshot_parser = subparsers.add_parser("snapshot", help="スナップショットを作成")
+    snapshot_parser.add_argument("install_path", help="インストール先パス")
+    snapshot_parser.add_argument("--label", help="スナップショットの説明")
+
+    subparsers.add_parser("list", help="スナップショットの一覧を表示")
+
+    restore_parser = subparsers.add_parser("restore", help="スナップショットから復元")
+    restore_parser.add_argument("snapshot_id", help="スナップショットのID（latestで最新）")
+    restore_parser.add_argument("install_path", help="インストール先パス")
+
+    prune_parser = subparsers.add_parser("prune", help="古いスナップショットを削除")
+    prune_parser.add_argument(
+        "--keep", type=int, default=None, help="残す件数（既定: config.yamlのsaves.keep）"
+    )
+
+    args = parser.parse_args(argv)
+    store = SaveStore(args.store_dir)
+
+    try:
+        if args.action == "snapshot":
+            store.snapshot(args.install_path, label=args.label)
+        elif args.action == "list":
+            for manifest in store.snapshots():
+                size = sum(entry["size"] for entry in manifest["files"])
+                label = f" {manifest['label']}" if manifest.get("label") else ""
+                print(f"{manifest['id']}  {len(manifest['files'])}ファイル {size}バイト{label}")
+        elif args.action == "restore":
+            snapshot_id = args.snapshot_id
+            if snapshot_id == "latest":
+                snapshots = store.snapshots()
+                if not snapshots:
+                    raise ValueError("スナップショットがありません")
+                snapshot_id = snapshots[0]["id"]
+            store.restore(snapshot_id, args.install_path)
+        else:
+            keep = args.keep if args.keep is not None else load_config()["saves"]["keep"]
+            store.prune(keep)
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        sys.exit(1)
+
+
+def run_discover(argv):
+    """Steamライブラリから検出したインストール先を表示"""
+    from tmodloader_installer.core.steam import SteamDiscovery
+
+    parser = argparse.ArgumentParser(
+        prog="tmodloader-installer discover",
+        description="Steamライブラリ・config.yamlのsteam.common_pathsからtModLoaderのインストール先を検出します",
+    )
+    parser.add_argument(
+        "--refresh", action="store_true", help="キャッシュを使わずに検出し直す"
+    )
+
+    args = parser.parse_args(argv)
+
+    installs = SteamDiscovery().installs(refresh=args.refresh)
+    for path in installs:
+        print(path)
+    if not installs:
+        print("インストール先が見つかりませんでした")
+        sys.exit(1)
+
+
+def run_bandwidth(argv):
+    """実行中の全プロセスの帯域制限を表示・変更"""
+    from tmodloader_installer.core import bandwidth
+
+    parser = argparse.ArgumentParser(
+        prog="tmodloader-installer bandwidth",
+        description="実行中のインストール・キャッシュサーバーなどの帯域制限を変更します（約1秒で反映）",
+    )
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    subparsers.add_parser("show", help="現在の上限を表示")
+    set_parser = subparsers.add_parser("set", help="上限を変更")
+    set_parser.add_argument("rate", help="上限（例: 500K, 5M、0で無制限）")
+    set_parser.add_argument(
+        "--minutes", type=float, default=None, help="指定した分数だけ有効（既定: 解除するまで）"
+    )
+    subparsers.add_parser("clear", help="変更を解除してconfig.yamlの設定に戻す")
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.action == "set":
+            rate = bandwidth.parse_rate(args.rate)
+            duration = args.minutes * 60 if args.minutes else None
+            bandwidth.write_override(rate, duration)
+            print(f"帯域制限を {bandwidth.format_rate(rate)} に変更しました")
+        elif args.action == "clear":
+            bandwidth.clear_override()
+            print("帯域制限の変更を解除しました")
+
+        limiter = bandwidth.get_limiter()
+        limiter.refresh(force=True)
+        override = bandwidth.read_override()
+        print(f"config.yaml: {bandwidth.format_rate(limiter.default_limit)}")
+        if limiter.schedule:
+            scheduled = bandwidth.scheduled_rate(limiter.schedule, limiter.default_limit)
+            print(f"現在の時間帯: {bandwidth.format_rate(scheduled)}")
+        if override:
+            until = (
+                time.strftime("%H:%M まで", time.localtime(override["until"]))
+                if override.get("until")
+                else "解除するまで"
+            )
+            print(f"実行中の変更: {bandwidth.format_rate(override['limit'])}（{until}）")
+        print(f"適用中の上限: {bandwidth.format_rate(limiter.rate)}")
     except Exception as e:
         print(f"エラーが発生しました: {e}")
         sys.exit(1)
 
 
+def run_stats(argv):
+    """操作の履歴から所要時間・スループットの統計を表示"""
+    from tmodloader_installer.core import history
+
+    parser = argparse.ArgumentParser(
+        prog="tmodloader-installer stats",
+        description="インストール・バックアップ・復元の履歴から所要時間のパーセンタイルと推移を表示します",
+    )
+    parser.add_argument("--kind", choices=history.KINDS, default=None, help="操作の種類")
+    parser.add_argument("--days", type=float, default=None, help="直近の日数に絞り込む")
+    parser.add_argument("--host", default=None, help="ホスト名で絞り込む")
+    parser.add_argument(
+        "--period", choices=sorted(history.PERIODS), default="week", help="推移の集計単位"
+    )
+    parser.add_argument(
+        "--db",
+        action="append",
+        default=None,
+        metavar="PATH",
+        help="集計する履歴ファイル（複数指定可、他のホストから集めたものなど。既定: このホストの履歴）",
+    )
+
+    args = parser.parse_args(argv)
+
+    try:
+        since = time.time() - args.days * 86400 if args.days else None
+        operations = history.load_operations(args.db, args.kind, since, args.host)
+        for line in history.report_lines(operations, args.period):
+            print(line)
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        sys.exit(1)
+
+
+def recover_interrupted(mode: str = None):
+    """中断された展開・復元があれば再開する（modeを省略した場合はconfig.yamlに従う）"""
+    from tmodloader_installer.core.journal import pending_journals, recover_jobs
+
+    if not pending_journals():
+        return 0
+    if mode is None:
+        from tmodloader_installer.utils.config import load_config
+
+        mode = load_config()["general"].get("interrupted_jobs") or "resume"
+    return recover_jobs(mode)
+
+
+def run_recover(argv):
+    """中断された展開・復元を再開または取り消し"""
+    parser = argparse.ArgumentParser(
+        prog="tmodloader-installer recover",
+        description="中断された展開・復元をジャーナルから再開（または取り消し）します",
+    )
+    parser.add_argument(
+        "--rollback", action="store_true", help="続きを実行せずに作業前の状態に戻す"
+    )
+
+    args = parser.parse_args(argv)
+
+    try:
+        count = recover_interrupted("rollback" if args.rollback else "resume")
+        print(f"中断された作業: {count}件" if count else "中断された作業はありません")
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        sys.exit(1)
+
+
+def run_releases(argv):
+    """展開済みリリースの保存領域を表示・削除"""
+    from tmodloader_installer.core.planner import tree_size
+    from tmodloader_installer.core.release_store import ReleaseStore
+
+    parser = argparse.ArgumentParser(
+        prog="tmodloader-installer releases",
+        description="install --storeで保存した展開済みリリースを表示・削除します",
+    )
+    parser.add_argument(
+        "--remove", action="append", default=[], metavar="TAG", help="削除するタグ（複数指定可）"
+    )
+
+    args = parser.parse_args(argv)
+
+    store = ReleaseStore()
+    try:
+        for tag in args.remove:
+            if not store.has(tag):
+                print(f"保存されていません: {tag}")
+                continue
+            store.remove(tag)
+            print(f"削除しました: {tag}")
+        tags = store.tags()
+        for tag in tags:
+            print(f"{tag:<20} {tree_size(store.path(tag)) / 1024 / 1024:.1f} MB")
+        if not tags:
+            print("保存された展開済みリリースはありません")
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        sys.exit(1)
+
+
+COMMANDS = {
+    "plan": run_plan,
+    "watch": run_watch,
+    "apply": run_apply,
+    "versions": run_versions,
+    "delta": run_delta,
+    "mirror-index": run_mirror_index,
+    "serve": run_serve,
+    "sync-mods": run_sync_mods,
+    "saves": run_saves,
+    "discover": run_discover,
+    "bandwidth": run_bandwidth,
+    "recover": run_recover,
+    "stats": run_stats,
+    "releases": run_releases,
+}
+
+# 実行前に中断された展開・復元を処理するサブコマンド（Noneはインストール）
+RECOVER_BEFORE = {None, "apply"}
+
+
+def main(argv=None):
+    """メイン関数"""
+    argv = sys.argv[1:] if argv is None else argv
+
+    command = argv[0] if argv and argv[0] in COMMANDS else None
+    if command in RECOVER_BEFORE and not {"-h", "--help", "--dry-run"} & set(argv):
+        try:
+            recover_interrupted()
+        except Exception as e:
+            print(f"中断された作業を処理できませんでした（recoverで再実行できます）: {e}")
+
+    # 先頭の引数がサブコマンド名ならそのコマンドを実行
+    if command:
+        return COMMANDS[command](argv[1:])
+    return run_install(argv)
+
+
 if __name__ == "__main__":
     main()
@@ -1,8 +1,51 @@
 #!/usr/bin/env python3
 """
 コア機能モジュール
+
+起動を速くするため、各クラスは最初に参照されたときにモジュールを読み込む。
 """
 
-from .installer import SimpleInstaller
+import importlib
+
+# 公開名 -> 定義しているサブモジュール
+_EXPORTS = {
+    "SimpleInstaller": ".installer",
+    "ArchiveCache": ".archive_cache",
+    "ReleaseStore": ".release_store",
+    "CopyProgress": ".copy_engine",
+    "ParallelCopier": ".copy_engine",
+    "DeltaStore": ".delta",
+    "compute_delta": ".delta",
+    "apply_delta": ".delta",
+    "MultiTargetInstaller": ".multi_installer",
+    "TargetResult": ".multi_installer",
+    "ReleaseWatcher": ".watcher",
+    "ReleaseSource": ".release_source",
+    "GitHubSource": ".release_source",
+    "LocalDirectorySource": ".release_source",
+    "HttpMirrorSource": ".release_source",
+    "get_release_source": ".release_source",
+    "CacheServer": ".cache_server",
+    "ModSyncer": ".mod_sync",
+    "SaveStore": ".save_store",
+    "SteamDiscovery": ".steam",
+    "CancelToken": ".cancel",
+    "OperationCancelled": ".cancel",
+    "JobScheduler": ".scheduler",
+    "FileLock": ".file_lock",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = ["SimpleInstaller"]
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+リリースアーカイブのキャッシュ
+ダウンロードしたtModLoader.zipをタグごとに保存する
+"""
+
+import os
+import shutil
+from pathlib import Path
+
+from tmodloader_installer.utils.constants import RELEASE_ASSET_NAME
+from tmodloader_installer.utils.helpers import get_app_base_path, natural_sort_key
+
+
+class ArchiveCache:
+    """タグごとのリリースアーカイブ保存領域"""
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = (
+            Path(cache_dir) if cache_dir else get_app_base_path() / "cache" / "archives"
+        )
+
+    def path(self, tag: str) -> Path:
+        """タグに対応するアーカイブのパス"""
+        return self.cache_dir / tag / RELEASE_ASSET_NAME
+
+    def has(self, tag: str) -> bool:
+        """キャッシュ済みか判定"""
+        return bool(tag) and self.path(tag).exists()
+
+    def store(self, tag: str, source_path) -> Path:
+        """アーカイブをキャッシュに移動して保存"""
+        target = self.path(tag)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp_target = target.with_suffix(".part")
+        shutil.move(str(source_path), str(temp_target))
+        os.replace(temp_target, target)
+        return target
+
+    def tags(self):
+        """キャッシュ済みのタグ一覧（新しい順）"""
+        if not self.cache_dir.exists():
+            return []
+        tags = [
+            item.name
+            for item in self.cache_dir.iterdir()
+            if (item / RELEASE_ASSET_NAME).exists()
+        ]
+        tags.sort(key=natural_sort_key, reverse=True)
+        return tags
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+バックアッププロファイル
+config.yamlのinclude/exclude設定に従ってバックアップ・復元する
+"""
+
+import fnmatch
+import json
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+
+from tmodloader_installer.core.copy_engine import ParallelCopier
+from tmodloader_installer.utils.config import load_config
+from tmodloader_installer.utils.constants import INSTALLED_MARKER_NAME
+
+# バックアップ内に保存するバックアップ情報のファイル名
+BACKUP_INFO_NAME = "backup_info.json"
+
+# 組み込みのプロファイル名
+FULL_PROFILE = "full"
+DATA_ONLY_PROFILE = "data-only"
+
+
+class BackupProfile:
+    """バックアップ対象の選択ルール"""
+
+    def __init__(
+        self,
+        name: str,
+        include_folders=None,
+        exclude_folders=None,
+        include_patterns=None,
+        exclude_patterns=None,
+    ):
+        self.name = name
+        self.include_folders = [f.strip("/\\") for f in include_folders or []]
+        self.exclude_folders = [f.strip("/\\") for f in exclude_folders or []]
+        self.include_patterns = list(include_patterns or [])
+        self.exclude_patterns = list(exclude_patterns or [])
+
+    @property
+    def is_full(self):
+        """フォルダ全体を対象とするか"""
+        return not (
+            self.include_folders
+            or self.exclude_folders
+            or self.include_patterns
+            or self.exclude_patterns
+        )
+
+    @property
+    def is_partial(self):
+        """一部のフォルダ・ファイルだけを対象とするか"""
+        return bool(self.include_folders or self.include_patterns)
+
+    @staticmethod
+    def _under(rel_path: str, folder: str) -> bool:
+        return rel_path == folder or rel_path.startswith(folder + "/")
+
+    def _excluded(self, rel_path: str) -> bool:
+        if any(self._under(rel_path, folder) for folder in self.exclude_folders):
+            return True
+        name = PurePosixPath(rel_path).name
+        return any(
+            fnmatch.fnmatch(rel_path, pattern) or fnmatch.fnmatch(name, pattern)
+            for pattern in self.exclude_patterns
+        )
+
+    def includes_dir(self, rel_path: str) -> bool:
+        """ディレクトリを辿る必要があるか（rel_pathはインストール先からの相対パス）"""
+        if self._excluded(rel_path):
+            return False
+        if not self.include_folders or self.include_patterns:
+            return True
+        # 対象フォルダ自体・その配下・その親フォルダを辿る
+        return any(
+            self._under(rel_path, folder) or self._under(folder, rel_path)
+            for folder in self.include_folders
+        )
+
+    def includes_file(self, rel_path: str) -> bool:
+        """ファイルをバックアップ対象に含めるか"""
+        if self._excluded(rel_path):
+            return False
+        if not self.is_partial:
+            return True
+        if any(self._under(rel_path, folder) for folder in self.include_folders):
+            return True
+        name = PurePosixPath(rel_path).name
+        return any(
+            fnmatch.fnmatch(rel_path, pattern) or fnmatch.fnmatch(name, pattern)
+            for pattern in self.include_patterns
+        )
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "include_folders": self.include_folders,
+            "exclude_folders": self.exclude_folders,
+            "include_patterns": self.include_patterns,
+            "exclude_patterns": self.exclude_patterns,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data.get("name", FULL_PROFILE),
+            include_folders=data.get("include_folders"),
+            exclude_folders=data.get("exclude_folders"),
+            include_patterns=data.get("include_patterns"),
+            exclude_patterns=data.get("exclude_patterns"),
+        )
+
+
+def list_backup_profiles(config=None):
+    """利用可能なプロファイル名の一覧"""
+    config = config or load_config()
+    names = [FULL_PROFILE, DATA_ONLY_PROFILE]
+    names += [name for name in config["backup"].get("profiles", {}) if name not in names]
+    return names
+
+
+def get_backup_profile(name: str = None, config=None) -> BackupProfile:
+    """プロファイル名からプロファイルを作成（省略時はconfig.yamlの既定値）"""
+    config = config or load_config()
+    backup_config = config["backup"]
+    name = name or backup_config.get("default_profile") or FULL_PROFILE
+
+    # 全プロファイル共通の除外設定
+    common = {
+        "exclude_folders": backup_config.get("exclude_folders") or [],
+        "exclude_patterns": backup_config.get("exclude_patterns") or [],
+    }
+
+    custom = backup_config.get("profiles", {}).get(name)
+    if custom is not None:
+        return BackupProfile(
+            name,
+            include_folders=custom.get("include_folders"),
+            exclude_folders=common["exclude_folders"] + (custom.get("exclude_folders") or []),
+            include_patterns=custom.get("include_patterns"),
+            exclude_patterns=common["exclude_patterns"] + (custom.get("exclude_patterns") or []),
+        )
+    if name == FULL_PROFILE:
+        return BackupProfile(name, **common)
+    if name == DATA_ONLY_PROFILE:
+        return BackupProfile(
+            name, include_folders=backup_config.get("include_folders"), **common
+        )
+
+    raise ValueError(f"不明なバックアッププロファイルです: {name}")
+
+
+def create_backup(
+    source_path,
+    backup_path,
+    profile: BackupProfile,
+    workers=None,
+    progress_callback=None,
+    governor=None,
+    cancel=None,
+):
+    """プロファイルに従ってバックアップを作成し、バックアップ情報を記録
+
+    cancel: キャンセルされた場合は作成途中のバックアップを削除してOperationCancelledを送出
+    """
+    from tmodloader_installer.core.cancel import OperationCancelled
+    from tmodloader_installer.core.history import Operation
+
+    source_path = Path(source_path)
+    backup_path = Path(backup_path)
+
+    copier = ParallelCopier(
+        workers=workers, progress_callback=progress_callback, governor=governor, cancel=cancel
+    )
+    with Operation("backup", source_path, installed_tag(source_path)) as operation:
+        start = time.perf_counter()
+        try:
+            if profile.is_full:
+                progress = copier.copy_tree(source_path, backup_path)
+            else:
+                progress = copier.copy_tree(
+                    source_path,
+                    backup_path,
+                    include_dir=profile.includes_dir,
+                    include_file=profile.includes_file,
+                )
+        except OperationCancelled:
+            shutil.rmtree(backup_path, ignore_errors=True)
+            raise
+        operation.phase("backup", time.perf_counter() - start, progress.bytes_done)
+
+        write_backup_info(backup_path, source_path, profile)
+    return backup_path
+
+
+def installed_tag(directory):
+    """ディレクトリに記録されたインストール済みバージョンのタグ（記録がない場合はNone）"""
+    try:
+        with open(Path(directory) / INSTALLED_MARKER_NAME, "r", encoding="utf-8") as f:
+            return json.load(f).get("tag")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def write_backup_info(backup_path, source_path, profile: BackupProfile):
+    """バックアップ情報を記録"""
+    info = {
+        "profile": profile.to_dict(),
+        "source": str(source_path),
+        "created_at": datetime.now().isoformat(),
+    }
+    with open(Path(backup_path) / BACKUP_INFO_NAME, "w", encoding="utf-8") as f:
+        json.dump(info, f, ensure_ascii=False, indent=2)
+
+
+def read_backup_info(backup_path):
+    """バックアップ情報を読み込み（記録がない古いバックアップはfull扱い）"""
+    info_file = Path(backup_path) / BACKUP_INFO_NAME
+    try:
+        with open(info_file, "r", encoding="utf-8") as f:
+            info = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        info = {"profile": {"name": FULL_PROFILE}}
+    info["profile"] = BackupProfile.from_dict(info.get("profile", {}))
+    return info
+
+
+def restore_backup(
+    backup_path,
+    install_path,
+    log=print,
+    workers=None,
+    progress_callback=None,
+    governor=None,
+    cancel=None,
+):
+    """バックアップから復元
+
+    fullプロファイルはインストール先を置き換え、一部のみのプロファイルは
+    バックアップに含まれるフォルダ・ファイルだけを上書きする。
+    中断・キャンセルされた場合は退避したフォルダを戻して復元前の状態にする。
+    """
+    from tmodloader_installer.core.history import Operation
+    from tmodloader_installer.core.journal import RestoreJob
+
+    backup_path = Path(backup_path)
+    install_path = Path(install_path)
+    profile = read_backup_info(backup_path)["profile"]
+
+    def not_info(rel_path):
+        return rel_path != BACKUP_INFO_NAME
+
+    if not profile.is_partial:
+        targets = [install_path]
+    else:
+        log(f"プロファイル「{profile.name}」の対象のみ復元中...")
+        # 対象フォルダはバックアップ時点の内容に置き換える
+        targets = [
+            install_path / folder
+            for folder in profile.include_folders
+            if (backup_path / folder).is_dir()
+        ]
+
+    with Operation("restore", install_path, installed_tag(backup_path)) as operation:
+        # 置き換えるフォルダは削除せずに退避し、復元が確定してから削除する
+        job = RestoreJob.start(backup_path, install_path, targets, governor=governor, log=log)
+        log("既存のフォルダを退避して復元中...")
+        start = time.perf_counter()
+        try:
+            progress = job.run(workers, progress_callback, include_file=not_info, cancel=cancel)
+        except Exception:
+            job.rollback()
+            raise
+        operation.phase("restore", time.perf_counter() - start, progress.bytes_done)
+    return profile
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+ネットワーク帯域の制限
+トークンバケットでプロセス内の全ての通信（ダウンロード・配信・Mod取得）の合計を上限以下に抑える。
+上限はconfig.yamlの既定値・時間帯ごとの設定・実行中の変更（CLI/GUI）の順に決まる。
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+from tmodloader_installer.core.cancel import check_cancelled
+from tmodloader_installer.utils.config import load_config
+from tmodloader_installer.utils.helpers import get_app_base_path
+
+# 一度に貯められるトークン（上限の何秒分か）
+BURST_SECONDS = 0.5
+
+# 時間帯・実行中の変更を確認する間隔（秒）
+REFRESH_INTERVAL = 1.0
+
+# 待機中に上限の変更を確認する間隔（秒）
+WAIT_SLICE = 0.25
+
+_RATE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_rate(text) -> int:
+    """"500K" "5M" "1.5MB" などをバイト/秒に変換（空・0は無制限として0）"""
+    if text is None:
+        return 0
+    if isinstance(text, (int, float)):
+        return max(int(text), 0)
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:i?B)?(?:/s)?\s*", text, re.IGNORECASE)
+    if not match:
+        if not text.strip():
+            return 0
+        raise ValueError(f"帯域の指定が正しくありません: {text}（例: 500K, 5M）")
+    return int(float(match.group(1)) * _RATE_UNITS[match.group(2).upper()])
+
+
+def format_rate(rate: int) -> str:
+    """バイト/秒を表示用の文字列に変換"""
+    if not rate:
+        return "無制限"
+    if rate >= 1024 ** 2:
+        return f"{rate / 1024 ** 2:.1f}MB/s"
+    return f"{rate / 1024:.0f}KB/s"
+
+
+def _minutes(text: str) -> int:
+    hour, minute = text.split(":")
+    return int(hour) * 60 + int(minute)
+
+
+def scheduled_rate(schedule, default: int, now: datetime = None) -> int:
+    """時間帯ごとの設定から現在の上限を決定（該当しない場合はdefault）
+
+    schedule: [{"start": "18:00", "end": "24:00", "limit": "2M"}, ...]
+    開始が終了より遅い場合は日をまたぐ時間帯として扱う。
+    """
+    now = now or datetime.now()
+    current = now.hour * 60 + now.minute
+    for entry in schedule or []:
+        start, end = _minutes(entry["start"]), _minutes(entry["end"])
+        if start <= end:
+            active = start <= current < end
+        else:
+            active = current >= start or current < end
+        if active:
+            return parse_rate(entry.get("limit"))
+    return default
+
+
+def override_file_path():
+    """実行中の全プロセスに適用する上限の保存先"""
+    return get_app_base_path() / "cache" / "bandwidth.json"
+
+
+def read_override():
+    """実行中の変更（{"limit": バイト/秒, "set_at": 時刻, "until": 時刻またはNone}）"""
+    try:
+        with open(override_file_path(), "r", encoding="utf-8") as f:
+            override = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if override.get("until") and override["until"] < time.time():
+        return None
+    return override
+
+
+def write_override(rate: int, duration: float = None):
+    """実行中の全プロセスの上限を変更（durationを指定した場合はその秒数だけ有効）"""
+    path = override_file_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    override = {
+        "limit": rate,
+        "set_at": now,
+        "until": now + duration if duration else None,
+    }
+    temp_path = path.with_suffix(".tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(override, f, indent=2)
+    os.replace(temp_path, path)
+    return override
+
+
+def clear_override():
+    """実行中の変更を解除（config.yamlの設定に戻す）"""
+    try:
+        os.remove(override_file_path())
+    except FileNotFoundError:
+        pass
+
+
+class TokenBucket:
+    """スレッド間で共有するトークンバケット（rateはバイト/秒、0は無制限）"""
+
+    def __init__(self, rate: int = 0):
+        self._lock = threading.Lock()
+        self._rate = rate
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+
+    @property
+    def rate(self) -> int:
+        return self._rate
+
+    def set_rate(self, rate: int):
+        """上限を変更（待機中の呼び出しにも反映される）"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._rate = max(int(rate), 0)
+
+    def _refill(self, now: float):
+        if self._rate > 0:
+            burst = self._rate * BURST_SECONDS
+            self._tokens = min(burst, self._tokens + (now - self._updated) * self._rate)
+        else:
+            self._tokens = 0.0
+        self._updated = now
+
+    def consume(self, amount: int, cancel=None):
+        """amountバイト分のトークンを消費（足りない分は貯まるまで待機）
+
+        先に消費して残高を負にし、以降の呼び出しはその分も待つため、
+        複数のスレッドから呼び出しても合計が上限を超えない。
+        cancel: 待機中にキャンセルされた場合はOperationCancelledを送出（CancelToken）
+        """
+        with self._lock:
+            rate = self._rate
+            if rate <= 0:
+                return
+            self._refill(time.monotonic())
+            self._tokens -= amount
+            wait = -self._tokens / rate if self._tokens < 0 else 0.0
+
+        while wait > 0:
+            step = min(wait, WAIT_SLICE)
+            time.sleep(step)
+            wait -= step
+            check_cancelled(cancel)
+            current = self._rate
+            if current != rate:
+                # 上限が変わった場合は残りの待ち時間を新しい上限で計算し直す
+                if current <= 0:
+                    return
+                wait *= rate / current
+                rate = current
+
+
+class BandwidthLimiter(TokenBucket):
+    """config.yaml・時間帯・実行中の変更から上限を決めるトークンバケット
+
+    実行中の変更はプロセス内（--limit-rate・GUI）と全プロセス共通（bandwidth set）があり、
+    後から変更された方を優先する。
+    """
+
+    def __init__(self, limit: int = 0, schedule=None):
+        super().__init__(limit)
+        self.default_limit = limit
+        self.schedule = list(schedule or [])
+        self._process_limit = None
+        self._process_set_at = 0.0
+        self._override = None
+        self._override_mtime = None
+        self._checked_at = 0.0
+
+    def set_limit(self, rate):
+        """このプロセスの上限を変更（Noneで設定ファイルの値に戻す）"""
+        self._process_limit = None if rate is None else parse_rate(rate)
+        self._process_set_at = time.time()
+        self.refresh(force=True)
+
+    def effective_limit(self) -> int:
+        """現在適用する上限（バイト/秒、0は無制限）"""
+        override = self._override
+        if override and override.get("until") and override["until"] < time.time():
+            override = None
+        if self._process_limit is not None and (
+            not override or self._process_set_at >= override["set_at"]
+        ):
+            return self._process_limit
+        if override:
+            return override["limit"]
+        return scheduled_rate(self.schedule, self.default_limit)
+
+    def _load_override(self):
+        """全プロセス共通の変更を読み込み（ファイルが更新された場合のみ）"""
+        try:
+            mtime = os.stat(override_file_path()).st_mtime
+        except OSError:
+            mtime = None
+        if mtime != self._override_mtime:
+            self._override_mtime = mtime
+            self._override = read_override() if mtime else None
+
+    def refresh(self, force: bool = False):
+        """一定間隔で時間帯・実行中の変更を確認して上限を更新"""
+        now = time.monotonic()
+        if not force and now - self._checked_at < REFRESH_INTERVAL:
+            return
+        self._checked_at = now
+        self._load_override()
+        limit = self.effective_limit()
+        if limit != self.rate:
+            self.set_rate(limit)
+
+    def consume(self, amount: int, cancel=None):
+        self.refresh()
+        super().consume(amount, cancel)
+
+    def throttle(self, chunks, cancel=None):
+        """データのチャンクを上限に合わせて順に返す（チャンクごとにキャンセルを確認）"""
+        for chunk in chunks:
+            check_cancelled(cancel)
+            self.consume(len(chunk), cancel)
+            yield chunk
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> BandwidthLimiter:
+    """プロセス内で共有する帯域制限（config.yamlのbandwidthから作成）"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            config = load_config()["bandwidth"]
+            _limiter = BandwidthLimiter(
+                parse_rate(config.get("limit")), config.get("schedule")
+            )
+            _limiter.refresh(force=True)
+        return _limiter
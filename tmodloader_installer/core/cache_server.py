@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+LAN向けキャッシュサーバー
+ローカルのアーカイブキャッシュとリリース一覧をHTTP（Range対応）で公開し、
+他のインストーラーが --source http://<ホスト>:<ポート>/ で取得元として使えるようにする
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tmodloader_installer.core.archive_cache import ArchiveCache
+from tmodloader_installer.core.bandwidth import get_limiter
+from tmodloader_installer.core.integrity import (
+    expected_digest,
+    verify_digest,
+    write_digest_record,
+)
+from tmodloader_installer.core.release_index import ReleaseIndex
+from tmodloader_installer.core.release_source import (
+    RELEASE_MANIFEST_NAME,
+    GitHubSource,
+    LocalDirectorySource,
+)
+from tmodloader_installer.utils.constants import (
+    DEFAULT_SERVE_PORT,
+    RELEASE_ASSET_NAME,
+    SERVE_SYNC_INTERVAL,
+)
+
+# 送信時の読み込み単位
+SEND_CHUNK_SIZE = 1024 * 1024
+
+# タグ名として受け付ける文字（パスの走査を防ぐ）
+TAG_PATTERN = re.compile(r"^[\w][\w.\-]*$")
+
+
+def parse_range(header: str, size: int):
+    """Rangeヘッダーを (開始, 終了) に変換
+
+    単一範囲のみ対応し、解釈できない指定はNone（全体を返す）、
+    範囲外の指定はValueErrorとする。
+    """
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", header.strip())
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+
+    if match.group(1):
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else size - 1
+    else:
+        # 末尾からのバイト数の指定（bytes=-500）
+        suffix = int(match.group(2))
+        if suffix == 0:
+            raise ValueError("範囲が空です")
+        start = max(size - suffix, 0)
+        end = size - 1
+
+    end = min(end, size - 1)
+    if start >= size or start > end:
+        raise ValueError("範囲がファイルサイズを超えています")
+    return start, end
+
+
+class CacheServer:
+    """アーカイブキャッシュを公開するHTTPサーバー
+
+    pull_through: キャッシュにないリリースが要求された場合にGitHubから取得して保存する
+        （見つからなかったタグは一覧の更新間隔が過ぎるまで問い合わせない）
+    """
+
+    def __init__(
+        self,
+        cache: ArchiveCache = None,
+        host: str = "0.0.0.0",
+        port: int = DEFAULT_SERVE_PORT,
+        pull_through: bool = False,
+        log=print,
+    ):
+        self.cache = cache or ArchiveCache()
+        self.pull_through = pull_through
+        self.log = log
+        self.upstream = GitHubSource(log=log)
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+        # GitHubに見つからなかったタグ -> 確認した時刻
+        self._missing = {}
+
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.httpd.daemon_threads = True
+
+    @property
+    def address(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _sync_upstream(self):
+        """一定間隔でGitHubのリリース一覧を更新"""
+        with self._lock:
+            if time.monotonic() - self._synced_at < SERVE_SYNC_INTERVAL:
+                return
+            self._synced_at = time.monotonic()
+        self.upstream.releases()
+
+    def releases(self):
+        """公開するリリース一覧（共通形式、アセットのURLは相対パス）"""
+        index = self.upstream.index
+        if self.pull_through:
+            self._sync_upstream()
+
+        cached = {}
+        if self.cache.cache_dir.is_dir():
+            cached = {
+                release["tag_name"]: release
+                for release in LocalDirectorySource(self.cache.cache_dir).scan()
+            }
+
+        releases = []
+        tags = set(cached)
+        if self.pull_through:
+            tags |= {r["tag_name"] for r in index.releases(include_prerelease=True)}
+        for tag in tags:
+            # リリースインデックスにある場合はそちらのメタデータを使う
+            release = dict(index.get(tag) or cached[tag])
+            asset = next(
+                (
+                    a
+                    for a in release.get("assets", [])
+                    if a["name"] == RELEASE_ASSET_NAME
+                ),
+                None,
+            )
+            if asset is None and tag not in cached:
+                continue
+            source = cached[tag]["assets"][0] if tag in cached else asset
+            release["assets"] = [
+                {
+                    "name": RELEASE_ASSET_NAME,
+                    "browser_download_url": f"{tag}/{RELEASE_ASSET_NAME}",
+                    "size": source.get("size", 0),
+                    "digest": source.get("digest") or (asset or {}).get("digest"),
+                }
+            ]
+            releases.append(release)
+        return releases
+
+    def archive_path(self, tag: str):
+        """タグのアーカイブのパス（キャッシュになく取得もできない場合はNone）"""
+        if not TAG_PATTERN.match(tag):
+            return None
+        if self.cache.has(tag):
+            return self.cache.path(tag)
+        if not self.pull_through:
+            return None
+
+        # 同じタグの同時要求では1回だけ取得する
+        with self._lock:
+            missed_at = self._missing.get(tag)
+            if missed_at is not None and time.monotonic() - missed_at < SERVE_SYNC_INTERVAL:
+                return None
+            fetch_lock = self._fetch_locks.setdefault(tag, threading.Lock())
+        with fetch_lock:
+            if not self.cache.has(tag):
+                try:
+                    self._fetch(tag)
+                except FileNotFoundError:
+                    self._remember_missing(tag)
+                    raise
+        return self.cache.path(tag)
+
+    def _remember_missing(self, tag: str):
+        """見つからなかったタグを記録（古い記録は破棄）"""
+        now = time.monotonic()
+        with self._lock:
+            self._missing = {
+                missing: at
+                for missing, at in self._missing.items()
+                if now - at < SERVE_SYNC_INTERVAL
+            }
+            self._missing[tag] = now
+            self._fetch_locks.pop(tag, None)
+
+    def _fetch(self, tag: str):
+        """GitHubからアーカイブを取得し、ダイジェストを照合してキャッシュに保存"""
+        release = self.upstream.release(tag)
+        download_url = ReleaseIndex.asset_url(release) if release else None
+        if not download_url:
+            raise FileNotFoundError(f"リリースが見つかりません: {tag}")
+
+        import requests
+
+        self.log(f"キャッシュにないため取得中: {download_url}")
+        self.cache.cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_file = self.cache.cache_dir / f"{tag}.download"
+        expected, verified_by = expected_digest(release, tag)
+        digest = hashlib.sha256()
+        try:
+            with requests.get(download_url, stream=True, timeout=30) as response:
+                response.raise_for_status()
+                with open(temp_file, "wb") as f:
+                    chunks = response.iter_content(chunk_size=SEND_CHUNK_SIZE)
+                    for chunk in get_limiter().throttle(chunks):
+                        digest.update(chunk)
+                        f.write(chunk)
+            verify_digest(digest.hexdigest(), expected, f"{tag}/{RELEASE_ASSET_NAME}")
+        except Exception:
+            temp_file.unlink(missing_ok=True)
+            raise
+        archive = self.cache.store(tag, temp_file)
+        write_digest_record(archive, digest.hexdigest(), verified_by)
+        self.log(f"キャッシュに保存しました: {tag}")
+
+    def serve_forever(self):
+        """停止されるまでリクエストを処理"""
+        self.log(f"キャッシュサーバーを開始しました: {self.address}")
+        self.log(f"他のホストでは --source {self.address} を指定してください")
+        self.httpd.serve_forever()
+
+    def shutdown(self):
+        """サーバーを停止"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _make_handler(server: CacheServer):
+    """CacheServerに紐づくリクエストハンドラーを作成"""
+
+    class CacheRequestHandler(BaseHTTPRequestHandler):
+        server_version = "tModLoaderInstallerCache/1.0"
+
+        def do_GET(self):
+            self._handle(send_body=True)
+
+        def do_HEAD(self):
+            self._handle(send_body=False)
+
+        def log_message(self, format, *args):
+            server.log(f"{self.address_string()} {format % args}")
+
+        def _handle(self, send_body):
+            path = self.path.split("?", 1)[0].strip("/")
+            try:
+                if path in ("", RELEASE_MANIFEST_NAME):
+                    self._send_manifest(send_body)
+                    return
+                parts = path.split("/")
+                if len(parts) == 2 and parts[1] == RELEASE_ASSET_NAME:
+                    archive = server.archive_path(parts[0])
+                    if archive is not None:
+                        self._send_file(archive, send_body)
+                        return
+                self.send_error(HTTPStatus.NOT_FOUND)
+            except FileNotFoundError as e:
+                # ステータス行はLatin-1のみのため、メッセージはログにだけ出す
+                server.log(str(e))
+                self.send_error(HTTPStatus.NOT_FOUND)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            except Exception as e:
+                server.log(f"リクエストの処理に失敗: {e}")
+                self.send_error(HTTPStatus.BAD_GATEWAY)
+
+        def _send_manifest(self, send_body):
+            body = json.dumps(
+                {"releases": server.releases()}, ensure_ascii=False, indent=2
+            ).encode("utf-8")
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+
+        def _send_file(self, archive, send_body):
+            stat = archive.stat()
+            size = stat.st_size
+            start, end = 0, size - 1
+            status = HTTPStatus.OK
+
+            range_header = self.headers.get("Range")
+            if range_header:
+                try:
+                    requested = parse_range(range_header, size)
+                except ValueError:
+                    self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if requested is not None:
+                    start, end = requested
+                    status = HTTPStatus.PARTIAL_CONTENT
+
+            length = end - start + 1 if size else 0
+            self.send_response(status)
+            self.send_header("Content-Type", "application/zip")
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Content-Length", str(length))
+            self.send_header("Last-Modified", formatdate(stat.st_mtime, usegmt=True))
+            if status == HTTPStatus.PARTIAL_CONTENT:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.end_headers()
+            if not send_body:
+                return
+
+            # 配信も帯域制限の対象（同時に接続しているクライアントの合計）
+            limiter = get_limiter()
+            with open(archive, "rb") as f:
+                f.seek(start)
+                remaining = length
+                while remaining > 0:
+                    data = f.read(min(remaining, SEND_CHUNK_SIZE))
+                    if not data:
+                        break
+                    limiter.consume(len(data))
+                    self.wfile.write(data)
+                    remaining -= len(data)
+
+    return CacheRequestHandler
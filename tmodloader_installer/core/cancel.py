@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+処理のキャンセル
+GUIのキャンセルボタン・CLIのCtrl-Cでトークンを設定し、ダウンロード・バックアップ・
+コピー・展開のループがチャンク・ファイルごとに確認して中断する。
+中断後は各処理が自分の行った分だけを元に戻す。
+"""
+
+import threading
+
+
+class OperationCancelled(Exception):
+    """処理がキャンセルされた"""
+
+    def __init__(self, message: str = "キャンセルされました"):
+        super().__init__(message)
+
+
+class CancelToken:
+    """スレッド間で共有するキャンセルの指示"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """キャンセルを指示（実行中の処理は次の確認で中断する）"""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        """キャンセルされていればOperationCancelledを送出"""
+        if self._event.is_set():
+            raise OperationCancelled()
+
+
+def check_cancelled(token):
+    """tokenがキャンセルされていればOperationCancelledを送出（Noneの場合は何もしない）"""
+    if token is not None:
+        token.check()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+並列ディレクトリコピー
+os.scandirでツリーを走査し、スレッドプールでファイルをコピーする。
+大きなファイルはチャンクに分割して並列にコピーする。
+"""
+
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from tmodloader_installer.core.cancel import check_cancelled
+from tmodloader_installer.utils.constants import (
+    COPY_CHUNK_SIZE,
+    COPY_LARGE_FILE_THRESHOLD,
+    DEFAULT_COPY_WORKERS,
+)
+from tmodloader_installer.utils.helpers import format_size
+
+
+class CopyProgress:
+    """コピーの進捗（ファイル数・バイト数）"""
+
+    def __init__(self):
+        self.files_total = 0
+        self.files_done = 0
+        self.bytes_total = 0
+        self.bytes_done = 0
+        self._lock = threading.Lock()
+
+    def _add(self, files=0, size=0):
+        with self._lock:
+            self.files_done += files
+            self.bytes_done += size
+
+    def describe(self):
+        """進捗を表示用の文字列に整形"""
+        return (
+            f"{self.files_done}/{self.files_total}ファイル "
+            f"{format_size(self.bytes_done)}/{format_size(self.bytes_total)}"
+        )
+
+    @property
+    def percent(self):
+        if self.bytes_total == 0:
+            return 100.0 if self.files_done >= self.files_total else 0.0
+        return self.bytes_done * 100.0 / self.bytes_total
+
+
+class ParallelCopier:
+    """スレッドプールでディレクトリツリーをコピー"""
+
+    def __init__(
+        self,
+        workers: int = None,
+        chunk_size: int = COPY_CHUNK_SIZE,
+        large_file_threshold: int = COPY_LARGE_FILE_THRESHOLD,
+        progress_callback=None,
+        governor=None,
+        cancel=None,
+    ):
+        # I/Oの制限（IOGovernor、Noneの場合は制限しない）
+        self.governor = governor
+        # ファイル・チャンクごとに確認するキャンセルの指示（CancelToken）
+        self.cancel = cancel
+        if governor:
+            workers = governor.limit_workers(workers or DEFAULT_COPY_WORKERS)
+        self.workers = max(1, workers or DEFAULT_COPY_WORKERS)
+        self.chunk_size = chunk_size
+        self.large_file_threshold = large_file_threshold
+        self.progress_callback = progress_callback
+
+    def _scan(self, src_root: Path, dst_root: Path, include_dir, include_file, dirs_exist_ok):
+        """ツリーを走査してディレクトリを作成し、コピー対象のファイルを列挙"""
+        files = []
+        dirs = [(src_root, dst_root)]
+        stack = [(src_root, dst_root, "")]
+        dst_root.mkdir(parents=True, exist_ok=dirs_exist_ok)
+
+        while stack:
+            src_dir, dst_dir, rel_dir = stack.pop()
+            with os.scandir(src_dir) as entries:
+                for entry in entries:
+                    rel_path = f"{rel_dir}{entry.name}"
+                    dst_path = dst_dir / entry.name
+                    if entry.is_dir():
+                        if include_dir and not include_dir(rel_path):
+                            continue
+                        dst_path.mkdir(exist_ok=dirs_exist_ok)
+                        dirs.append((Path(entry.path), dst_path))
+                        stack.append((Path(entry.path), dst_path, f"{rel_path}/"))
+                    elif entry.is_file():
+                        if include_file and not include_file(rel_path):
+                            continue
+                        files.append(
+                            (Path(entry.path), dst_path, entry.stat().st_size, rel_path)
+                        )
+
+        return dirs, files
+
+    def _notify(self, progress):
+        if self.progress_callback:
+            self.progress_callback(progress)
+
+    def _copy_file(self, src, dst, rel_path, progress, file_callback):
+        check_cancelled(self.cancel)
+        if self.governor:
+            self.governor.copy_file(src, dst, self.cancel)
+        else:
+            shutil.copy2(src, dst)
+        progress._add(files=1, size=os.path.getsize(dst))
+        if file_callback:
+            file_callback(rel_path)
+        self._notify(progress)
+
+    def _copy_chunk(self, src, dst, offset, length, progress):
+        check_cancelled(self.cancel)
+        if self.governor:
+            self.governor.copy_range(src, dst, offset, length, self.cancel)
+            progress._add(size=length)
+            self._notify(progress)
+            return
+        with open(src, "rb") as fsrc, open(dst, "r+b") as fdst:
+            fsrc.seek(offset)
+            fdst.seek(offset)
+            remaining = length
+            while remaining > 0:
+                check_cancelled(self.cancel)
+                data = fsrc.read(min(remaining, 1024 * 1024))
+                if not data:
+                    break
+                fdst.write(data)
+                remaining -= len(data)
+        progress._add(size=length)
+        self._notify(progress)
+
+    def copy_tree(
+        self,
+        src,
+        dst,
+        include_dir=None,
+        include_file=None,
+        dirs_exist_ok=False,
+        file_callback=None,
+    ):
+        """ディレクトリツリーをコピー
+
+        include_dir/include_file: 相対パス（/区切り）を受け取り、対象ならTrueを返す関数
+        file_callback: ファイルのコピーが完了するごとに相対パスを受け取る関数
+        """
+        src_root = Path(src)
+        dst_root = Path(dst)
+        dirs, files = self._scan(src_root, dst_root, include_dir, include_file, dirs_exist_ok)
+
+        progress = CopyProgress()
+        progress.files_total = len(files)
+        progress.bytes_total = sum(file[2] for file in files)
+
+        large_files = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = []
+            for src_path, dst_path, size, rel_path in files:
+                if size < self.large_file_threshold:
+                    futures.append(
+                        executor.submit(
+                            self._copy_file,
+                            src_path,
+                            dst_path,
+                            rel_path,
+                            progress,
+                            file_callback,
+                        )
+                    )
+                    continue
+
+                # 大きなファイルは先にサイズを確保してからチャンクごとにコピー
+                with open(dst_path, "wb") as f:
+                    f.truncate(size)
+                large_files.append((src_path, dst_path, rel_path))
+                for offset in range(0, size, self.chunk_size):
+                    futures.append(
+                        executor.submit(
+                            self._copy_chunk,
+                            src_path,
+                            dst_path,
+                            offset,
+                            min(self.chunk_size, size - offset),
+                            progress,
+                        )
+                    )
+
+            for future in futures:
+                future.result()
+
+        # メタデータ（更新日時・権限）を保持
+        for src_path, dst_path, rel_path in large_files:
+            shutil.copystat(src_path, dst_path)
+            progress._add(files=1)
+            if file_callback:
+                file_callback(rel_path)
+        for src_dir, dst_dir in reversed(dirs):
+            shutil.copystat(src_dir, dst_dir)
+
+        self._notify(progress)
+        return progress
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+リリース間のファイル単位の差分
+2つのリリースアーカイブのセントラルディレクトリ（CRC32・サイズ）を比較して
+追加・変更・削除されたメンバーだけを含む差分パッケージを作成・適用する
+"""
+
+import json
+import os
+import shutil
+import zipfile
+import zlib
+from pathlib import Path
+
+from tmodloader_installer.utils.config import load_config
+from tmodloader_installer.utils.helpers import get_app_base_path
+
+# 差分パッケージ内のマニフェストのファイル名
+DELTA_MANIFEST_NAME = "delta_manifest.json"
+
+
+def _file_members(zip_ref):
+    """ディレクトリを除いたメンバーの一覧"""
+    return {info.filename: info for info in zip_ref.infolist() if not info.is_dir()}
+
+
+def compute_delta(old_archive, new_archive, output_path, from_tag: str, to_tag: str):
+    """2つのアーカイブを比較して差分パッケージを作成
+
+    展開せずにCRC32とサイズで比較するため、変更されたメンバーだけを読み込む。
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output_path.with_suffix(".part")
+
+    with zipfile.ZipFile(old_archive, "r") as old_zip, zipfile.ZipFile(
+        new_archive, "r"
+    ) as new_zip:
+        old_members = _file_members(old_zip)
+        new_members = _file_members(new_zip)
+
+        added = sorted(name for name in new_members if name not in old_members)
+        removed = sorted(name for name in old_members if name not in new_members)
+        changed = sorted(
+            name
+            for name, info in new_members.items()
+            if name in old_members
+            and (
+                info.CRC != old_members[name].CRC
+                or info.file_size != old_members[name].file_size
+            )
+        )
+
+        manifest = {
+            "from": from_tag,
+            "to": to_tag,
+            "added": added,
+            "removed": removed,
+            "changed": [
+                {
+                    "name": name,
+                    "old_size": old_members[name].file_size,
+                    "old_crc": old_members[name].CRC,
+                }
+                for name in changed
+            ],
+            "unchanged": len(new_members) - len(added) - len(changed),
+        }
+
+        with zipfile.ZipFile(temp_path, "w") as delta_zip:
+            delta_zip.writestr(DELTA_MANIFEST_NAME, json.dumps(manifest, indent=2))
+            for name in added + changed:
+                info = new_members[name]
+                with new_zip.open(info) as src, delta_zip.open(info, "w") as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+
+    os.replace(temp_path, output_path)
+    return manifest
+
+
+def read_delta_manifest(delta_path):
+    """差分パッケージのマニフェストを読み込み"""
+    with zipfile.ZipFile(delta_path, "r") as delta_zip:
+        return json.loads(delta_zip.read(DELTA_MANIFEST_NAME))
+
+
+def file_crc32(path) -> int:
+    """ファイルのCRC32（ZIPのセントラルディレクトリと同じ値）"""
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def _matches_old(target: Path, entry) -> bool:
+    """変更対象のファイルが旧バージョンと一致するか（サイズ、記録があればCRC32）"""
+    if not target.is_file() or target.stat().st_size != entry["old_size"]:
+        return False
+    # CRC32を記録していない古い差分パッケージはサイズだけで判定
+    return "old_crc" not in entry or file_crc32(target) == entry["old_crc"]
+
+
+def apply_delta(
+    delta_path,
+    install_path,
+    verify: bool = True,
+    extract_filter=None,
+    governor=None,
+    cancel=None,
+    log=print,
+):
+    """差分パッケージをインストール先に適用
+
+    追加・変更されたファイルをステージングに展開し、残りのファイルを既存のインストール先から
+    引き継いでからフォルダ名の変更で切り替える。ジャーナルに記録するため、
+    中断された場合も次回の起動時に続きから再開するか元に戻せる。
+
+    verify: 変更対象のファイルが旧バージョンと一致するか（サイズとCRC32）事前に確認する
+    extract_filter: 展開対象の絞り込み（ExtractFilter）
+    """
+    from tmodloader_installer.core.journal import ExtractJob
+    from tmodloader_installer.core.staging import staging_path
+
+    install_path = Path(install_path)
+
+    with zipfile.ZipFile(delta_path, "r") as delta_zip:
+        manifest = json.loads(delta_zip.read(DELTA_MANIFEST_NAME))
+
+        if verify:
+            for entry in manifest["changed"]:
+                if extract_filter is not None and not extract_filter.allows(entry["name"]):
+                    continue
+                if not _matches_old(install_path / entry["name"], entry):
+                    raise ValueError(
+                        f"インストール先が {manifest['from']} と一致しません: {entry['name']}"
+                    )
+
+        # 追加・変更されたファイルだけを展開
+        names = set(manifest["added"]) | {entry["name"] for entry in manifest["changed"]}
+        if extract_filter is not None:
+            names = {name for name in names if extract_filter.allows(name)}
+        members = [info for info in delta_zip.infolist() if info.filename in names]
+
+        staging_dir = staging_path(install_path)
+        if staging_dir.exists():
+            shutil.rmtree(staging_dir)
+        job = ExtractJob.start(
+            archive=delta_path,
+            dest_dir=staging_dir,
+            install_path=install_path,
+            members=members,
+            in_place=False,
+            tag=manifest["to"],
+            # 削除されたファイルは新しいツリーに引き継がない
+            skip=manifest["removed"],
+            governor=governor,
+            log=log,
+            cancel=cancel,
+        )
+        try:
+            job.run(delta_zip)
+        except Exception:
+            job.rollback()
+            raise
+
+    try:
+        job.finish()
+    except Exception:
+        job.rollback()
+        raise
+    return manifest
+
+
+class DeltaStore:
+    """作成済みの差分パッケージの保存領域（ホスト間で共有可能）
+
+    store_dir: 保存先（省略時はconfig.yamlのdelta.store_dir、未設定ならcache/deltas）
+    """
+
+    def __init__(self, store_dir=None):
+        if store_dir:
+            self.store_dir = Path(store_dir)
+        else:
+            # config.yamlの相対パスは実行ファイルと同じディレクトリを基準にする
+            configured = load_config()["delta"].get("store_dir")
+            base_path = get_app_base_path()
+            self.store_dir = (
+                base_path / configured if configured else base_path / "cache" / "deltas"
+            )
+
+    def path(self, from_tag: str, to_tag: str) -> Path:
+        """差分パッケージのパス"""
+        return self.store_dir / f"{from_tag}_to_{to_tag}.zip"
+
+    def get(self, from_tag: str, to_tag: str):
+        """差分パッケージを取得（存在しない場合はNone）"""
+        path = self.path(from_tag, to_tag)
+        return path if path.exists() else None
+
+    def create(self, old_archive, new_archive, from_tag: str, to_tag: str):
+        """差分パッケージを作成して保存"""
+        path = self.path(from_tag, to_tag)
+        compute_delta(old_archive, new_archive, path, from_tag, to_tag)
+        return path
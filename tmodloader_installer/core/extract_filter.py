@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+展開対象の絞り込みルール
+使わないプラットフォーム向けのファイルを展開しないためのinclude/excludeルール
+"""
+
+import fnmatch
+
+# 組み込みの展開プロファイル（パターンはZIP内のパスに対するglob）
+EXTRACT_PROFILES = {
+    "all": {
+        "include": [],
+        "exclude": [],
+    },
+    # Linuxの専用サーバー: Windows/macOS向けのネイティブライブラリと起動スクリプトを除外
+    "linux-server": {
+        "include": [],
+        "exclude": [
+            "*.bat",
+            "*.ps1",
+            "*.command",
+            "start-tModLoader.sh",
+            "LaunchUtils/*.exe",
+            "Libraries/Native/Windows/*",
+            "Libraries/Native/OSX/*",
+        ],
+    },
+    # Windowsのクライアント: Linux/macOS向けのネイティブライブラリと起動スクリプトを除外
+    "windows-client": {
+        "include": [],
+        "exclude": [
+            "*.sh",
+            "*.command",
+            "Libraries/Native/Linux/*",
+            "Libraries/Native/OSX/*",
+        ],
+    },
+}
+
+
+class ExtractFilter:
+    """ZIPメンバーを展開するかどうかの判定"""
+
+    def __init__(self, include_patterns=None, exclude_patterns=None, name: str = "custom"):
+        self.name = name
+        self.include_patterns = list(include_patterns or [])
+        self.exclude_patterns = list(exclude_patterns or [])
+
+    def allows(self, member_name: str) -> bool:
+        """メンバーを展開するか判定（includeが空の場合は全て対象）"""
+        if self.include_patterns and not any(
+            fnmatch.fnmatch(member_name, pattern) for pattern in self.include_patterns
+        ):
+            return False
+        return not any(
+            fnmatch.fnmatch(member_name, pattern) for pattern in self.exclude_patterns
+        )
+
+    def select(self, zip_ref):
+        """展開対象のメンバーを選択
+
+        戻り値: (展開するZipInfoのリスト, 除外したメンバー数)
+        """
+        members = zip_ref.infolist()
+        selected = [info for info in members if self.allows(info.filename)]
+        return selected, len(members) - len(selected)
+
+
+def get_extract_filter(profile: str = None, include=None, exclude=None):
+    """プロファイルと追加のパターンから展開フィルターを作成（指定なしの場合はNone）"""
+    if not profile and not include and not exclude:
+        return None
+
+    rules = EXTRACT_PROFILES.get(profile or "all")
+    if rules is None:
+        raise ValueError(f"不明な展開プロファイルです: {profile}")
+
+    return ExtractFilter(
+        include_patterns=rules["include"] + list(include or []),
+        exclude_patterns=rules["exclude"] + list(exclude or []),
+        name=profile or "custom",
+    )
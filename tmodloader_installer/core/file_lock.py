@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+プロセス間の排他ロック
+ロックファイルをOSのロック（POSIXはflock、Windowsはmsvcrt.locking）で保持する。
+プロセスが終了するとOSが解放するため、異常終了してもロックは残らない。
+同じプロセス内でも、別のFileLockとは排他になる。
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from tmodloader_installer.core.cancel import check_cancelled
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+# ロックが空くまで確認し直す間隔（秒）
+POLL_INTERVAL = 0.2
+
+
+class LockTimeout(TimeoutError):
+    """待機時間内にロックを取得できなかった"""
+
+
+def _try_lock(fd) -> bool:
+    try:
+        if sys.platform == "win32":
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fd):
+    if sys.platform == "win32":
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class FileLock:
+    """ロックファイルによる排他ロック（保持中はプロセスIDと用途をファイルに記録）"""
+
+    def __init__(self, path, description: str = ""):
+        self.path = Path(path)
+        self.description = description
+        self._fd = None
+
+    @property
+    def locked(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """待機せずに取得を試みる"""
+        if self._fd is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if not _try_lock(fd):
+            os.close(fd)
+            return False
+        self._fd = fd
+        self._write_owner()
+        return True
+
+    def acquire(self, timeout: float = None, cancel=None, on_wait=None):
+        """取得できるまで待機
+
+        timeout: 待機する上限（秒、Noneは無制限）。超えた場合はLockTimeoutを送出
+        cancel: 待機中に確認するキャンセルの指示（CancelToken）
+        on_wait: 待機を始める時に保持している側の情報（owner()）を受け取る関数
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiting = False
+        while not self.try_acquire():
+            if not waiting and on_wait:
+                on_wait(self.owner())
+            waiting = True
+            check_cancelled(cancel)
+            if deadline is not None and time.monotonic() >= deadline:
+                raise LockTimeout(f"ロックを取得できませんでした: {self.path}")
+            time.sleep(POLL_INTERVAL)
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            _unlock(self._fd)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def _write_owner(self):
+        # Windowsはロックした先頭1バイトの後ろに書く（他のプロセスが読めるように）
+        offset = 1 if sys.platform == "win32" else 0
+        info = {
+            "pid": os.getpid(),
+            "description": self.description,
+            "since": datetime.now().isoformat(timespec="seconds"),
+        }
+        os.ftruncate(self._fd, offset)
+        os.lseek(self._fd, offset, os.SEEK_SET)
+        os.write(self._fd, json.dumps(info, ensure_ascii=False).encode("utf-8"))
+
+    def owner(self):
+        """ロックを保持しているプロセスの情報（読めない場合はNone）"""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read().lstrip(b"\0 ")
+            return json.loads(data.decode("utf-8")) if data else None
+        except (OSError, ValueError):
+            return None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+class SlotLock:
+    """同時に実行できる数をcount個のロックファイルで制限（プロセス間で共有）"""
+
+    def __init__(self, directory, name: str, count: int, description: str = ""):
+        self.directory = Path(directory)
+        self.name = name
+        self.count = count
+        self.description = description
+
+    def acquire(self, timeout: float = None, cancel=None, on_wait=None):
+        """空いている枠を取得して保持したFileLockを返す（countが0以下の場合は制限せずNone）"""
+        if self.count <= 0:
+            return None
+        locks = [
+            FileLock(self.directory / f"{self.name}.{i}.lock", self.description)
+            for i in range(self.count)
+        ]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiting = False
+        while True:
+            for lock in locks:
+                if lock.try_acquire():
+                    return lock
+            if not waiting and on_wait:
+                on_wait([lock.owner() for lock in locks])
+            waiting = True
+            check_cancelled(cancel)
+            if deadline is not None and time.monotonic() >= deadline:
+                raise LockTimeout(f"同時実行数の上限に達しています: {self.name}")
+            time.sleep(POLL_INTERVAL)
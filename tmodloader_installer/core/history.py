@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+操作の履歴と統計
+インストール・バックアップ・復元ごとにバージョン・フェーズごとの所要時間とバイト数・
+ホスト・結果をSQLiteに記録し、パーセンタイルと期間ごとの推移を集計する。
+複数のホストの履歴ファイルをまとめて集計すると、ディスク・ネットワークが遅くなった
+ホストの検出やメンテナンス時間の見積もりに使える。
+"""
+
+import socket
+import sqlite3
+import time
+from collections import defaultdict
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+
+from tmodloader_installer.utils.config import load_config
+from tmodloader_installer.utils.helpers import get_app_base_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    host TEXT NOT NULL,
+    install_path TEXT,
+    version TEXT,
+    started_at REAL NOT NULL,
+    seconds REAL NOT NULL,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    outcome TEXT NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS phases (
+    operation_id INTEGER NOT NULL REFERENCES operations(id),
+    phase TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    bytes INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS operations_started_at ON operations(started_at);
+CREATE INDEX IF NOT EXISTS phases_operation_id ON phases(operation_id);
+"""
+
+# 記録する操作の種類
+KINDS = ("install", "backup", "restore")
+
+# 集計の期間の単位 -> 期間の表示名の書式
+PERIODS = {"day": "%Y-%m-%d", "week": "%Y-W%W", "month": "%Y-%m"}
+
+# 表示するパーセンタイル
+PERCENTILES = (50, 90, 99)
+
+
+def history_path() -> Path:
+    """このホストの履歴ファイル"""
+    return get_app_base_path() / "history" / "history.db"
+
+
+def current_host() -> str:
+    """記録するホスト名（config.yamlのhistory.hostで上書き可能）"""
+    return load_config()["history"].get("host") or socket.gethostname()
+
+
+class HistoryStore:
+    """SQLiteの履歴ファイル（複数のプロセス・スレッドから追記できる）"""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else history_path()
+
+    def _connect(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=10)
+        conn.executescript(SCHEMA)
+        return conn
+
+    def add(
+        self,
+        kind: str,
+        started_at: float,
+        seconds: float,
+        outcome: str,
+        phases=(),
+        host: str = None,
+        install_path=None,
+        version: str = None,
+        nbytes: int = 0,
+        error: str = None,
+    ) -> int:
+        """操作を1件記録（phasesは(フェーズ名, 秒数, バイト数)の並び）"""
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                "INSERT INTO operations"
+                " (kind, host, install_path, version, started_at, seconds, bytes, outcome, error)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    kind,
+                    host or current_host(),
+                    str(install_path) if install_path else None,
+                    version,
+                    started_at,
+                    seconds,
+                    nbytes,
+                    outcome,
+                    error,
+                ),
+            )
+            operation_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO phases (operation_id, phase, seconds, bytes) VALUES (?, ?, ?, ?)",
+                [(operation_id, name, sec, size) for name, sec, size in phases],
+            )
+        return operation_id
+
+    def operations(self, kind: str = None, since: float = None, host: str = None):
+        """記録された操作（古い順、phasesは{フェーズ名: (秒数, バイト数)}）"""
+        if not self.path.is_file():
+            return []
+        conditions, params = [], []
+        for column, value in (("kind", kind), ("host", host)):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("started_at >= ?")
+            params.append(since)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                f"SELECT * FROM operations{where} ORDER BY started_at", params
+            ).fetchall()
+            phases = defaultdict(dict)
+            for row in conn.execute(
+                "SELECT p.operation_id, p.phase, p.seconds, p.bytes FROM phases p"
+                f" JOIN operations ON operations.id = p.operation_id{where}",
+                params,
+            ):
+                phases[row[0]][row[1]] = (row[2], row[3])
+
+        operations = []
+        for row in rows:
+            operation = dict(row)
+            operation["phases"] = phases.get(row["id"], {})
+            operations.append(operation)
+        return operations
+
+
+def load_operations(paths=None, kind: str = None, since: float = None, host: str = None):
+    """複数の履歴ファイルから操作を読み込んでまとめる（省略時はこのホストの履歴）"""
+    operations = []
+    for path in paths or [None]:
+        operations.extend(HistoryStore(path).operations(kind, since, host))
+    operations.sort(key=lambda operation: operation["started_at"])
+    return operations
+
+
+class Operation:
+    """1回の操作の記録（withで囲んだ範囲の所要時間と結果を終了時に記録）
+
+    フェーズの所要時間とバイト数はphase()で追加する。
+    キャンセルされた場合は"cancelled"、例外の場合は"error"として記録する。
+    """
+
+    def __init__(self, kind: str, install_path=None, version: str = None, store=None):
+        self.kind = kind
+        self.install_path = install_path
+        self.version = version
+        self.store = store
+        self.phases = []
+        self.started_at = None
+        self._start = None
+
+    def phase(self, name: str, seconds: float, nbytes: int = 0):
+        """フェーズの所要時間とバイト数を追加"""
+        self.phases.append((name, seconds, nbytes))
+
+    def __enter__(self):
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        from tmodloader_installer.core.cancel import OperationCancelled
+
+        if exc_type is None:
+            outcome = "success"
+        elif issubclass(exc_type, OperationCancelled):
+            outcome = "cancelled"
+        else:
+            outcome = "error"
+        self.save(outcome, str(exc) if exc else None)
+        return False
+
+    def save(self, outcome: str, error: str = None):
+        """記録（履歴の書き込みに失敗しても操作自体は失敗させない）"""
+        try:
+            (self.store or HistoryStore()).add(
+                self.kind,
+                self.started_at,
+                time.perf_counter() - self._start,
+                outcome,
+                phases=self.phases,
+                install_path=self.install_path,
+                version=self.version,
+                nbytes=sum(size for _, _, size in self.phases),
+                error=error,
+            )
+        except (sqlite3.Error, OSError):
+            pass
+
+
+def percentile(values, q: float):
+    """パーセンタイル（線形補間、空の場合はNone）"""
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def phase_throughputs(operations):
+    """(ホスト, "種類:フェーズ") -> [(開始時刻, バイト/秒)]（成功した操作のみ）"""
+    samples = defaultdict(list)
+    for operation in operations:
+        if operation["outcome"] != "success":
+            continue
+        for phase, (seconds, size) in operation["phases"].items():
+            if seconds > 0 and size > 0:
+                samples[(operation["host"], f"{operation['kind']}:{phase}")].append(
+                    (operation["started_at"], size / seconds)
+                )
+    return samples
+
+
+def duration_summary(operations):
+    """(ホスト, 種類) -> {count, succeeded, p50, p90, p99}（所要時間は成功した操作のみ）"""
+    groups = defaultdict(list)
+    for operation in operations:
+        groups[(operation["host"], operation["kind"])].append(operation)
+    summary = {}
+    for key, group in sorted(groups.items()):
+        durations = [op["seconds"] for op in group if op["outcome"] == "success"]
+        row = {"count": len(group), "succeeded": len(durations)}
+        for q in PERCENTILES:
+            row[f"p{q}"] = percentile(durations, q)
+        summary[key] = row
+    return summary
+
+
+def trend(operations, period: str = "week"):
+    """(ホスト, 種類) -> [(期間, 件数, p50, p90)]（成功した操作の所要時間）"""
+    fmt = PERIODS[period]
+    groups = defaultdict(lambda: defaultdict(list))
+    for operation in operations:
+        if operation["outcome"] != "success":
+            continue
+        label = datetime.fromtimestamp(operation["started_at"]).strftime(fmt)
+        groups[(operation["host"], operation["kind"])][label].append(operation["seconds"])
+    return {
+        key: [
+            (label, len(values), percentile(values, 50), percentile(values, 90))
+            for label, values in sorted(periods.items())
+        ]
+        for key, periods in sorted(groups.items())
+    }
+
+
+def degraded_hosts(operations, now: float = None, recent_days: float = None, ratio: float = None):
+    """最近のスループットの中央値がそれ以前より下がったホストとフェーズ
+
+    戻り値: [(ホスト, フェーズ, 最近の中央値, それ以前の中央値)]
+    """
+    config = load_config()["history"]
+    now = time.time() if now is None else now
+    recent_days = config["recent_days"] if recent_days is None else recent_days
+    ratio = config["degraded_ratio"] if ratio is None else ratio
+    boundary = now - recent_days * 86400
+
+    degraded = []
+    for (host, phase), samples in sorted(phase_throughputs(operations).items()):
+        recent = [rate for started_at, rate in samples if started_at >= boundary]
+        baseline = [rate for started_at, rate in samples if started_at < boundary]
+        if not recent or not baseline:
+            continue
+        recent_median = percentile(recent, 50)
+        baseline_median = percentile(baseline, 50)
+        if recent_median < baseline_median * ratio:
+            degraded.append((host, phase, recent_median, baseline_median))
+    return degraded
+
+
+def maintenance_window(operations, host: str = None):
+    """インストールの所要時間のp90（メンテナンス時間の目安、実績がない場合はNone）"""
+    durations = [
+        op["seconds"]
+        for op in operations
+        if op["kind"] == "install"
+        and op["outcome"] == "success"
+        and (host is None or op["host"] == host)
+    ]
+    return percentile(durations, 90)
+
+
+def _format_seconds(seconds):
+    return "-" if seconds is None else f"{seconds:.1f}秒"
+
+
+def report_lines(operations, period: str = "week"):
+    """統計を表示用の行に整形"""
+    from tmodloader_installer.core.bandwidth import format_rate
+
+    if not operations:
+        return ["記録された操作はありません"]
+
+    lines = ["=== 所要時間（成功した操作） ==="]
+    for (host, kind), row in duration_summary(operations).items():
+        percentiles = " ".join(
+            f"p{q} {_format_seconds(row[f'p{q}'])}" for q in PERCENTILES
+        )
+        lines.append(
+            f"  [{host}] {kind}: {row['succeeded']}/{row['count']}件成功 {percentiles}"
+        )
+
+    lines.append("=== スループット ===")
+    for (host, phase), samples in sorted(phase_throughputs(operations).items()):
+        rates = [rate for _, rate in samples]
+        lines.append(
+            f"  [{host}] {phase}: p50 {format_rate(percentile(rates, 50))}"
+            f" p10 {format_rate(percentile(rates, 10))}（{len(rates)}件）"
+        )
+
+    lines.append(f"=== 推移（{period}ごとの所要時間） ===")
+    for (host, kind), rows in trend(operations, period).items():
+        lines.append(f"  [{host}] {kind}")
+        for label, count, p50, p90 in rows:
+            lines.append(
+                f"    {label}: {count}件 p50 {_format_seconds(p50)} p90 {_format_seconds(p90)}"
+            )
+
+    degraded = degraded_hosts(operations)
+    if degraded:
+        lines.append("=== 低下しているホスト ===")
+        for host, phase, recent, baseline in degraded:
+            lines.append(
+                f"  [{host}] {phase}: {format_rate(recent)}（以前は {format_rate(baseline)}）"
+            )
+
+    hosts = sorted({operation["host"] for operation in operations})
+    lines.append("=== メンテナンス時間の目安（インストールのp90） ===")
+    for host in hosts:
+        lines.append(f"  [{host}] {_format_seconds(maintenance_window(operations, host))}")
+    return lines
@@ -4,51 +4,187 @@
 指定したGitHubのパッケージをダウンロードして展開するだけ
 """
 
+import hashlib
 import os
 import sys
 import zipfile
-import requests
 import shutil
+import tempfile
+import time
 from pathlib import Path
 from urllib.parse import urlparse
 import re
+import json
 from datetime import datetime
 
+from tmodloader_installer.core.archive_cache import ArchiveCache
+from tmodloader_installer.core import backup
+from tmodloader_installer.core.bandwidth import format_rate, get_limiter
+from tmodloader_installer.core.cancel import OperationCancelled, check_cancelled
+from tmodloader_installer.core.delta import DeltaStore, apply_delta
+from tmodloader_installer.core.integrity import (
+    DigestMismatchError,
+    expected_digest,
+    hash_file,
+    load_pinned_digests,
+    read_digest_record,
+    verify_digest,
+    write_digest_record,
+)
+from tmodloader_installer.core.planner import tree_size, record_throughput
+from tmodloader_installer.core.release_index import ReleaseIndex
+from tmodloader_installer.core.release_source import (
+    ReleaseSource,
+    get_release_source,
+    local_asset_path,
+)
+from tmodloader_installer.core.staging import staging_path
+from tmodloader_installer.utils.config import load_config
+from tmodloader_installer.utils.constants import INSTALLED_MARKER_NAME
+from tmodloader_installer.utils.helpers import get_app_base_path
+
+
+def write_installed_marker(target_dir, tag: str):
+    """インストールしたバージョンをディレクトリに記録
+
+    一時ファイルに書いてから置き換えるため、ハードリンクで共有している記録は書き換えない。
+    """
+    marker = Path(target_dir) / INSTALLED_MARKER_NAME
+    temp = marker.with_name(f"{marker.name}.tmp")
+    with open(temp, "w", encoding="utf-8") as f:
+        json.dump({"tag": tag, "installed_at": datetime.now().isoformat()}, f)
+    os.replace(temp, marker)
+
 
 class SimpleInstaller:
     """シンプルなインストーラー"""
 
-    def __init__(self, github_url: str, install_path: str):
+    def __init__(
+        self,
+        github_url: str,
+        install_path: str,
+        download_url: str = None,
+        use_cache: bool = False,
+        use_delta: bool = False,
+        spool_threshold: int = None,
+        staged: bool = False,
+        backup_profile: str = None,
+        extract_filter=None,
+        copy_workers: int = None,
+        progress_callback=None,
+        release_source=None,
+        io_governor=None,
+        cancel=None,
+        use_store: bool = False,
+        link_mode: str = None,
+    ):
         self.github_url = github_url
         self.install_path = Path(install_path)
-        self.download_url = self._get_download_url()
+        self.release_tag = None
+        # 差分更新には新旧のアーカイブキャッシュが必要
+        self.use_cache = use_cache or use_delta
+        self.use_delta = use_delta
+        self.archive_cache = ArchiveCache()
+        self._from_cache = False
+        # 指定時はメモリ上のバッファにダウンロード（閾値を超えた分だけディスクへ退避）
+        self.spool_threshold = spool_threshold
+        self.temp_file = None
+        self.archive_buffer = None
+        # 他のプロセスと共有しているダウンロード（SharedDownload、参照を外すまで削除されない）
+        self.shared_download = None
+        # 指定時はステージングディレクトリに展開してからリネームで切り替え
+        self.staged = staged
+        # 指定時は展開済みリリースの保存領域からリンクで組み立て（link_modeは組み立て方）
+        self.use_store = use_store
+        self.link_mode = link_mode or load_config()["release_store"]["link_mode"]
+        # バックアップ対象（config.yamlのプロファイル名、省略時は既定のプロファイル）
+        self.backup_profile = backup.get_backup_profile(backup_profile)
+        # 展開対象の絞り込み（ExtractFilter、Noneの場合は全て展開）
+        self.extract_filter = extract_filter
+        # バックアップのコピー並列数と進捗通知（CopyProgressを受け取る関数）
+        self.copy_workers = copy_workers
+        self.progress_callback = progress_callback
+        # バックアップ・展開のI/Oの制限（IOGovernor、Noneの場合は制限しない）
+        self.io_governor = io_governor
+        # キャンセルの指示（CancelToken、ダウンロード・バックアップ・展開の各ループで確認）
+        self.cancel = cancel
+        # 実行中のインストールの履歴（history.Operation、フェーズごとの実績を追加する）
+        self.history = None
+        # リリースの取得元（ReleaseSourceまたは取得元の指定、省略時はconfig.yamlの設定）
+        self._release_source = release_source
+        # 照合するSHA-256と由来（"pinned" / "release"、リリース情報から決定）
+        self.expected_sha256 = None
+        self.digest_source = None
+        # 解決済みのダウンロードURLが渡された場合はAPI呼び出しを省略
+        self.download_url = download_url or self._get_download_url()
+
+    @property
+    def release_source(self):
+        """リリースの取得元（必要になるまで作成しない）"""
+        if not isinstance(self._release_source, ReleaseSource):
+            self._release_source = get_release_source(self._release_source)
+        return self._release_source
 
     def _get_download_url(self) -> str:
-        """GitHub Release URLからダウンロードURLを取得"""
+        """GitHub Release URL（またはバージョン指定）からダウンロードURLを取得"""
         # URLからバージョンを抽出
         match = re.search(r"/tag/([^/]+)", self.github_url)
         if not match:
-            raise ValueError("無効なGitHub Release URLです")
+            if "://" in self.github_url:
+                raise ValueError("無効なGitHub Release URLです")
+            # "latest" や "2025.06.*" などのバージョン指定
+            return self._resolve_version_spec(self.github_url)
 
         tag = match.group(1)
-        # API URLに変換
-        api_url = (
-            f"https://api.github.com/repos/tModLoader/tModLoader/releases/tags/{tag}"
-        )
+        self.release_tag = tag
 
-        response = requests.get(api_url)
-        response.raise_for_status()
-
-        release_data = response.json()
+        release = self.release_source.release(tag)
+        if release is None:
+            raise ValueError(f"リリースが見つかりません: {tag}")
 
         # AssetsからtModLoader.zipを探す
-        for asset in release_data.get("assets", []):
-            if asset["name"] == "tModLoader.zip":
-                return asset["browser_download_url"]
+        download_url = ReleaseIndex.asset_url(release)
+        if not download_url:
+            raise ValueError("tModLoader.zipが見つかりません")
+        self._set_expected_digest(release)
+        return download_url
+
+    def _resolve_version_spec(self, spec: str) -> str:
+        """バージョン指定をリリースの取得元から解決"""
+        release = self.release_source.select(spec)
+        if release is None:
+            raise ValueError(f"指定に一致するリリースが見つかりません: {spec}")
+
+        download_url = ReleaseIndex.asset_url(release)
+        if not download_url:
+            raise ValueError("tModLoader.zipが見つかりません")
+
+        self.release_tag = release["tag_name"]
+        self.github_url = release.get("html_url") or self.github_url
+        self._set_expected_digest(release)
+        return download_url
+
+    def _set_expected_digest(self, release):
+        """照合するダイジェストを固定した一覧・リリース情報から決定"""
+        pinned = load_pinned_digests(load_config()["download"].get("digest_manifest"))
+        self.expected_sha256, self.digest_source = expected_digest(
+            release, self.release_tag, pinned
+        )
+
+    def record_history(self):
+        """このインストールを履歴に記録するOperationを作成（withで囲んで使う）"""
+        from tmodloader_installer.core.history import Operation
+
+        self.history = Operation("install", self.install_path, self.release_tag)
+        return self.history
 
-        raise ValueError("tModLoader.zipが見つかりません")
+    def _record_phase(self, phase: str, size: int, seconds: float):
+        """フェーズの実績を見積もり用のスループットと履歴に記録"""
+        record_throughput(phase, size, seconds)
+        if self.history is not None:
+            self.history.phase(phase, seconds, size)
 
-    def create_backup(self):
+    def create_backup(self, suffix: str = None):
         """既存のtModLoaderフォルダをバックアップ"""
         if not self.install_path.exists():
             print(
@@ -58,78 +194,456 @@ class SimpleInstaller:
 
         # バックアップ先ディレクトリを作成（exeファイルと同じディレクトリ）
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # PyInstallerでパッケージ化された場合の対応
-        if getattr(sys, 'frozen', False):
-            # 実行ファイルの場合、実行ファイルと同じディレクトリにbackupsを作成
-            base_path = Path(sys.executable).parent
-        else:
-            # 開発環境の場合
-            base_path = Path(__file__).parent.parent
-        
-        backup_dir = base_path / "backups"
+        backup_dir = get_app_base_path() / "backups"
         backup_dir.mkdir(exist_ok=True)
-        backup_path = backup_dir / f"tModLoader_backup_{timestamp}"
+        backup_name = f"tModLoader_backup_{timestamp}"
+        # 同時刻に複数のバックアップを作成する場合の名前の衝突を回避
+        if suffix:
+            backup_name += f"_{suffix}"
+        backup_path = backup_dir / backup_name
 
-        print(f"バックアップ作成中: {backup_path}")
-        shutil.copytree(self.install_path, backup_path)
+        print(f"バックアップ作成中 ({self.backup_profile.name}): {backup_path}")
+        start = time.perf_counter()
+        backup.create_backup(
+            self.install_path,
+            backup_path,
+            self.backup_profile,
+            workers=self.copy_workers,
+            progress_callback=self.progress_callback,
+            governor=self.io_governor,
+            cancel=self.cancel,
+        )
+        self._record_phase("backup", tree_size(backup_path), time.perf_counter() - start)
         print("バックアップ完了")
 
         return backup_path
 
+    def discard_backup(self, backup_path):
+        """キャンセル時にこの実行で作成したバックアップを削除"""
+        if backup_path:
+            shutil.rmtree(backup_path, ignore_errors=True)
+            print(f"作成したバックアップを削除しました: {backup_path}")
+
     def _download_file(self):
-        """ファイルをダウンロード"""
-        response = requests.get(self.download_url, stream=True)
-        response.raise_for_status()
-        
+        """ファイルをダウンロード（SHA-256を受信しながら計算して照合）"""
+        # キャッシュ済みのアーカイブがあればダウンロードしない
+        if self.use_cache and self.archive_cache.has(self.release_tag):
+            cached = self.archive_cache.path(self.release_tag)
+            try:
+                self._verify_archive(cached)
+            except DigestMismatchError as e:
+                # 破損したキャッシュは破棄してダウンロードし直す
+                print(f"キャッシュ済みのアーカイブを破棄します: {e}")
+                cached.unlink()
+            else:
+                self.temp_file = cached
+                self._from_cache = True
+                print(f"キャッシュ済みのアーカイブを使用: {self.temp_file}")
+                return None
+
+        # ローカル・NAS上のアーカイブはコピーせずにそのまま展開元にする（削除もしない）
+        local_path = local_asset_path(self.download_url)
+        if local_path is not None:
+            if not local_path.is_file():
+                raise FileNotFoundError(f"アーカイブが見つかりません: {local_path}")
+            self._verify_archive(local_path)
+            self.temp_file = local_path
+            self._from_cache = True
+            print(f"ローカルのアーカイブを使用: {self.temp_file}")
+            return None
+
+        import requests
+
+        # 帯域制限（プロセス内の他の通信と上限を共有）
+        limiter = get_limiter()
+        if limiter.rate:
+            print(f"帯域制限: {format_rate(limiter.rate)}")
+
         # 一時ファイルに保存（exeファイルと同じディレクトリ）
-        # PyInstallerでパッケージ化された場合の対応
-        if getattr(sys, 'frozen', False):
-            # 実行ファイルの場合、実行ファイルと同じディレクトリにdownloadsを作成
-            base_path = Path(sys.executable).parent
-        else:
-            # 開発環境の場合
-            base_path = Path(__file__).parent.parent
-        
-        temp_dir = base_path / "downloads"
+        temp_dir = get_app_base_path() / "downloads"
         temp_dir.mkdir(exist_ok=True)
-        self.temp_file = temp_dir / "tModLoader_temp.zip"
-        with open(self.temp_file, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        
+
+        # キャッシュしない場合はメモリ上のバッファに保存し、ZIPファイルを書き出さない
+        if self.spool_threshold and not self.use_cache:
+            start = time.perf_counter()
+            response = requests.get(self.download_url, stream=True)
+            response.raise_for_status()
+            digest = hashlib.sha256()
+            self.archive_buffer = tempfile.SpooledTemporaryFile(
+                max_size=self.spool_threshold, dir=temp_dir
+            )
+            try:
+                for chunk in self._receive(limiter, response):
+                    digest.update(chunk)
+                    self.archive_buffer.write(chunk)
+            except OperationCancelled:
+                response.close()
+                self._cleanup_archive()
+                raise
+            self._record_phase(
+                "download", self.archive_buffer.tell(), time.perf_counter() - start
+            )
+            try:
+                self._verify_download(digest.hexdigest())
+            except DigestMismatchError:
+                self._cleanup_archive()
+                raise
+            self.archive_buffer.seek(0)
+            return response
+
+        return self._download_shared(temp_dir, limiter)
+
+    def _download_shared(self, temp_dir, limiter):
+        """他のプロセスと共有するファイルにダウンロード
+
+        同じURLを他のプロセスがダウンロード中の場合は完了を待ってそのファイルを使う。
+        キャッシュする場合はキャッシュのパスに直接保存する。
+        """
+        import requests
+        from tmodloader_installer.core.shared_download import (
+            SharedDownload,
+            shared_download_path,
+        )
+
+        cache = bool(self.use_cache and self.release_tag)
+        if cache:
+            path = self.archive_cache.path(self.release_tag)
+            path.parent.mkdir(parents=True, exist_ok=True)
+        else:
+            path = shared_download_path(temp_dir, self.download_url)
+        # 予約済みの参照があればそれを使う
+        shared = self.shared_download if self.shared_download is not None else SharedDownload(path)
+        response = None
+        digest = hashlib.sha256()
+
+        def download(part):
+            # 受信途中のファイルは例外時にSharedDownloadが削除する
+            nonlocal response
+            start = time.perf_counter()
+            response = requests.get(self.download_url, stream=True)
+            response.raise_for_status()
+            try:
+                with open(part, "wb") as f:
+                    for chunk in self._receive(limiter, response):
+                        digest.update(chunk)
+                        f.write(chunk)
+            except OperationCancelled:
+                response.close()
+                raise
+            self._record_phase("download", part.stat().st_size, time.perf_counter() - start)
+            self._verify_download(digest.hexdigest())
+
+        self.temp_file = shared.acquire(
+            download,
+            self.cancel,
+            on_wait=lambda owner: print("他のプロセスのダウンロードの完了を待っています"),
+            # 以降の利用時に再計算しないよう結果を記録
+            finish=lambda path: write_digest_record(path, digest.hexdigest(), self.digest_source),
+        )
+        self.shared_download = shared
+        self._from_cache = cache
+        if not shared.downloaded:
+            print(f"他のプロセスがダウンロードしたファイルを使用: {self.temp_file}")
+            try:
+                self._verify_archive(self.temp_file)
+            except DigestMismatchError:
+                self._cleanup_archive()
+                raise
         return response
+
+    def reserve_download(self):
+        """他のプロセスと共有するダウンロードに先に参照を登録（同時実行数の枠を待つ前に呼ぶ）
+
+        枠を待っている間に先のプロセスが終わっても、共有のアーカイブを削除させずに使う。
+        キャッシュ・メモリ上のバッファ・ローカルのアーカイブを使う場合は何もしない。
+        """
+        from tmodloader_installer.core.shared_download import (
+            SharedDownload,
+            shared_download_path,
+        )
+
+        if self.use_cache and self.release_tag:
+            return
+        if self.spool_threshold and not self.use_cache:
+            return
+        if local_asset_path(self.download_url) is not None:
+            return
+        temp_dir = get_app_base_path() / "downloads"
+        shared = SharedDownload(shared_download_path(temp_dir, self.download_url))
+        shared.reserve()
+        self.shared_download = shared
+
+    def _receive(self, limiter, response):
+        """受信したチャンクを帯域制限に合わせて返す（チャンクごとにキャンセルを確認）"""
+        return limiter.throttle(response.iter_content(chunk_size=1024 * 1024), self.cancel)
+
+    def _verify_download(self, actual: str):
+        """ダウンロードしたアーカイブのダイジェストを照合（展開前に破損を検出）"""
+        verify_digest(actual, self.expected_sha256, self.download_url)
+        if self.expected_sha256:
+            print(f"SHA-256を確認しました（{self.digest_source}）: {actual}")
+        else:
+            print(f"照合するダイジェストがありません。SHA-256: {actual}")
+
+    def _verify_archive(self, path):
+        """保存済みのアーカイブを照合（検証済みの記録があれば再計算しない）"""
+        if not self.expected_sha256:
+            return
+        record = read_digest_record(path)
+        actual = record["sha256"] if record else hash_file(path)
+        verify_digest(actual, self.expected_sha256, str(path))
+        if not record or not record.get("verified_by"):
+            write_digest_record(path, actual, self.digest_source)
     
     def _extract_files(self):
         """ZIPファイルを展開"""
+        if self.staged:
+            return self._extract_staged()
+
         # インストール先ディレクトリを作成
         self.install_path.mkdir(parents=True, exist_ok=True)
-        
-        # ZIPファイルを展開（上書き配置）
-        with zipfile.ZipFile(self.temp_file, "r") as zip_ref:
-            zip_ref.extractall(self.install_path)
-        
-        # 一時ファイルを削除
-        self.temp_file.unlink()
+
+        try:
+            # ZIPファイルを展開（上書き配置、既存のファイルは確定まで退避）
+            job = self._extract_archive(self.install_path, in_place=True)
+            try:
+                job.finish()
+            except Exception:
+                job.rollback()
+                raise
+        finally:
+            self._cleanup_archive()
+
+    def _extract_staged(self):
+        """ステージングディレクトリに展開してからインストール先と入れ替え
+
+        展開中もインストール先は変更されず、失敗した場合もそのまま残る。
+        """
+        staging_dir = staging_path(self.install_path)
+        if staging_dir.exists():
+            shutil.rmtree(staging_dir)
+
+        try:
+            # 既存のファイルの引き継ぎ・入れ替え・旧インストール先の削除はジョブが行う
+            job = self._extract_archive(staging_dir, in_place=False)
+            try:
+                job.finish()
+            except Exception:
+                job.rollback()
+                raise
+        finally:
+            self._cleanup_archive()
+
+    def _extract_archive(self, dest_dir, in_place=None):
+        """アーカイブを展開（除外対象のメンバーは解凍せずにスキップ）
+
+        in_place: 指定した場合はジャーナルに記録しながら展開し、確定前のExtractJobを返す
+            （Trueはインストール先への直接展開、Falseはステージングへの展開）
+        """
+        job = None
+        start = time.perf_counter()
+        with zipfile.ZipFile(self._archive_source(), "r") as zip_ref:
+            if self.extract_filter is None:
+                members = zip_ref.infolist()
+            else:
+                members, skipped = self.extract_filter.select(zip_ref)
+                print(
+                    f"展開プロファイル「{self.extract_filter.name}」: {skipped}個のファイルを除外"
+                )
+            if in_place is not None:
+                job = self._start_extract_job(dest_dir, members, in_place)
+                try:
+                    job.run(zip_ref)
+                except Exception:
+                    job.rollback()
+                    raise
+            elif self.io_governor:
+                for info in members:
+                    check_cancelled(self.cancel)
+                    self.io_governor.extract_member(zip_ref, info, dest_dir, self.cancel)
+            else:
+                for info in members:
+                    check_cancelled(self.cancel)
+                    zip_ref.extract(info, dest_dir)
+
+        self._record_phase(
+            "extract",
+            sum(info.file_size for info in members),
+            time.perf_counter() - start,
+        )
+        return job
+
+    def _start_extract_job(self, dest_dir, members, in_place):
+        """展開の計画をジャーナルに記録（中断された場合は次回の起動時に再開できる）"""
+        from tmodloader_installer.core.journal import ExtractJob
+
+        return ExtractJob.start(
+            # メモリ上のバッファは残らないため再開できない（ロールバックのみ）
+            archive=None if self.archive_buffer else self.temp_file,
+            dest_dir=dest_dir,
+            install_path=self.install_path,
+            members=members,
+            in_place=in_place,
+            tag=self.release_tag,
+            # キャッシュしていない一時ファイルは確定後に削除
+            delete_archive=not self._from_cache,
+            governor=self.io_governor,
+            cancel=self.cancel,
+        )
+
+    def _archive_source(self):
+        """展開元（メモリ上のバッファまたはZIPファイルのパス）"""
+        return self.archive_buffer if self.archive_buffer else self.temp_file
+
+    def _cleanup_archive(self):
+        """一時ファイル・バッファを削除（キャッシュ・他のプロセスが使っているファイルは残す）"""
+        if self.archive_buffer:
+            self.archive_buffer.close()
+            self.archive_buffer = None
+        elif self.shared_download is not None:
+            # 他のプロセスが使っていなければ削除
+            self.shared_download.release(delete=not self._from_cache)
+            self.shared_download = None
+
+    def installed_tag(self):
+        """インストール先に記録されたバージョンのタグを取得"""
+        return backup.installed_tag(self.install_path)
+
+    def _write_installed_marker(self, target_dir=None):
+        """インストールしたバージョンをインストール先に記録"""
+        if not self.release_tag:
+            return
+        write_installed_marker(target_dir or self.install_path, self.release_tag)
+
+    def _prepare_delta(self):
+        """インストール済みバージョンからの差分パッケージを取得（必要なら作成）"""
+        from_tag = self.installed_tag()
+        if not from_tag or not self.release_tag or from_tag == self.release_tag:
+            return None
+
+        store = DeltaStore()
+        delta_path = store.get(from_tag, self.release_tag)
+        if delta_path or not self.archive_cache.has(from_tag):
+            return delta_path
+
+        # 旧バージョンがキャッシュ済みなら新バージョンを取得して差分を作成
+        self._download_file()
+        print(f"差分を作成中: {from_tag} -> {self.release_tag}")
+        try:
+            return store.create(
+                self.archive_cache.path(from_tag), self.temp_file, from_tag, self.release_tag
+            )
+        finally:
+            self._cleanup_archive()
+
+    def _install_delta(self):
+        """差分パッケージを適用（適用できなかった場合はFalse）"""
+        delta_path = self._prepare_delta()
+        if not delta_path:
+            return False
+
+        print(f"差分を適用中: {delta_path}")
+        start = time.perf_counter()
+        try:
+            # ステージングで組み立ててから切り替え、バージョンの記録も行う
+            manifest = apply_delta(
+                delta_path,
+                self.install_path,
+                extract_filter=self.extract_filter,
+                governor=self.io_governor,
+                cancel=self.cancel,
+            )
+        except ValueError as e:
+            print(f"差分を適用できません。全体をインストールします: {e}")
+            return False
+        self._record_phase("delta", delta_path.stat().st_size, time.perf_counter() - start)
+
+        print(
+            f"差分適用完了（追加 {len(manifest['added'])}・変更 {len(manifest['changed'])}"
+            f"・削除 {len(manifest['removed'])}・未変更 {manifest['unchanged']}）"
+        )
+        return True
+
+    def _install_from_store(self):
+        """展開済みリリースの保存領域からインストール先を組み立て（未保存なら取得して保存）"""
+        from tmodloader_installer.core.release_store import ReleaseStore
+
+        if not self.release_tag:
+            raise ValueError("バージョンのタグが不明なため展開済みリリースを使用できません")
+
+        store = ReleaseStore()
+        if store.has(self.release_tag):
+            print(f"保存済みの展開済みリリースを使用: {store.path(self.release_tag)}")
+        else:
+            print(f"ダウンロード中: {self.download_url}")
+            self._download_file()
+            print("ダウンロード完了")
+            start = time.perf_counter()
+            try:
+                path = store.add(
+                    self.release_tag,
+                    self._archive_source(),
+                    governor=self.io_governor,
+                    cancel=self.cancel,
+                )
+            finally:
+                self._cleanup_archive()
+            self._record_phase("extract", tree_size(path), time.perf_counter() - start)
+
+        print(f"配置中: {self.install_path}")
+        start = time.perf_counter()
+        mode = store.install(
+            self.release_tag,
+            self.install_path,
+            self.link_mode,
+            extract_filter=self.extract_filter,
+            cancel=self.cancel,
+        )
+        self._record_phase("link", 0, time.perf_counter() - start)
+        print(f"配置完了（{mode}）")
 
     def download_and_install(self):
         """ダウンロードしてインストール"""
-        # 1. バックアップ作成
-        backup_path = self.create_backup()
-        
-        # 2. ダウンロード
-        print(f"ダウンロード中: {self.download_url}")
-        self._download_file()
-        print("ダウンロード完了")
-        
-        # 3. 展開
-        print(f"展開中: {self.install_path}")
-        self._extract_files()
-        
-        print("インストール完了！")
-        
-        if backup_path:
-            print(f"バックアップはこちらに保存されました: {backup_path}")
+        try:
+            with self.record_history():
+                # 1. バックアップ作成
+                backup_path = self.create_backup()
+
+                try:
+                    # 差分更新が可能ならダウンロード・全体展開を省略
+                    if self.use_delta and self._install_delta():
+                        print("インストール完了！")
+                        if backup_path:
+                            print(f"バックアップはこちらに保存されました: {backup_path}")
+                        return
+
+                    # 保存済みのリリースならダウンロード・展開を省略してリンクで組み立て
+                    if self.use_store:
+                        self._install_from_store()
+                        print("インストール完了！")
+                        if backup_path:
+                            print(f"バックアップはこちらに保存されました: {backup_path}")
+                        return
+
+                    # 2. ダウンロード
+                    print(f"ダウンロード中: {self.download_url}")
+                    self._download_file()
+                    print("ダウンロード完了")
+
+                    # 3. 展開（キャンセルされた場合は展開した分を元に戻してから送出される）
+                    print(f"展開中: {self.install_path}")
+                    self._extract_files()
+                except OperationCancelled:
+                    self.discard_backup(backup_path)
+                    raise
+
+                print("インストール完了！")
+
+                if backup_path:
+                    print(f"バックアップはこちらに保存されました: {backup_path}")
+        finally:
+            # 予約した共有のダウンロードを使わずに終わった場合も参照を外す
+            self._cleanup_archive()
 
 
 def main():
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+ダウンロードしたアーカイブの検証
+SHA-256をダウンロードしながら計算し、リリース情報のダイジェストまたは
+固定したダイジェストの一覧と照合する。結果はアーカイブの隣に記録して再計算を省く。
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from tmodloader_installer.utils.constants import RELEASE_ASSET_NAME
+
+# 検証結果を記録するファイルの拡張子（<アーカイブ>.sha256.json）
+DIGEST_RECORD_SUFFIX = ".sha256.json"
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class DigestMismatchError(ValueError):
+    """ダイジェストが一致しない"""
+
+
+def parse_digest(value):
+    """"sha256:<16進>" または16進のダイジェストを正規化（それ以外はNone）"""
+    if not value:
+        return None
+    algorithm, _, digest = value.rpartition(":")
+    if algorithm and algorithm.lower() != "sha256":
+        return None
+    digest = digest.strip().lower()
+    if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+        return None
+    return digest
+
+
+def load_pinned_digests(path):
+    """固定したダイジェストの一覧（{タグ: sha256}のJSON）を読み込み"""
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {tag: parse_digest(value) for tag, value in data.items() if parse_digest(value)}
+
+
+def expected_digest(release, tag=None, pinned=None):
+    """照合するダイジェストと由来を決定
+
+    戻り値: (sha256またはNone, "pinned" / "release" / None)
+    固定した一覧を優先し、なければリリース情報のtModLoader.zipのダイジェストを使う。
+    """
+    tag = tag or (release or {}).get("tag_name")
+    if pinned and tag in pinned:
+        return pinned[tag], "pinned"
+    for asset in (release or {}).get("assets", []):
+        if asset["name"] == RELEASE_ASSET_NAME:
+            digest = parse_digest(asset.get("digest"))
+            return (digest, "release") if digest else (None, None)
+    return None, None
+
+
+def hash_file(path):
+    """ファイルのSHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify_digest(actual: str, expected: str, name: str):
+    """ダイジェストを照合（期待値がない場合は何もしない）"""
+    if expected and actual != expected:
+        raise DigestMismatchError(
+            f"{name} のSHA-256が一致しません（期待値 {expected}、実際 {actual}）"
+        )
+
+
+def _record_path(archive_path) -> Path:
+    archive_path = Path(archive_path)
+    return archive_path.with_name(archive_path.name + DIGEST_RECORD_SUFFIX)
+
+
+def write_digest_record(archive_path, digest: str, verified_by: str = None):
+    """アーカイブのダイジェストと検証結果を記録（書き込めない場所では何もしない）"""
+    stat = os.stat(archive_path)
+    record = {
+        "sha256": digest,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "verified_by": verified_by,
+    }
+    path = _record_path(archive_path)
+    try:
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2)
+        os.replace(temp_path, path)
+    except OSError:
+        pass
+    return record
+
+
+def read_digest_record(archive_path):
+    """記録済みのダイジェスト（アーカイブのサイズ・更新日時が変わっていればNone）"""
+    try:
+        with open(_record_path(archive_path), "r", encoding="utf-8") as f:
+            record = json.load(f)
+        stat = os.stat(archive_path)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if record.get("size") != stat.st_size or record.get("mtime") != stat.st_mtime:
+        return None
+    return record
+
+
+def archive_digest(archive_path):
+    """アーカイブのダイジェスト（記録があれば再計算しない）"""
+    record = read_digest_record(archive_path)
+    if record:
+        return record["sha256"]
+    digest = hash_file(archive_path)
+    write_digest_record(archive_path, digest)
+    return digest
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+ディスクI/Oの制限
+バックアップ・復元・展開の読み書きをMB/sと操作数/秒で制限し、
+同じホストで動いているサーバーのワールド保存などを妨げないようにする。
+バックグラウンドモードではI/O優先度を下げ、大量のコピーでページキャッシュを汚さない。
+"""
+
+import ctypes
+import os
+import shutil
+import subprocess
+import sys
+
+from tmodloader_installer.core.bandwidth import TokenBucket, format_rate, parse_rate
+from tmodloader_installer.core.cancel import check_cancelled
+from tmodloader_installer.utils.config import load_config
+
+# 読み書きの単位
+IO_CHUNK_SIZE = 1024 * 1024
+
+# ページキャッシュを汚さない場合に書き込みを確定して破棄する間隔
+DROP_CACHE_INTERVAL = 8 * 1024 * 1024
+
+_HAS_FADVISE = hasattr(os, "posix_fadvise")
+
+
+def _fadvise(fd, offset, length, advice_name):
+    if not _HAS_FADVISE:
+        return
+    try:
+        os.posix_fadvise(fd, offset, length, getattr(os, advice_name))
+    except OSError:
+        pass
+
+
+def lower_io_priority():
+    """このプロセスのI/O・CPU優先度を下げる（以降に作成するスレッドにも引き継がれる）
+
+    戻り値: 適用した内容の説明（対応していない環境では空）
+    """
+    applied = []
+    if sys.platform == "win32":
+        # PROCESS_MODE_BACKGROUND_BEGIN: I/O・メモリの優先度を下げる
+        kernel32 = ctypes.windll.kernel32
+        if kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), 0x00100000):
+            applied.append("バックグラウンド処理モード")
+        return applied
+
+    try:
+        os.nice(10)
+        applied.append("nice 10")
+    except OSError:
+        pass
+
+    if sys.platform == "darwin":
+        # setiopolicy_np(IOPOL_TYPE_DISK, IOPOL_SCOPE_PROCESS, IOPOL_THROTTLE)
+        try:
+            if ctypes.CDLL(None).setiopolicy_np(0, 0, 3) == 0:
+                applied.append("I/Oポリシー THROTTLE")
+        except (OSError, AttributeError):
+            pass
+    elif shutil.which("ionice"):
+        # アイドルクラス: 他のプロセスがディスクを使っていない時だけ読み書きする
+        result = subprocess.run(
+            ["ionice", "-c", "3", "-p", str(os.getpid())],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        if result.returncode == 0:
+            applied.append("ionice idle")
+    return applied
+
+
+class IOGovernor:
+    """バックアップ・復元・展開で共有するI/Oの制限
+
+    bytes_per_second / ops_per_second: 0は無制限
+    drop_cache: 読み書きしたデータをページキャッシュから破棄する
+    workers: コピー並列数の上限（Noneは制限しない）
+    """
+
+    def __init__(
+        self,
+        bytes_per_second: int = 0,
+        ops_per_second: int = 0,
+        drop_cache: bool = False,
+        workers: int = None,
+    ):
+        self.bytes = TokenBucket(bytes_per_second)
+        self.ops = TokenBucket(ops_per_second)
+        self.drop_cache = drop_cache
+        self.workers = workers
+
+    def describe(self):
+        """設定を表示用の文字列に整形"""
+        parts = [format_rate(self.bytes.rate)]
+        if self.ops.rate:
+            parts.append(f"{self.ops.rate}操作/秒")
+        if self.drop_cache:
+            parts.append("ページキャッシュを使わない")
+        if self.workers:
+            parts.append(f"並列数 {self.workers}")
+        return "、".join(parts)
+
+    def limit_workers(self, workers):
+        """コピー並列数を上限に合わせる"""
+        if self.workers and (not workers or workers > self.workers):
+            return self.workers
+        return workers
+
+    def throttle(self, nbytes: int = 0, ops: int = 1, cancel=None):
+        """読み書きごとに呼び出し、上限を超える分だけ待機（cancelは待機中も確認）"""
+        if ops:
+            self.ops.consume(ops, cancel)
+        if nbytes:
+            self.bytes.consume(nbytes, cancel)
+
+    def copy_stream(self, fsrc, fdst, length: int = None, cancel=None):
+        """ファイルオブジェクト間でコピー（lengthを省略した場合は終端まで）
+
+        cancel: チャンクごとに確認し、キャンセルされた場合はOperationCancelledを送出
+        """
+        copied = 0
+        synced = 0
+        dst_fd = _fileno(fdst)
+        start = fdst.tell() if dst_fd is not None else 0
+        while length is None or copied < length:
+            check_cancelled(cancel)
+            size = IO_CHUNK_SIZE if length is None else min(IO_CHUNK_SIZE, length - copied)
+            data = fsrc.read(size)
+            if not data:
+                break
+            # 読み込み・書き込みの2操作として数える
+            self.throttle(len(data), ops=2, cancel=cancel)
+            fdst.write(data)
+            copied += len(data)
+            if self.drop_cache and dst_fd is not None and copied - synced >= DROP_CACHE_INTERVAL:
+                self._drop_written(fdst, dst_fd, start + synced, copied - synced)
+                synced = copied
+        if self.drop_cache and dst_fd is not None and copied > synced:
+            self._drop_written(fdst, dst_fd, start + synced, copied - synced)
+        return copied
+
+    @staticmethod
+    def _drop_written(fdst, fd, offset, length):
+        """書き込んだ範囲を確定してからページキャッシュから破棄"""
+        if not _HAS_FADVISE:
+            return
+        fdst.flush()
+        os.fdatasync(fd)
+        _fadvise(fd, offset, length, "POSIX_FADV_DONTNEED")
+
+    def copy_file(self, src, dst, cancel=None):
+        """ファイルをコピーしてメタデータを保持（shutil.copy2の代わり）"""
+        self.throttle(ops=1, cancel=cancel)
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            _fadvise(fsrc.fileno(), 0, 0, "POSIX_FADV_SEQUENTIAL")
+            self.copy_stream(fsrc, fdst, cancel=cancel)
+            if self.drop_cache:
+                _fadvise(fsrc.fileno(), 0, 0, "POSIX_FADV_DONTNEED")
+        shutil.copystat(src, dst)
+
+    def copy_range(self, src, dst, offset: int, length: int, cancel=None):
+        """ファイルの一部をコピー（大きなファイルのチャンク単位のコピー）"""
+        self.throttle(ops=1, cancel=cancel)
+        with open(src, "rb") as fsrc, open(dst, "r+b") as fdst:
+            fsrc.seek(offset)
+            fdst.seek(offset)
+            self.copy_stream(fsrc, fdst, length, cancel=cancel)
+            if self.drop_cache:
+                _fadvise(fsrc.fileno(), offset, length, "POSIX_FADV_DONTNEED")
+
+    def extract_member(self, zip_ref, info, dest_dir, cancel=None):
+        """ZIPのメンバーを1つ展開（パスの扱いはZipFile.extractと同じ）"""
+        target = member_path(info.filename, dest_dir)
+        self.throttle(ops=1, cancel=cancel)
+        if info.is_dir():
+            os.makedirs(target, exist_ok=True)
+            return target
+        parent = os.path.dirname(target)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with zip_ref.open(info) as fsrc, open(target, "wb") as fdst:
+            self.copy_stream(fsrc, fdst, cancel=cancel)
+        return target
+
+
+def _fileno(f):
+    try:
+        return f.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def member_path(filename: str, dest_dir) -> str:
+    """ZIPのメンバー名から展開先のパスを作成（ZipFile._extract_memberと同じ正規化）"""
+    arcname = filename.replace("/", os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    parts = [x for x in arcname.split(os.path.sep) if x not in ("", os.path.curdir, os.path.pardir)]
+    if os.path.sep == "\\":
+        # Windowsで使えない文字を置き換え、末尾のピリオドを除く
+        table = str.maketrans(':<>|"?*', "_______")
+        parts = [x.translate(table).rstrip(".") for x in parts]
+        parts = [x for x in parts if x]
+    return os.path.join(str(dest_dir), *parts)
+
+
+def get_io_governor(background: bool = False, limit=None, ops: int = None):
+    """config.yamlのioと指定からIOGovernorを作成（制限がない場合はNone）
+
+    background: config.yamlのio.backgroundの上限を使い、ページキャッシュを汚さない
+    limit / ops: 指定した場合はconfig.yamlより優先
+    """
+    config = load_config()["io"]
+    section = dict(config)
+    if background:
+        section.update(config.get("background") or {})
+    bytes_per_second = parse_rate(limit if limit is not None else section.get("limit"))
+    ops_per_second = int(ops if ops is not None else section.get("ops") or 0)
+    if not (bytes_per_second or ops_per_second or background):
+        return None
+    return IOGovernor(
+        bytes_per_second,
+        ops_per_second,
+        drop_cache=background,
+        workers=section.get("workers") if background else None,
+    )
@@ -0,0 +1,541 @@
+#!/usr/bin/env python3
+"""
+展開・復元のジャーナル（先行書き込みログ）
+作業の計画を先に記録し、完了したメンバー・ファイルを追記していく。
+プロセスが途中で終了した場合は次回の起動時に続きから再開するか、元の状態に戻す。
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from tmodloader_installer.core.cancel import check_cancelled
+from tmodloader_installer.core.io_governor import member_path
+from tmodloader_installer.utils.constants import INSTALLED_MARKER_NAME
+from tmodloader_installer.utils.helpers import get_app_base_path
+
+# 追記したレコードをディスクに確定させる間隔（秒）
+SYNC_INTERVAL = 0.5
+
+
+def journal_dir() -> Path:
+    """ジャーナルの保存先"""
+    return get_app_base_path() / "journal"
+
+
+def pending_journals():
+    """完了していないジャーナルのパス（古い順）"""
+    directory = journal_dir()
+    if not directory.is_dir():
+        return []
+    return sorted(directory.glob("*.jsonl"))
+
+
+class Journal:
+    """追記型のジャーナル（1行1レコードのJSON、先頭行が作業の計画）"""
+
+    def __init__(self, path, header, records=None):
+        self.path = Path(path)
+        self.header = header
+        self.records = list(records or [])
+        self._file = None
+        self._lock = threading.Lock()
+        self._synced_at = 0.0
+
+    @classmethod
+    def create(cls, job: str, **plan):
+        """計画を記録してジャーナルを作成（計画はディスクに確定してから返す）"""
+        directory = journal_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        journal_id = f"{job}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        header = {"job": job, "id": journal_id, "started_at": datetime.now().isoformat()}
+        header.update(plan)
+        journal = cls(directory / f"{journal_id}.jsonl", header)
+        journal._write(header)
+        journal.sync()
+        return journal
+
+    @classmethod
+    def load(cls, path):
+        """ジャーナルを読み込み（書き込み途中で終わった最後の行は無視）"""
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        header = json.loads(lines[0])
+        records = []
+        for line in lines[1:]:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+        return cls(path, header, records)
+
+    def _write(self, record):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        # プロセスが終了しても残るようにOSへ渡す（ディスクへの確定は一定間隔）
+        self._file.flush()
+
+    def append(self, op: str, **fields):
+        """レコードを追記"""
+        record = {"op": op}
+        record.update(fields)
+        with self._lock:
+            self.records.append(record)
+            self._write(record)
+            if time.monotonic() - self._synced_at >= SYNC_INTERVAL:
+                self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._synced_at = time.monotonic()
+
+    def sync(self):
+        """追記したレコードをディスクに確定"""
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+
+    def has(self, op: str) -> bool:
+        return any(record["op"] == op for record in self.records)
+
+    def values(self, op: str, key: str):
+        return [record[key] for record in self.records if record["op"] == op]
+
+    def remove(self):
+        """完了したジャーナルを削除"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        self.path.unlink(missing_ok=True)
+
+
+def _remove_empty_dirs(root: Path):
+    """root以下の空のディレクトリを削除（root自身も空なら削除）"""
+    if not root.is_dir():
+        return
+    for dirpath, _, _ in sorted(os.walk(root), key=lambda item: len(item[0]), reverse=True):
+        try:
+            os.rmdir(dirpath)
+        except OSError:
+            pass
+
+
+class ExtractJob:
+    """ジャーナルに記録しながらZIPのメンバーを順に展開
+
+    in_place: インストール先に直接展開する。既存のファイルは上書きする前に
+        隣の退避用フォルダへ移動しておき、ロールバック時に戻す。
+    in_placeでない場合はステージングディレクトリに展開してからインストール先と入れ替える。
+    cancel: メンバー・チャンクごとに確認するキャンセルの指示（CancelToken）
+    """
+
+    job = "extract"
+
+    def __init__(self, journal: Journal, governor=None, log=print, cancel=None):
+        self.journal = journal
+        header = journal.header
+        self.dest_dir = Path(header["dest_dir"])
+        self.install_path = Path(header["install_path"])
+        self.members = header["members"]
+        self.in_place = header["in_place"]
+        self.aside_dir = Path(header["aside_dir"]) if header.get("aside_dir") else None
+        self.governor = governor
+        self.log = log
+        self.cancel = cancel
+        self._done = set(journal.values("done", "i"))
+        self._begun = set(journal.values("begin", "name"))
+
+    @classmethod
+    def start(
+        cls,
+        archive,
+        dest_dir,
+        install_path,
+        members,
+        in_place: bool,
+        tag: str = None,
+        delete_archive: bool = False,
+        skip=None,
+        governor=None,
+        log=print,
+        cancel=None,
+    ):
+        """計画（展開するメンバーの一覧など）を記録してジョブを作成
+
+        archive: 展開元のZIPファイルのパス（メモリ上のバッファの場合はNoneで、再開できない）
+        skip: ステージングの場合に既存のインストール先から引き継がないファイルの相対パス
+            （以前のバージョンのファイル・差分で削除されたファイルなど）
+        """
+        dest_dir = Path(dest_dir)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        journal = Journal.create(
+            cls.job,
+            archive=str(archive) if archive else None,
+            delete_archive=delete_archive,
+            dest_dir=str(dest_dir),
+            install_path=str(install_path),
+            members=[info.filename for info in members],
+            in_place=in_place,
+            aside_dir=str(dest_dir.with_name(f"{dest_dir.name}.journal_{stamp}"))
+            if in_place
+            else None,
+            tag=tag,
+            skip=sorted(skip or ()),
+        )
+        return cls(journal, governor, log, cancel)
+
+    @property
+    def can_resume(self):
+        """展開元が残っていれば再開できる"""
+        archive = self.journal.header.get("archive")
+        return self.journal.has("extracted") or bool(archive and Path(archive).is_file())
+
+    def _begin(self, name: str, is_dir: bool = False):
+        """メンバーを書き込む前に記録し、既存のファイルを退避"""
+        target = Path(member_path(name, self.dest_dir))
+        if name in self._begun:
+            # 再開時: インストール先にあるのは書き込み途中のファイル（元のファイルは退避済み）
+            return target
+        # 新たに作成することになる最上位のディレクトリ（ロールバック時に削除）
+        created_dir = None
+        check = target if is_dir else target.parent
+        if not check.exists():
+            created_dir = check
+            while not created_dir.parent.exists():
+                created_dir = created_dir.parent
+        elif is_dir:
+            return target
+        existed = not is_dir and target.is_file()
+        self.journal.append(
+            "begin",
+            name=name,
+            existed=existed,
+            created_dir=str(created_dir) if created_dir else None,
+        )
+        self._begun.add(name)
+        if existed:
+            aside = Path(member_path(name, self.aside_dir))
+            aside.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(target, aside)
+        return target
+
+    def run(self, zip_ref):
+        """未完了のメンバーを順に展開"""
+        infos = {info.filename: info for info in zip_ref.infolist()}
+        for index, name in enumerate(self.members):
+            if index in self._done:
+                continue
+            check_cancelled(self.cancel)
+            info = infos[name]
+            if self.in_place:
+                self._begin(name, info.is_dir())
+            if self.governor:
+                self.governor.extract_member(zip_ref, info, self.dest_dir, self.cancel)
+            else:
+                zip_ref.extract(info, self.dest_dir)
+            self.journal.append("done", i=index)
+            self._done.add(index)
+        self.journal.append("extracted")
+        self.journal.sync()
+
+    def copy_from(self, source_dir, copier, move: bool = False):
+        """展開済みのツリーをステージングにコピー（複数のインストール先への配置など）
+
+        展開元のアーカイブを記録しないため、コピー中に中断された場合は再開せずに元に戻す。
+        move: 同じファイルシステムならフォルダ名の変更だけで移す（できない場合はコピー）
+        戻り値: CopyProgress（移した場合はNone）
+        """
+        if move:
+            try:
+                os.rename(source_dir, self.dest_dir)
+            except OSError:
+                # 別のファイルシステムの場合はコピー
+                move = False
+        progress = None if move else copier.copy_tree(source_dir, self.dest_dir)
+        self.journal.append("extracted")
+        self.journal.sync()
+        return progress
+
+    def _write_marker(self, target_dir: Path):
+        from tmodloader_installer.core.installer import write_installed_marker
+
+        tag = self.journal.header.get("tag")
+        if not tag:
+            return
+        if self.in_place:
+            self._begin(INSTALLED_MARKER_NAME)
+        write_installed_marker(target_dir, tag)
+
+    def finish(self):
+        """バージョンを記録し、ステージングの場合はインストール先と入れ替えて確定"""
+        from tmodloader_installer.core.staging import link_missing_files, swap_directories
+
+        previous = None
+        if self.in_place:
+            self._write_marker(self.install_path)
+        else:
+            if not self.journal.has("swapped"):
+                # リリースに含まれないファイル（ユーザーデータなど）を引き継ぐ
+                if self.dest_dir.exists() and self.install_path.exists():
+                    linked = link_missing_files(
+                        self.install_path, self.dest_dir, skip=set(self.journal.header.get("skip") or ())
+                    )
+                    self.log(f"既存のファイルを引き継ぎました: {linked}個")
+                if self.dest_dir.exists():
+                    self._write_marker(self.dest_dir)
+            previous = self._swap(swap_directories)
+            self.log("インストール先を切り替えました")
+
+        self.journal.append("committed")
+        self.journal.sync()
+        self._cleanup(previous)
+
+    def _swap(self, swap_directories):
+        """ジャーナルに退避先を記録してから入れ替え（中断された場合は続きから）"""
+        previous = next(iter(self.journal.values("swap", "previous")), None)
+        if previous is None:
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            previous = str(self.install_path.with_name(f"{self.install_path.name}.old_{stamp}"))
+            self.journal.append("swap", previous=previous)
+            self.journal.sync()
+        if not self.journal.has("swapped"):
+            if self.dest_dir.exists():
+                swap_directories(self.dest_dir, self.install_path, Path(previous))
+            self.journal.append("swapped")
+            self.journal.sync()
+        return Path(previous)
+
+    def _cleanup(self, previous=None):
+        """確定後の後片付け（旧インストール先・退避したファイル・一時ファイル・ジャーナル）"""
+        if previous is not None:
+            shutil.rmtree(previous, ignore_errors=True)
+        if self.aside_dir is not None:
+            shutil.rmtree(self.aside_dir, ignore_errors=True)
+        archive = self.journal.header.get("archive")
+        if self.journal.header.get("delete_archive") and archive:
+            from tmodloader_installer.core.shared_download import discard_unused
+
+            # 他のプロセスが使っているダウンロードは残す（最後に参照を外したプロセスが削除）
+            discard_unused(archive)
+        self.journal.remove()
+
+    def resume(self):
+        """中断された展開を続きから実行して確定"""
+        import zipfile
+
+        if self.journal.has("committed"):
+            previous = next(iter(self.journal.values("swap", "previous")), None)
+            self._cleanup(Path(previous) if previous else None)
+            return
+        if not self.journal.has("extracted"):
+            self.log(f"展開を再開します: {len(self._done)}/{len(self.members)} 完了")
+            with zipfile.ZipFile(self.journal.header["archive"], "r") as zip_ref:
+                self.run(zip_ref)
+        self.finish()
+
+    def rollback(self):
+        """展開前の状態に戻す（書き込んだファイルを削除し、退避したファイルを戻す）"""
+        if self.journal.has("committed"):
+            # 確定済みの場合は後片付けだけを行う
+            return self.resume()
+
+        if not self.in_place:
+            self._rollback_staged()
+        else:
+            begun = [r for r in self.journal.records if r["op"] == "begin"]
+            for record in reversed(begun):
+                target = Path(member_path(record["name"], self.dest_dir))
+                aside = Path(member_path(record["name"], self.aside_dir))
+                if record["existed"]:
+                    if aside.exists():
+                        os.replace(aside, target)
+                elif target.is_file():
+                    target.unlink()
+            for record in reversed(begun):
+                if record["created_dir"]:
+                    _remove_empty_dirs(Path(record["created_dir"]))
+            if self.aside_dir is not None:
+                shutil.rmtree(self.aside_dir, ignore_errors=True)
+
+        self.log(f"展開を取り消しました: {self.install_path}")
+        self.journal.remove()
+
+    def _rollback_staged(self):
+        """ステージングへの展開・入れ替えを取り消す"""
+        previous = next(iter(self.journal.values("swap", "previous")), None)
+        previous = Path(previous) if previous else None
+        if previous is not None and previous.exists():
+            if self.install_path.exists():
+                # 入れ替え済み: 新しいツリーをステージングに戻してから旧インストール先を戻す
+                if self.dest_dir.exists():
+                    shutil.rmtree(self.dest_dir)
+                os.rename(self.install_path, self.dest_dir)
+            os.rename(previous, self.install_path)
+        elif self.journal.has("swapped") and self.install_path.exists():
+            # 新規インストールの入れ替え済み
+            os.rename(self.install_path, self.dest_dir)
+        shutil.rmtree(self.dest_dir, ignore_errors=True)
+
+
+class RestoreJob:
+    """ジャーナルに記録しながらバックアップから復元
+
+    置き換える対象のフォルダは削除せずに隣へ退避してからコピーし、
+    完了後に退避したフォルダを削除する。中断時は退避したフォルダを戻せる。
+    """
+
+    job = "restore"
+
+    def __init__(self, journal: Journal, governor=None, log=print):
+        self.journal = journal
+        header = journal.header
+        self.backup_path = Path(header["backup_path"])
+        self.install_path = Path(header["install_path"])
+        self.targets = header["targets"]
+        self.governor = governor
+        self.log = log
+
+    @classmethod
+    def start(cls, backup_path, install_path, targets, governor=None, log=print):
+        """計画（置き換える対象のフォルダと退避先）を記録してジョブを作成"""
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        plan = []
+        for target in targets:
+            target = Path(target)
+            plan.append(
+                {
+                    "path": str(target),
+                    "aside": str(target.with_name(f"{target.name}.restore_{stamp}")),
+                    "existed": target.exists(),
+                }
+            )
+        journal = Journal.create(
+            cls.job,
+            backup_path=str(backup_path),
+            install_path=str(install_path),
+            targets=plan,
+        )
+        return cls(journal, governor, log)
+
+    @property
+    def can_resume(self):
+        return self.backup_path.is_dir()
+
+    def run(self, workers=None, progress_callback=None, include_file=None, cancel=None):
+        """対象フォルダを退避してから、未完了のファイルをコピー（戻り値: CopyProgress）"""
+        from tmodloader_installer.core.copy_engine import ParallelCopier
+
+        moved = set(self.journal.values("moved", "i"))
+        for index, target in enumerate(self.targets):
+            path, aside = Path(target["path"]), Path(target["aside"])
+            if index in moved or not target["existed"]:
+                continue
+            if path.exists() and not aside.exists():
+                os.rename(path, aside)
+            self.journal.append("moved", i=index)
+        self.journal.sync()
+
+        copied = set(self.journal.values("copied", "path"))
+
+        def include(rel_path):
+            if rel_path in copied:
+                return False
+            return include_file(rel_path) if include_file else True
+
+        copier = ParallelCopier(
+            workers=workers,
+            progress_callback=progress_callback,
+            governor=self.governor,
+            cancel=cancel,
+        )
+        progress = copier.copy_tree(
+            self.backup_path,
+            self.install_path,
+            include_file=include,
+            dirs_exist_ok=True,
+            file_callback=lambda rel_path: self.journal.append("copied", path=rel_path),
+        )
+        self.journal.append("committed")
+        self.journal.sync()
+        self._cleanup()
+        return progress
+
+    def _cleanup(self):
+        for target in self.targets:
+            shutil.rmtree(target["aside"], ignore_errors=True)
+        self.journal.remove()
+
+    def resume(self):
+        """中断された復元を続きから実行して確定"""
+        from tmodloader_installer.core.backup import BACKUP_INFO_NAME
+
+        if self.journal.has("committed"):
+            return self._cleanup()
+        done = len(self.journal.values("copied", "path"))
+        self.log(f"復元を再開します: {done}ファイル完了済み")
+        self.run(include_file=lambda rel_path: rel_path != BACKUP_INFO_NAME)
+
+    def rollback(self):
+        """復元前の状態に戻す（コピーしたフォルダを削除し、退避したフォルダを戻す）"""
+        if self.journal.has("committed"):
+            return self._cleanup()
+        for target in reversed(self.targets):
+            path, aside = Path(target["path"]), Path(target["aside"])
+            if target["existed"]:
+                if aside.exists():
+                    if path.exists():
+                        shutil.rmtree(path)
+                    os.rename(aside, path)
+            elif path.exists():
+                shutil.rmtree(path)
+        self.log(f"復元を取り消しました: {self.install_path}")
+        self.journal.remove()
+
+
+JOBS = {ExtractJob.job: ExtractJob, RestoreJob.job: RestoreJob}
+
+
+def load_job(path, governor=None, log=print):
+    """ジャーナルから中断された作業を復元"""
+    journal = Journal.load(path)
+    return JOBS[journal.header["job"]](journal, governor, log)
+
+
+def recover_jobs(mode: str = "resume", governor=None, log=print):
+    """中断された作業を再開（mode="rollback"の場合は元に戻す）
+
+    再開できない作業（展開元が残っていないなど）は元に戻す。
+    インストール先のロックを他のプロセスが保持している作業は実行中なので触らない。
+    戻り値: 処理した作業の数
+    """
+    from tmodloader_installer.core.scheduler import install_lock
+
+    paths = pending_journals()
+    handled = 0
+    for path in paths:
+        try:
+            job = load_job(path, governor, log)
+        except (OSError, ValueError, IndexError, KeyError) as e:
+            log(f"ジャーナルを読み込めません: {path} ({e})")
+            continue
+        header = job.journal.header
+        lock = install_lock(header["install_path"], f"{header['job']}の再開")
+        if not lock.try_acquire():
+            continue
+        try:
+            log(f"中断された作業があります: {header['job']} {header['install_path']}（{header['started_at']}）")
+            if mode == "rollback" or not job.can_resume:
+                job.rollback()
+            else:
+                job.resume()
+            handled += 1
+        finally:
+            lock.release()
+    return handled
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Modsフォルダの同期
+.tmodファイルのハッシュと有効状態を記録したマニフェストに従って、
+足りない・内容が異なるModだけをディレクトリまたはミラーから取得し、enable.jsonを更新する
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+from tmodloader_installer.core.bandwidth import get_limiter
+from tmodloader_installer.core.release_source import local_asset_path
+from tmodloader_installer.utils.constants import DEFAULT_COPY_WORKERS
+
+# Mod一覧のマニフェストのファイル名
+MODS_MANIFEST_NAME = "mods_manifest.json"
+
+# tModLoaderが有効なModを記録するファイル
+ENABLE_FILE_NAME = "enable.json"
+
+MOD_EXTENSION = ".tmod"
+
+# ハッシュ計算・転送の読み込み単位
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path):
+    """ファイルのSHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_mods(mods_dir, workers: int = None):
+    """Modsフォルダ内の.tmodファイルを並列にハッシュ化
+
+    戻り値: {ファイル名: (sha256, サイズ)}
+    """
+    mods_dir = Path(mods_dir)
+    if not mods_dir.is_dir():
+        return {}
+    files = [
+        Path(entry.path)
+        for entry in os.scandir(mods_dir)
+        if entry.is_file() and entry.name.endswith(MOD_EXTENSION)
+    ]
+    with ThreadPoolExecutor(max_workers=workers or DEFAULT_COPY_WORKERS) as executor:
+        digests = list(executor.map(hash_file, files))
+    return {
+        path.name: (digest, path.stat().st_size) for path, digest in zip(files, digests)
+    }
+
+
+def check_mod_file_name(file_name):
+    """マニフェストのファイル名がModsフォルダ直下の.tmodファイルを指すか確認
+
+    区切り文字・「..」・ドライブ指定を含む名前はModsフォルダの外に書き込めるため拒否する
+    """
+    if (
+        not isinstance(file_name, str)
+        or not file_name.endswith(MOD_EXTENSION)
+        or file_name in (MOD_EXTENSION, "." + MOD_EXTENSION)
+        or "/" in file_name
+        or "\\" in file_name
+        or ":" in file_name
+        or "\0" in file_name
+        or file_name.startswith("..")
+    ):
+        raise ValueError(f"不正なModファイル名です: {file_name!r}")
+    return file_name
+
+
+def read_enabled(mods_dir):
+    """enable.jsonから有効なMod名の一覧を読み込み"""
+    try:
+        with open(Path(mods_dir) / ENABLE_FILE_NAME, "r", encoding="utf-8") as f:
+            return list(json.load(f))
+    except (OSError, json.JSONDecodeError, TypeError):
+        return []
+
+
+def write_enabled(mods_dir, names):
+    """enable.jsonを更新（一時ファイル経由で置き換え）"""
+    enable_file = Path(mods_dir) / ENABLE_FILE_NAME
+    temp_file = enable_file.with_suffix(".tmp")
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(list(names), f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, enable_file)
+
+
+def build_manifest(mods_dir, workers: int = None):
+    """現在のModsフォルダからマニフェストを作成"""
+    enabled = set(read_enabled(mods_dir))
+    mods = []
+    for file_name, (digest, size) in sorted(hash_mods(mods_dir, workers).items()):
+        name = file_name[: -len(MOD_EXTENSION)]
+        mods.append(
+            {
+                "name": name,
+                "file": file_name,
+                "sha256": digest,
+                "size": size,
+                "enabled": name in enabled,
+            }
+        )
+    return {"mods": mods}
+
+
+def publish_mods(mods_dir, output_dir, workers: int = None):
+    """Modsフォルダを同期元として使えるディレクトリに書き出す（マニフェストと.tmodファイル）"""
+    mods_dir = Path(mods_dir)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest = build_manifest(mods_dir, workers)
+    for mod in manifest["mods"]:
+        target = output_dir / mod["file"]
+        if not target.exists() or hash_file(target) != mod["sha256"]:
+            shutil.copy2(mods_dir / mod["file"], target)
+
+    manifest_path = output_dir / MODS_MANIFEST_NAME
+    temp_path = manifest_path.with_suffix(".tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, manifest_path)
+    return manifest
+
+
+class ModSyncer:
+    """マニフェストに従ってModsフォルダを同期
+
+    source: マニフェストと.tmodファイルを置いたディレクトリ・file:// またはhttp(s)://のURL
+    """
+
+    def __init__(self, mods_dir, source: str, workers: int = None, prune: bool = False, log=print):
+        self.mods_dir = Path(mods_dir)
+        self.source = source
+        self.workers = workers or DEFAULT_COPY_WORKERS
+        self.prune = prune
+        self.log = log
+
+        local_path = local_asset_path(source)
+        if local_path is None and urlparse(source).scheme not in ("http", "https"):
+            local_path = Path(source)
+        self.local_dir = local_path
+        self.base_url = None if local_path else (source if source.endswith("/") else source + "/")
+
+    def load_manifest(self):
+        """同期元のマニフェストを読み込み"""
+        if self.local_dir is not None:
+            with open(self.local_dir / MODS_MANIFEST_NAME, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        import requests
+
+        response = requests.get(urljoin(self.base_url, MODS_MANIFEST_NAME), timeout=30)
+        response.raise_for_status()
+        return response.json()
+
+    def plan(self, manifest=None):
+        """取得・削除が必要なModを調べる
+
+        戻り値: (取得するModのリスト, 一致しているModのリスト, マニフェストにない.tmodファイル名のリスト)
+        """
+        manifest = manifest or self.load_manifest()
+        for mod in manifest["mods"]:
+            check_mod_file_name(mod.get("file"))
+        local = hash_mods(self.mods_dir, self.workers)
+
+        fetch, unchanged = [], []
+        for mod in manifest["mods"]:
+            current = local.get(mod["file"])
+            if current and current[0] == mod["sha256"]:
+                unchanged.append(mod)
+            else:
+                fetch.append(mod)
+        wanted = {mod["file"] for mod in manifest["mods"]}
+        extra = sorted(name for name in local if name not in wanted)
+        return fetch, unchanged, extra
+
+    def _fetch(self, mod):
+        """Modを一時ファイルに取得し、ハッシュを確認してから置き換え"""
+        target = self.mods_dir / check_mod_file_name(mod["file"])
+        temp_file = target.with_name(target.name + ".part")
+        digest = hashlib.sha256()
+
+        try:
+            with open(temp_file, "wb") as dst:
+                if self.local_dir is not None:
+                    with open(self.local_dir / mod["file"], "rb") as src:
+                        for chunk in iter(lambda: src.read(HASH_CHUNK_SIZE), b""):
+                            digest.update(chunk)
+                            dst.write(chunk)
+                else:
+                    import requests
+
+                    url = urljoin(self.base_url, mod["file"])
+                    with requests.get(url, stream=True, timeout=30) as response:
+                        response.raise_for_status()
+                        chunks = response.iter_content(chunk_size=HASH_CHUNK_SIZE)
+                        for chunk in get_limiter().throttle(chunks):
+                            digest.update(chunk)
+                            dst.write(chunk)
+
+            if digest.hexdigest() != mod["sha256"]:
+                raise ValueError(f"ハッシュが一致しません: {mod['file']}")
+            os.replace(temp_file, target)
+        finally:
+            if temp_file.exists():
+                temp_file.unlink()
+        return mod
+
+    def sync(self, dry_run: bool = False):
+        """同期を実行
+
+        戻り値: (取得したModのリスト, 削除したファイル名のリスト)
+        """
+        manifest = self.load_manifest()
+        fetch, unchanged, extra = self.plan(manifest)
+        self.log(
+            f"Mod: 取得 {len(fetch)} 件 / 一致 {len(unchanged)} 件 / 一覧にない {len(extra)} 件"
+        )
+        if dry_run:
+            for mod in fetch:
+                self.log(f"  取得予定: {mod['file']}")
+            return fetch, extra if self.prune else []
+
+        self.mods_dir.mkdir(parents=True, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for mod in executor.map(self._fetch, fetch):
+                self.log(f"  取得: {mod['file']}")
+
+        removed = []
+        if self.prune:
+            for file_name in extra:
+                (self.mods_dir / file_name).unlink()
+                removed.append(file_name)
+                self.log(f"  削除: {file_name}")
+
+        # 全てのModが揃ってからenable.jsonを切り替える
+        enabled = [mod["name"] for mod in manifest["mods"] if mod.get("enabled")]
+        write_enabled(self.mods_dir, enabled)
+        self.log(f"enable.jsonを更新しました（有効 {len(enabled)} 件）")
+        return fetch, removed
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+複数インストール先への一括インストール
+1回のダウンロード・展開結果を複数のインストール先へ並列に配置する。
+各インストール先にはステージングで組み立ててからフォルダ名の変更で切り替える。
+"""
+
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from tmodloader_installer.core.cancel import OperationCancelled, check_cancelled
+from tmodloader_installer.core.copy_engine import ParallelCopier
+from tmodloader_installer.core.installer import SimpleInstaller
+from tmodloader_installer.core.planner import tree_size
+from tmodloader_installer.core.staging import staging_path
+from tmodloader_installer.utils.helpers import get_app_base_path
+
+
+class TargetResult:
+    """インストール先ごとの結果"""
+
+    def __init__(self, install_path):
+        self.install_path = Path(install_path)
+        self.status = "pending"
+        self.backup_path = None
+        self.error = None
+        # フェーズごとの所要時間（秒）と処理したバイト数
+        self.timings = {}
+        self.sizes = {}
+
+    @property
+    def succeeded(self):
+        return self.status == "success"
+
+
+class MultiTargetInstaller:
+    """複数のインストール先にまとめてインストールするインストーラー"""
+
+    def __init__(
+        self,
+        github_url: str,
+        install_paths,
+        max_workers: int = None,
+        use_cache: bool = False,
+        spool_threshold: int = None,
+        backup_profile: str = None,
+        extract_filter=None,
+        copy_workers: int = None,
+        release_source=None,
+        io_governor=None,
+        log=print,
+        cancel=None,
+    ):
+        if not install_paths:
+            raise ValueError("インストール先パスが指定されていません")
+
+        self.github_url = github_url
+        self.install_paths = [Path(p) for p in install_paths]
+        self.max_workers = max_workers or len(self.install_paths)
+        self.log = log
+        self.results = [TargetResult(p) for p in self.install_paths]
+        self.backup_profile = backup_profile
+        self.copy_workers = copy_workers
+        self.io_governor = io_governor
+        # キャンセルの指示（CancelToken、配置済みのインストール先はバックアップを残す）
+        self.cancel = cancel
+        # 全体のフェーズごとの所要時間（秒）と処理したバイト数
+        self.timings = {}
+        self.sizes = {}
+
+        # リリース情報の解決は1回だけ
+        start = time.perf_counter()
+        self.installer = SimpleInstaller(
+            github_url,
+            str(self.install_paths[0]),
+            use_cache=use_cache,
+            spool_threshold=spool_threshold,
+            extract_filter=extract_filter,
+            release_source=release_source,
+            io_governor=io_governor,
+            cancel=cancel,
+        )
+        self.download_url = self.installer.download_url
+        self.timings["resolve"] = time.perf_counter() - start
+
+    def reserve_download(self):
+        """共有するダウンロードに先に参照を登録（同時実行数の枠を待つ前に呼ぶ）"""
+        self.installer.reserve_download()
+
+    def _archive_size(self):
+        """ダウンロードしたアーカイブのサイズ（メモリ上のバッファの場合はその長さ）"""
+        buffer = self.installer.archive_buffer
+        if buffer is not None:
+            position = buffer.tell()
+            buffer.seek(0, os.SEEK_END)
+            size = buffer.tell()
+            buffer.seek(position)
+            return size
+        return os.path.getsize(self.installer.temp_file)
+
+    def _stage_dir(self):
+        """展開済みファイルを置く一時ディレクトリ（同時に実行している他のプロセスとは別）"""
+        return get_app_base_path() / "downloads" / f"tModLoader_staged_{os.getpid()}"
+
+    def _extract_once(self):
+        """ダウンロードしたZIPを一時ディレクトリに1回だけ展開"""
+        stage_dir = self._stage_dir()
+        if stage_dir.exists():
+            shutil.rmtree(stage_dir)
+        stage_dir.mkdir(parents=True)
+
+        try:
+            self.installer._extract_archive(stage_dir)
+        except OperationCancelled:
+            shutil.rmtree(stage_dir, ignore_errors=True)
+            raise
+        finally:
+            self.installer._cleanup_archive()
+        return stage_dir
+
+    def _install_target(self, index, result, stage_dir):
+        """1つのインストール先にバックアップと配置を実行"""
+        total_start = time.perf_counter()
+        result.status = "running"
+        try:
+            target = SimpleInstaller(
+                self.github_url,
+                str(result.install_path),
+                download_url=self.download_url,
+                backup_profile=self.backup_profile,
+                copy_workers=self.copy_workers,
+                io_governor=self.io_governor,
+                cancel=self.cancel,
+            )
+            target.release_tag = self.installer.release_tag
+
+            start = time.perf_counter()
+            suffix = f"{index + 1}_{re.sub(r'[^0-9A-Za-z_-]', '_', result.install_path.name)}"
+            result.backup_path = target.create_backup(suffix=suffix)
+            result.timings["backup"] = time.perf_counter() - start
+            if result.backup_path:
+                result.sizes["backup"] = tree_size(result.backup_path)
+
+            start = time.perf_counter()
+            progress = self._deploy(result.install_path, stage_dir)
+            result.timings["copy"] = time.perf_counter() - start
+            result.sizes["copy"] = progress.bytes_done
+
+            result.status = "success"
+            self.log(f"[{result.install_path}] インストール完了")
+        except OperationCancelled:
+            # 配置はステージングで取り消し済みなので、この実行で作成したバックアップも削除
+            if result.backup_path:
+                target.discard_backup(result.backup_path)
+                result.backup_path = None
+            result.status = "cancelled"
+            self.log(f"[{result.install_path}] キャンセルしました")
+        except Exception as e:
+            result.status = "error"
+            result.error = e
+            self.log(f"[{result.install_path}] エラー: {e}")
+        finally:
+            result.timings["total"] = time.perf_counter() - total_start
+
+        return result
+
+    def _deploy(self, install_path, stage_dir):
+        """展開済みのツリーをステージングにコピーしてからインストール先と入れ替え
+
+        ジャーナルに記録するため、中断された場合も次回の起動時に元に戻すか確定できる。
+        """
+        from tmodloader_installer.core.journal import ExtractJob
+
+        staging_dir = staging_path(install_path)
+        if staging_dir.exists():
+            shutil.rmtree(staging_dir)
+        job = ExtractJob.start(
+            archive=None,
+            dest_dir=staging_dir,
+            install_path=install_path,
+            # 展開済みのツリーからコピーするためメンバーの一覧は記録しない
+            members=[],
+            in_place=False,
+            tag=self.installer.release_tag,
+            governor=self.io_governor,
+            log=lambda message: self.log(f"[{install_path}] {message}"),
+            cancel=self.cancel,
+        )
+        try:
+            # I/Oの制限は全てのインストール先で共有
+            progress = job.copy_from(
+                stage_dir,
+                ParallelCopier(
+                    workers=self.copy_workers, governor=self.io_governor, cancel=self.cancel
+                ),
+            )
+            job.finish()
+        except Exception:
+            job.rollback()
+            raise
+        return progress
+
+    def download_and_install(self):
+        """1回ダウンロード・展開して全インストール先に配置"""
+        started_at = time.time()
+        total_start = time.perf_counter()
+
+        # 1. ダウンロード（1回のみ）
+        self.log(f"ダウンロード中: {self.download_url}")
+        start = time.perf_counter()
+        try:
+            self.installer._download_file()
+        except BaseException:
+            # 予約した参照を外す（展開後は_extract_onceが外す）
+            self.installer._cleanup_archive()
+            raise
+        self.timings["download"] = time.perf_counter() - start
+        self.sizes["download"] = self._archive_size()
+        self.log("ダウンロード完了")
+
+        # 2. 展開（1回のみ）
+        self.log("展開中...")
+        start = time.perf_counter()
+        stage_dir = self._extract_once()
+        self.timings["extract"] = time.perf_counter() - start
+        # 展開したメンバーのfile_sizeの合計と同じ
+        self.sizes["extract"] = tree_size(stage_dir)
+
+        # 3. 各インストール先へ並列に配置
+        self.log(f"{len(self.results)}個のインストール先に配置中...")
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(self._install_target, i, result, stage_dir)
+                    for i, result in enumerate(self.results)
+                ]
+                for future in futures:
+                    future.result()
+        finally:
+            shutil.rmtree(stage_dir, ignore_errors=True)
+        self.timings["fanout"] = time.perf_counter() - start
+
+        self.timings["total"] = time.perf_counter() - total_start + self.timings["resolve"]
+        self._record_history(started_at)
+        check_cancelled(self.cancel)
+        return self.results
+
+    def _record_history(self, started_at: float):
+        """インストール先ごとの結果を履歴に記録（ダウンロード・展開は共通のフェーズ）"""
+        import sqlite3
+
+        from tmodloader_installer.core.history import HistoryStore
+
+        shared = [
+            (phase, self.timings[phase], self.sizes.get(phase, 0))
+            for phase in ("download", "extract")
+            if phase in self.timings
+        ]
+        store = HistoryStore()
+        for result in self.results:
+            phases = shared + [
+                (phase, seconds, result.sizes.get(phase, 0))
+                for phase, seconds in result.timings.items()
+                if phase != "total"
+            ]
+            outcome = result.status if result.status in ("success", "cancelled") else "error"
+            try:
+                store.add(
+                    "install",
+                    started_at,
+                    sum(seconds for _, seconds, _ in phases),
+                    outcome,
+                    phases=phases,
+                    install_path=result.install_path,
+                    version=self.installer.release_tag,
+                    nbytes=sum(size for _, _, size in phases),
+                    error=str(result.error) if result.error else None,
+                )
+            except (sqlite3.Error, OSError):
+                pass
+
+    def summary_lines(self):
+        """集計結果と各インストール先の結果を表示用の行に整形"""
+        lines = ["=== 所要時間 ==="]
+        for phase in ("resolve", "download", "extract", "fanout", "total"):
+            if phase in self.timings:
+                lines.append(f"  {phase}: {self.timings[phase]:.2f}秒")
+
+        succeeded = sum(1 for r in self.results if r.succeeded)
+        lines.append(f"=== インストール先 ({succeeded}/{len(self.results)} 成功) ===")
+        for result in self.results:
+            detail = ", ".join(
+                f"{phase} {seconds:.2f}秒" for phase, seconds in result.timings.items()
+            )
+            lines.append(f"  [{result.status}] {result.install_path} ({detail})")
+            if result.backup_path:
+                lines.append(f"      バックアップ: {result.backup_path}")
+            if result.error:
+                lines.append(f"      エラー: {result.error}")
+        return lines
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+インストールの事前確認（ドライラン）
+ZIPのセントラルディレクトリと現在のインストール先を調べて、
+ダウンロード・バックアップ・書き込みの容量と所要時間を見積もる
+"""
+
+import io
+import json
+import os
+import shutil
+import zipfile
+from pathlib import Path
+
+from tmodloader_installer.core.file_lock import FileLock
+from tmodloader_installer.utils.helpers import format_size, get_app_base_path
+
+# Rangeリクエスト1回あたりの最小取得サイズ
+RANGE_READ_AHEAD = 64 * 1024
+
+# スループットの平滑化係数（新しい測定値の重み）
+THROUGHPUT_WEIGHT = 0.3
+
+# スループットの記録を待つ上限（秒、LockTimeoutはOSErrorとして無視する）
+THROUGHPUT_LOCK_TIMEOUT = 5
+
+
+class HttpRangeFile(io.RawIOBase):
+    """HTTPのRangeリクエストで必要な部分だけを読む読み取り専用ファイル"""
+
+    def __init__(self, url: str, session=None):
+        if session is None:
+            import requests
+
+            session = requests.Session()
+        self.session = session
+        response = self.session.head(url, allow_redirects=True, timeout=30)
+        response.raise_for_status()
+        accept_ranges = response.headers.get("Accept-Ranges")
+        if accept_ranges is not None and accept_ranges.strip().lower() != "bytes":
+            raise ValueError("サーバーがRangeリクエストに対応していません")
+        length = response.headers.get("Content-Length")
+        if length is None or not length.isdigit():
+            raise ValueError("サーバーがファイルサイズ（Content-Length）を返しませんでした")
+        # リダイレクト先のURLを直接使う
+        self.url = response.url
+        self.size = int(length)
+        self.position = 0
+        self._buffer_start = 0
+        self._buffer = b""
+        if accept_ranges is None and self.size > 0:
+            # 対応を明示していないサーバーは、ZIPの末尾（最初に読む部分）を取得して確かめる
+            self._fill(max(self.size - RANGE_READ_AHEAD, 0), self.size)
+
+    def _fill(self, start: int, end: int):
+        """start〜end-1をRangeリクエストで取得してバッファに入れる
+
+        Rangeを無視して全体を返すサーバー・プロキシでは位置がずれるため、
+        206と要求どおりのContent-Rangeを確認する
+        """
+        response = self.session.get(
+            self.url, headers={"Range": f"bytes={start}-{end - 1}"}, timeout=30, stream=True
+        )
+        try:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise ValueError("サーバーがRangeリクエストに対応していません")
+            expected = f"bytes {start}-{end - 1}/"
+            content_range = response.headers.get("Content-Range", "")
+            total = content_range[len(expected) :]
+            if not content_range.startswith(expected) or total not in ("*", str(self.size)):
+                raise ValueError(f"要求と異なる範囲が返されました: {content_range or 'なし'}")
+            data = response.content
+        finally:
+            response.close()
+        if len(data) != end - start:
+            raise ValueError("Rangeリクエストの応答サイズが一致しません")
+        self._buffer_start = start
+        self._buffer = data
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = self.size + offset
+        return self.position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.size - self.position
+        end = min(self.position + size, self.size)
+        if end <= self.position:
+            return b""
+
+        buffer_end = self._buffer_start + len(self._buffer)
+        if not (self._buffer_start <= self.position and end <= buffer_end):
+            fetch_end = min(max(end, self.position + RANGE_READ_AHEAD), self.size)
+            self._fill(self.position, fetch_end)
+
+        offset = self.position - self._buffer_start
+        data = self._buffer[offset : offset + (end - self.position)]
+        self.position += len(data)
+        return data
+
+
+def _throughput_file():
+    return get_app_base_path() / "cache" / "throughput.json"
+
+
+def load_throughput():
+    """記録済みのフェーズごとのスループット（バイト/秒）"""
+    try:
+        with open(_throughput_file(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def record_throughput(phase: str, size: int, seconds: float):
+    """フェーズのスループットを記録（指数移動平均）
+
+    並列のインストールが同時に書き込むため、ロックを取って読み直し、一時ファイル経由で置き換える
+    """
+    if size <= 0 or seconds <= 0:
+        return
+    path = _throughput_file()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lock = FileLock(path.with_name(path.name + ".lock"), "スループットの記録")
+        lock.acquire(timeout=THROUGHPUT_LOCK_TIMEOUT)
+        try:
+            _update_throughput(path, phase, size, seconds)
+        finally:
+            lock.release()
+    except OSError:
+        # 記録できなくても見積もりが不正確になるだけなので処理は続ける
+        pass
+
+
+def _update_throughput(path: Path, phase: str, size: int, seconds: float):
+    stats = load_throughput()
+    measured = size / seconds
+    previous = stats.get(phase)
+    stats[phase] = (
+        measured
+        if previous is None
+        else previous * (1 - THROUGHPUT_WEIGHT) + measured * THROUGHPUT_WEIGHT
+    )
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=2)
+        os.replace(temp_path, path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+
+def _existing_ancestor(path: Path) -> Path:
+    """存在する最も近い親ディレクトリ"""
+    path = Path(path).absolute()
+    while not path.exists() and path != path.parent:
+        path = path.parent
+    return path
+
+
+def tree_size(path: Path, profile=None):
+    """ディレクトリ内のファイルの合計サイズ（プロファイル指定時は対象ファイルのみ）"""
+    total = 0
+    for root, dirs, files in os.walk(path):
+        rel_root = Path(root).relative_to(path).as_posix()
+        if profile is not None:
+            dirs[:] = [
+                d
+                for d in dirs
+                if profile.includes_dir(d if rel_root == "." else f"{rel_root}/{d}")
+            ]
+        for name in files:
+            rel_path = name if rel_root == "." else f"{rel_root}/{name}"
+            if profile is not None and not profile.includes_file(rel_path):
+                continue
+            try:
+                total += os.stat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class InstallPlan:
+    """インストールの見積もり結果"""
+
+    def __init__(self):
+        self.download_bytes = 0
+        self.backup_bytes = 0
+        self.write_bytes = 0
+        self.member_count = 0
+        self.skipped_count = 0
+        # (代表パス, 必要バイト数, 空きバイト数)
+        self.filesystems = []
+        # フェーズごとの見積もり秒数（記録がない場合はNone）
+        self.estimates = {}
+
+    @property
+    def ok(self):
+        """全てのファイルシステムに十分な空き容量があるか"""
+        return all(required <= free for _, required, free in self.filesystems)
+
+    @property
+    def estimated_seconds(self):
+        known = [seconds for seconds in self.estimates.values() if seconds is not None]
+        return sum(known) if known else None
+
+    def lines(self):
+        """表示用の行に整形"""
+        lines = [
+            f"ダウンロード: {format_size(self.download_bytes)}",
+            f"バックアップ: {format_size(self.backup_bytes)}",
+            f"書き込み: {format_size(self.write_bytes)} ({self.member_count}ファイル"
+            + (f"、{self.skipped_count}ファイル除外" if self.skipped_count else "")
+            + ")",
+        ]
+        for path, required, free in self.filesystems:
+            mark = "OK" if required <= free else "容量不足"
+            lines.append(
+                f"空き容量 [{mark}] {path}: 必要 {format_size(required)} / 空き {format_size(free)}"
+            )
+        for phase, seconds in self.estimates.items():
+            estimate = f"{seconds:.0f}秒" if seconds is not None else "不明（実績なし）"
+            lines.append(f"見積もり {phase}: {estimate}")
+        if self.estimated_seconds is not None:
+            lines.append(f"見積もり合計: {self.estimated_seconds:.0f}秒")
+        return lines
+
+
+def plan_install(installer) -> InstallPlan:
+    """SimpleInstallerの設定でインストールした場合の見積もりを作成"""
+    # 取得元のモジュールはurllib.requestを読み込むため、GUIの起動時には読み込まない
+    from tmodloader_installer.core.release_source import local_asset_path
+
+    plan = InstallPlan()
+    base_path = get_app_base_path()
+
+    # アーカイブのセントラルディレクトリだけを読む
+    cached = installer.use_cache and installer.archive_cache.has(installer.release_tag)
+    local_path = local_asset_path(installer.download_url)
+    if cached:
+        source = installer.archive_cache.path(installer.release_tag)
+        archive_size = source.stat().st_size
+    elif local_path is not None:
+        # ローカル・NAS上のアーカイブはダウンロードしない
+        source = local_path
+        archive_size = source.stat().st_size
+    else:
+        source = HttpRangeFile(installer.download_url)
+        archive_size = source.size
+        plan.download_bytes = archive_size
+
+    with zipfile.ZipFile(source, "r") as zip_ref:
+        if installer.extract_filter is not None:
+            members, plan.skipped_count = installer.extract_filter.select(zip_ref)
+        else:
+            members = zip_ref.infolist()
+    plan.member_count = len(members)
+    plan.write_bytes = sum(info.file_size for info in members)
+
+    if installer.install_path.exists():
+        plan.backup_bytes = tree_size(installer.install_path, installer.backup_profile)
+
+    # ファイルシステムごとに必要な容量を集計
+    requirements = [
+        (base_path / "backups", plan.backup_bytes),
+        (installer.install_path, plan.write_bytes),
+    ]
+    in_memory = installer.spool_threshold and not installer.use_cache
+    if not cached and local_path is None and not in_memory:
+        requirements.append((base_path / "downloads", plan.download_bytes))
+
+    by_device = {}
+    for path, required in requirements:
+        existing = _existing_ancestor(path)
+        device = os.stat(existing).st_dev
+        entry = by_device.setdefault(device, [existing, 0])
+        entry[1] += required
+    for existing, required in by_device.values():
+        plan.filesystems.append((existing, required, shutil.disk_usage(existing).free))
+
+    # 記録済みのスループットから所要時間を見積もる
+    throughput = load_throughput()
+    for phase, size in (
+        ("backup", plan.backup_bytes),
+        ("download", plan.download_bytes),
+        ("extract", plan.write_bytes),
+    ):
+        if size == 0:
+            plan.estimates[phase] = 0
+        elif throughput.get(phase):
+            plan.estimates[phase] = size / throughput[phase]
+        else:
+            plan.estimates[phase] = None
+
+    return plan
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+ローカルリリースインデックス
+GitHubのリリース一覧をディスクにキャッシュし、バージョン一覧・範囲指定での選択を提供する
+"""
+
+import fnmatch
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+from tmodloader_installer.utils.constants import GITHUB_API_REPO_URL, RELEASE_ASSET_NAME
+from tmodloader_installer.utils.helpers import get_app_base_path
+
+# 1ページあたりの取得件数（GitHub APIの上限）
+RELEASES_PER_PAGE = 100
+
+
+def parse_version(tag: str):
+    """タグ名を比較可能なバージョンタプルに変換 (例: v2025.06.3.0 -> (2025, 6, 3, 0))"""
+    numbers = re.findall(r"\d+", tag.lstrip("vV"))
+    if not numbers:
+        return (-1,)
+    return tuple(int(n) for n in numbers)
+
+
+def normalize_tag(tag: str) -> str:
+    """先頭の「v」を省略したタグを正規化"""
+    return tag if tag.lower().startswith("v") or tag.startswith("*") else f"v{tag}"
+
+
+def filter_releases(releases, include_prerelease: bool = False, pattern: str = None):
+    """リリース一覧を絞り込んでバージョンの新しい順に並べる（patternはタグ名のglob）"""
+    pattern = normalize_tag(pattern) if pattern else None
+    releases = [
+        release
+        for release in releases
+        if not release.get("draft")
+        and (include_prerelease or not release.get("prerelease"))
+        and (pattern is None or fnmatch.fnmatch(release["tag_name"], pattern))
+    ]
+    releases.sort(key=lambda r: parse_version(r["tag_name"]), reverse=True)
+    return releases
+
+
+def select_release(releases, spec: str, include_prerelease: bool = False):
+    """リリース一覧から指定に一致するリリースを選択
+
+    spec: "latest"（最新の安定版）、"2025.06.*" のようなパターン、またはタグ名
+    """
+    spec = spec.strip()
+    if spec.lower() == "latest":
+        spec = "*"
+    elif spec.lower().startswith("latest "):
+        spec = spec[len("latest "):].strip()
+
+    if any(c in spec for c in "*?["):
+        candidates = filter_releases(releases, include_prerelease, pattern=spec)
+        return candidates[0] if candidates else None
+
+    tag = normalize_tag(spec)
+    return next((release for release in releases if release["tag_name"] == tag), None)
+
+
+class ReleaseIndex:
+    """ディスクに保存するリリース一覧のインデックス"""
+
+    def __init__(self, index_file=None, log=print):
+        self.index_file = (
+            Path(index_file) if index_file else get_app_base_path() / "cache" / "releases.json"
+        )
+        self.log = log
+        self.data = self._load()
+
+    def _load(self):
+        """インデックスを読み込み"""
+        if not self.index_file.exists():
+            return {"synced_at": None, "etag": None, "releases": {}}
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            self.log(f"リリースインデックスの読み込みに失敗: {e}")
+            return {"synced_at": None, "etag": None, "releases": {}}
+
+    def _save(self):
+        """インデックスを保存（一時ファイル経由で置き換え）"""
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = self.index_file.with_suffix(".tmp")
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_file, self.index_file)
+
+    @staticmethod
+    def summarize(release):
+        """APIのリリース情報から必要な項目だけを抜き出す"""
+        return {
+            "tag_name": release["tag_name"],
+            "name": release.get("name") or release["tag_name"],
+            "prerelease": release.get("prerelease", False),
+            "draft": release.get("draft", False),
+            "published_at": release.get("published_at"),
+            "html_url": release.get("html_url", ""),
+            "assets": [
+                {
+                    "name": asset["name"],
+                    "browser_download_url": asset["browser_download_url"],
+                    "size": asset.get("size", 0),
+                    "digest": asset.get("digest"),
+                }
+                for asset in release.get("assets", [])
+            ],
+        }
+
+    def sync(self, max_pages: int = None):
+        """新しいページだけを取得してインデックスを更新
+
+        リリース一覧は新しい順に返るため、既知のリリースを含むページで取得を打ち切る。
+        初回の全件取得が途中で中断された場合は最後のページまで取得し直す。
+        戻り値: 追加されたリリース数
+        """
+        import requests
+
+        known = self.data["releases"]
+        added = 0
+        page = 1
+        # 1ページ目のETagは最後まで取得できた場合のみ保存（途中で打ち切った場合に
+        # 次回の同期が304で省略され、不足したままになるのを防ぐ）
+        etag = None
+        finished = False
+
+        while max_pages is None or page <= max_pages:
+            headers = {"Accept": "application/vnd.github+json"}
+            # 1ページ目はETagで未変更なら取得を省略
+            if page == 1 and known and self.data.get("etag"):
+                headers["If-None-Match"] = self.data["etag"]
+
+            response = requests.get(
+                f"{GITHUB_API_REPO_URL}/releases",
+                params={"per_page": RELEASES_PER_PAGE, "page": page},
+                headers=headers,
+                timeout=30,
+            )
+            if response.status_code == 304:
+                finished = True
+                etag = self.data["etag"]
+                break
+            response.raise_for_status()
+            if page == 1:
+                etag = response.headers.get("ETag")
+
+            releases = response.json()
+            reached_known = False
+            for release in releases:
+                release_id = str(release["id"])
+                if release_id in known:
+                    reached_known = True
+                else:
+                    added += 1
+                known[release_id] = self.summarize(release)
+
+            if len(releases) < RELEASES_PER_PAGE:
+                self.data["complete"] = True
+                finished = True
+                break
+            if reached_known and self.data.get("complete"):
+                finished = True
+                break
+            page += 1
+
+        self.data["etag"] = etag if finished else None
+        self.data["synced_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        self._save()
+        return added
+
+    def releases(self, include_prerelease: bool = False, pattern: str = None):
+        """リリース一覧をバージョンの新しい順に取得（patternはタグ名のglob）"""
+        return filter_releases(self.data["releases"].values(), include_prerelease, pattern)
+
+    def get(self, tag: str):
+        """タグ名からリリースを取得（キャッシュにない場合はNone）"""
+        tag = normalize_tag(tag)
+        for release in self.data["releases"].values():
+            if release["tag_name"] == tag:
+                return release
+        return None
+
+    def select(self, spec: str, include_prerelease: bool = False):
+        """指定からリリースを選択
+
+        spec: "latest"（最新の安定版）、"2025.06.*" のようなパターン、またはタグ名
+        """
+        return select_release(list(self.data["releases"].values()), spec, include_prerelease)
+
+    @staticmethod
+    def asset_url(release):
+        """リリースからtModLoader.zipのダウンロードURLを取得"""
+        for asset in release.get("assets", []):
+            if asset["name"] == RELEASE_ASSET_NAME:
+                return asset["browser_download_url"]
+        return None
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+リリースの取得元
+GitHub・ローカルディレクトリ（NAS共有・file://）・HTTPミラーから
+共通の形式（ReleaseIndex.summarizeと同じ辞書）でリリース情報を取得する
+"""
+
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from urllib.parse import unquote, urljoin, urlparse
+from urllib.request import url2pathname
+
+from tmodloader_installer.core.integrity import read_digest_record
+from tmodloader_installer.core.release_index import (
+    ReleaseIndex,
+    normalize_tag,
+    select_release,
+)
+from tmodloader_installer.utils.constants import GITHUB_API_REPO_URL, RELEASE_ASSET_NAME
+
+# ミラー・ローカルディレクトリのリリース一覧のファイル名
+RELEASE_MANIFEST_NAME = "releases.json"
+
+
+def local_asset_path(url: str):
+    """file:// のURLをローカルのパスに変換（それ以外のURLはNone）"""
+    parsed = urlparse(url)
+    if parsed.scheme != "file":
+        return None
+    path = url2pathname(unquote(parsed.path))
+    # file://server/share/... はUNCパスとして扱う
+    if parsed.netloc and parsed.netloc != "localhost":
+        path = f"//{parsed.netloc}{path}"
+    return Path(path)
+
+
+class ReleaseSource(ABC):
+    """リリースの取得元の基底クラス"""
+
+    name = "base"
+
+    @abstractmethod
+    def releases(self):
+        """リリース情報の一覧（共通形式）"""
+
+    def release(self, tag: str):
+        """タグ名からリリース情報を取得（見つからない場合はNone）"""
+        tag = normalize_tag(tag)
+        return next((r for r in self.releases() if r["tag_name"] == tag), None)
+
+    def select(self, spec: str, include_prerelease: bool = False):
+        """"latest" やパターン、タグ名からリリースを選択"""
+        return select_release(self.releases(), spec, include_prerelease)
+
+
+class GitHubSource(ReleaseSource):
+    """GitHub API（ローカルのリリースインデックスでキャッシュ）"""
+
+    name = "github"
+
+    def __init__(self, index: ReleaseIndex = None, log=print):
+        self.index = index or ReleaseIndex(log=log)
+        self.log = log
+
+    def _sync(self):
+        import requests
+
+        try:
+            self.index.sync()
+        except requests.RequestException as e:
+            self.log(f"リリース一覧の更新に失敗しました。キャッシュを使用します: {e}")
+
+    def releases(self):
+        self._sync()
+        return list(self.index.data["releases"].values())
+
+    def release(self, tag: str):
+        # リリースインデックスにキャッシュ済みならAPIを呼ばない
+        cached = self.index.get(tag)
+        if cached and ReleaseIndex.asset_url(cached):
+            return cached
+
+        import requests
+
+        response = requests.get(
+            f"{GITHUB_API_REPO_URL}/releases/tags/{normalize_tag(tag)}", timeout=30
+        )
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return ReleaseIndex.summarize(response.json())
+
+    def select(self, spec: str, include_prerelease: bool = False):
+        self._sync()
+        return self.index.select(spec, include_prerelease)
+
+
+class LocalDirectorySource(ReleaseSource):
+    """ローカルディレクトリ・NAS共有（<ルート>/<タグ>/tModLoader.zip）
+
+    ルートにreleases.jsonがあればその内容を使い、なければディレクトリを走査する。
+    フォルダ名は「v2025.06.3.0」「2025.06.3.0」のどちらでもよい（タグは「v」付きに揃える）。
+    """
+
+    name = "local"
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def scan(self):
+        """ディレクトリを走査してリリース情報を作成（URLはルートからの相対パス）"""
+        releases = []
+        if not self.root.is_dir():
+            raise ValueError(f"リリースのディレクトリが見つかりません: {self.root}")
+        for entry in os.scandir(self.root):
+            archive = Path(entry.path) / RELEASE_ASSET_NAME
+            if not entry.is_dir() or not archive.is_file():
+                continue
+            stat = archive.stat()
+            releases.append(
+                {
+                    "tag_name": normalize_tag(entry.name),
+                    "name": entry.name,
+                    "prerelease": False,
+                    "draft": False,
+                    "published_at": time.strftime(
+                        "%Y-%m-%dT%H:%M:%SZ", time.gmtime(stat.st_mtime)
+                    ),
+                    "html_url": "",
+                    "assets": [
+                        {
+                            "name": RELEASE_ASSET_NAME,
+                            "browser_download_url": f"{entry.name}/{RELEASE_ASSET_NAME}",
+                            "size": stat.st_size,
+                            # 検証済みのダイジェストがあれば公開して取得側で照合させる
+                            "digest": _recorded_digest(archive),
+                        }
+                    ],
+                }
+            )
+        return releases
+
+    def write_manifest(self):
+        """走査結果をreleases.jsonとして書き出す（HTTPミラーとして公開する場合に使用）"""
+        manifest_path = self.root / RELEASE_MANIFEST_NAME
+        temp_path = manifest_path.with_suffix(".tmp")
+        releases = self.scan()
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"releases": releases}, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, manifest_path)
+        return manifest_path, len(releases)
+
+    def releases(self):
+        manifest_path = self.root / RELEASE_MANIFEST_NAME
+        if manifest_path.is_file():
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                releases = json.load(f)["releases"]
+        else:
+            releases = self.scan()
+        return _resolve_asset_urls(releases, self.root.absolute().as_uri() + "/")
+
+
+class HttpMirrorSource(ReleaseSource):
+    """HTTPミラー（<ベースURL>/releases.json と <ベースURL>/<タグ>/tModLoader.zip）"""
+
+    name = "mirror"
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url if base_url.endswith("/") else base_url + "/"
+        self._releases = None
+
+    def releases(self):
+        if self._releases is None:
+            import requests
+
+            response = requests.get(urljoin(self.base_url, RELEASE_MANIFEST_NAME), timeout=30)
+            response.raise_for_status()
+            self._releases = _resolve_asset_urls(response.json()["releases"], self.base_url)
+        return self._releases
+
+
+def _recorded_digest(archive: Path):
+    """アーカイブの隣に記録された検証済みのダイジェスト（"sha256:<16進>"）"""
+    record = read_digest_record(archive)
+    return f"sha256:{record['sha256']}" if record else None
+
+
+def _resolve_asset_urls(releases, base_url: str):
+    """アセットの相対URLを取得元のURLを基準に絶対URLへ変換"""
+    for release in releases:
+        for asset in release.get("assets", []):
+            asset["browser_download_url"] = urljoin(base_url, asset["browser_download_url"])
+    return releases
+
+
+def get_release_source(spec: str = None, log=print) -> ReleaseSource:
+    """取得元の指定からReleaseSourceを作成
+
+    spec: 省略または "github"、ディレクトリのパス・file:// のURL、http(s):// のミラーURL
+    """
+    if not spec:
+        from tmodloader_installer.utils.config import load_config
+
+        spec = load_config()["download"].get("release_source")
+    if not spec or spec == GitHubSource.name:
+        return GitHubSource(log=log)
+
+    local_path = local_asset_path(spec)
+    if local_path is not None:
+        return LocalDirectorySource(local_path)
+    if urlparse(spec).scheme in ("http", "https"):
+        return HttpMirrorSource(spec)
+    return LocalDirectorySource(spec)
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+展開済みリリースの保存領域
+タグごとに展開したツリーを読み取り専用で保存し、インストール先はそこからリフリンク・
+ハードリンクで組み立てるか、保存したツリーを指すシンボリックリンク（スロット）で切り替える。
+保存済みのバージョン間の切り替えは解凍を行わないため、サイズによらず数秒で終わる。
+"""
+
+import errno
+import os
+import shutil
+import stat
+import sys
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+from tmodloader_installer.core.cancel import check_cancelled
+from tmodloader_installer.core.file_lock import FileLock
+from tmodloader_installer.core.staging import link_or_copy, staging_path, swap_directories
+from tmodloader_installer.utils.constants import INSTALLED_MARKER_NAME
+from tmodloader_installer.utils.helpers import get_app_base_path, natural_sort_key
+
+# インストール先の組み立て方（autoはリフリンク、ハードリンク、コピーの順に使えるものを選ぶ）
+LINK_MODES = ("auto", "reflink", "hardlink", "copy", "symlink")
+
+# LinuxのFICLONE ioctl（btrfs・XFSなどでファイルの内容をcopy-on-writeで共有）
+FICLONE = 0x40049409
+
+
+def reflink(src, dst):
+    """ファイルをリフリンクで複製（対応していないファイルシステムではOSError）"""
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.EOPNOTSUPP, "リフリンクに対応していません", str(dst))
+    import fcntl
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.unlink(dst)
+            raise
+    _copy_stat_writable(src, dst)
+
+
+def _copy(src, dst):
+    shutil.copyfile(src, dst)
+    _copy_stat_writable(src, dst)
+
+
+def _copy_stat_writable(src, dst):
+    """更新日時と権限を引き継ぐ（複製したファイルは独立しているので書き込み可能にする）"""
+    shutil.copystat(src, dst)
+    os.chmod(dst, os.stat(dst).st_mode | stat.S_IWUSR)
+
+
+LINKERS = {"reflink": reflink, "hardlink": os.link, "copy": _copy}
+
+
+def _make_read_only(root):
+    """保存したツリーのファイルを読み取り専用にする
+
+    ハードリンクしたインストール先での上書きが保存領域に及ばないようにするため。
+    Windowsは読み取り専用の属性があるとリンクを削除できないため設定しない。
+    """
+    if sys.platform == "win32":
+        return
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(dirpath, name)
+            os.chmod(path, os.stat(path).st_mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+def _remove(path: Path):
+    """シンボリックリンクはリンクだけ、フォルダは中身ごと削除"""
+    if path.is_symlink():
+        path.unlink()
+    elif path.exists():
+        shutil.rmtree(path)
+
+
+class ReleaseStore:
+    """タグごとの展開済みリリースの保存領域"""
+
+    def __init__(self, store_dir=None):
+        self.store_dir = (
+            Path(store_dir) if store_dir else get_app_base_path() / "cache" / "releases"
+        )
+
+    def path(self, tag: str) -> Path:
+        """タグに対応する展開済みツリー"""
+        return self.store_dir / tag
+
+    def has(self, tag: str) -> bool:
+        """保存済みか判定（バージョンの記録は展開の完了後に書くので、途中のものは含まない）"""
+        return bool(tag) and (self.path(tag) / INSTALLED_MARKER_NAME).is_file()
+
+    def tags(self):
+        """保存済みのタグ一覧（新しい順）"""
+        if not self.store_dir.exists():
+            return []
+        tags = [item.name for item in self.store_dir.iterdir() if self.has(item.name)]
+        tags.sort(key=natural_sort_key, reverse=True)
+        return tags
+
+    def _lock(self, tag: str) -> FileLock:
+        """同じタグの保存・削除を他のプロセスと排他にするロック"""
+        return FileLock(self.store_dir / f"{tag}.lock", f"{tag}の保存")
+
+    def add(self, tag: str, archive, governor=None, cancel=None, log=print) -> Path:
+        """アーカイブを全て展開して保存（他のプロセスが保存済みの場合はそのまま使う）
+
+        archive: ZIPファイルのパスまたはファイルオブジェクト
+        """
+        from tmodloader_installer.core.installer import write_installed_marker
+
+        target = self.path(tag)
+        with self._lock(tag):
+            if self.has(tag):
+                return target
+            part = target.with_name(f"{tag}.part")
+            _remove(part)
+            try:
+                with zipfile.ZipFile(archive, "r") as zip_ref:
+                    for info in zip_ref.infolist():
+                        check_cancelled(cancel)
+                        if governor:
+                            governor.extract_member(zip_ref, info, part, cancel)
+                        else:
+                            zip_ref.extract(info, part)
+                write_installed_marker(part, tag)
+                _make_read_only(part)
+                _remove(target)
+                os.rename(part, target)
+            except BaseException:
+                shutil.rmtree(part, ignore_errors=True)
+                raise
+        log(f"展開済みリリースを保存しました: {target}")
+        return target
+
+    def remove(self, tag: str):
+        """保存したツリーを削除（このツリーを指すスロットは使えなくなる）"""
+        with self._lock(tag):
+            _remove(self.path(tag))
+
+    def install(
+        self,
+        tag: str,
+        install_path,
+        mode: str = "auto",
+        extract_filter=None,
+        cancel=None,
+        log=print,
+    ):
+        """保存したツリーからインストール先を組み立てて切り替え（戻り値: 使用した組み立て方）
+
+        symlink以外は隣接するステージングフォルダに組み立ててからフォルダ名の変更で
+        切り替えるため、途中で失敗してもインストール先は変更されない。
+        """
+        from tmodloader_installer.core.installer import write_installed_marker
+
+        if mode not in LINK_MODES:
+            raise ValueError(f"不明な組み立て方です: {mode}（{', '.join(LINK_MODES)}）")
+        if not self.has(tag):
+            raise ValueError(f"展開済みリリースが保存されていません: {tag}")
+        source = self.path(tag)
+        install_path = Path(install_path)
+
+        if mode == "symlink":
+            if extract_filter is not None:
+                log("シンボリックリンクのスロットでは展開プロファイルは適用されません")
+            self._switch_slot(source, install_path, log)
+            return mode
+
+        staging_dir = staging_path(install_path)
+        _remove(staging_dir)
+        mode = self._resolve_mode(mode, source, install_path.parent)
+        link = LINKERS[mode]
+        try:
+            for dirpath, _, files in os.walk(source):
+                rel_dir = Path(dirpath).relative_to(source)
+                (staging_dir / rel_dir).mkdir(parents=True, exist_ok=True)
+                for name in files:
+                    check_cancelled(cancel)
+                    rel_path = (rel_dir / name).as_posix()
+                    if rel_path == INSTALLED_MARKER_NAME:
+                        continue
+                    if extract_filter is not None and not extract_filter.allows(rel_path):
+                        continue
+                    link(os.path.join(dirpath, name), staging_dir / rel_dir / name)
+
+            if install_path.is_dir() and not install_path.is_symlink():
+                self._carry_over(install_path, staging_dir, cancel)
+            write_installed_marker(staging_dir, tag)
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        if install_path.is_symlink() and not install_path.exists():
+            # 保存したツリーが削除されたスロットは入れ替えずに削除
+            install_path.unlink()
+        previous = swap_directories(staging_dir, install_path)
+        if previous:
+            _remove(Path(previous))
+        return mode
+
+    def _resolve_mode(self, mode: str, source: Path, dest_parent: Path) -> str:
+        """autoの場合は保存領域とインストール先の間で使える組み立て方を試して決める"""
+        if mode != "auto":
+            return mode
+        dest_parent.mkdir(parents=True, exist_ok=True)
+        probe = dest_parent / f".{source.name}.probe"
+        for candidate in ("reflink", "hardlink"):
+            try:
+                LINKERS[candidate](source / INSTALLED_MARKER_NAME, probe)
+                return candidate
+            except OSError:
+                pass
+            finally:
+                probe.unlink(missing_ok=True)
+        return "copy"
+
+    def _carry_over(self, install_path: Path, staging_dir: Path, cancel=None):
+        """インストール先にだけあるファイル（ログ・ユーザーが追加したものなど）を引き継ぐ"""
+        for rel_path in self._user_files(install_path, cancel):
+            target = staging_dir / rel_path
+            if target.exists():
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            link_or_copy(install_path / rel_path, target)
+
+    def _user_files(self, install_path: Path, cancel=None):
+        """以前のバージョンのツリーに含まれないファイルの相対パスを列挙
+
+        以前のバージョンが保存済みでない場合は、バージョンの記録以外の全てのファイルが対象。
+        """
+        from tmodloader_installer.core.backup import installed_tag
+
+        previous_tag = installed_tag(install_path)
+        previous_tree = self.path(previous_tag) if self.has(previous_tag) else None
+        for dirpath, _, files in os.walk(install_path):
+            rel_dir = Path(dirpath).relative_to(install_path)
+            for name in files:
+                check_cancelled(cancel)
+                if name == INSTALLED_MARKER_NAME:
+                    continue
+                if previous_tree is not None and (previous_tree / rel_dir / name).exists():
+                    continue
+                yield rel_dir / name
+
+    def _switch_slot(self, source: Path, install_path: Path, log=print):
+        """インストール先を保存したツリーを指すシンボリックリンクにする（既存のリンクは置き換え）"""
+        if install_path.exists() and not install_path.is_symlink():
+            # スロットの先は共有の保存領域なので、ユーザーのファイルを引き継げない
+            user_files = list(self._user_files(install_path))
+            if user_files:
+                shown = ", ".join(path.as_posix() for path in user_files[:5])
+                if len(user_files) > 5:
+                    shown += f" ほか{len(user_files) - 5}件"
+                raise ValueError(
+                    "インストール先に保存したリリースにないファイルがあるため、"
+                    f"シンボリックリンクのスロットにできません: {shown}"
+                )
+            # 通常のフォルダは退避してからスロットにする
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            previous = install_path.with_name(f"{install_path.name}.old_{timestamp}")
+            os.rename(install_path, previous)
+        else:
+            previous = None
+
+        temp_link = install_path.with_name(f"{install_path.name}.slot")
+        _remove(temp_link)
+        try:
+            os.symlink(source.resolve(), temp_link, target_is_directory=True)
+            try:
+                os.replace(temp_link, install_path)
+            except OSError:
+                # Windowsはリンクを上書きできないため削除してから置き換える
+                _remove(install_path)
+                os.rename(temp_link, install_path)
+        except OSError:
+            # リンクを作れなかった場合は退避したフォルダを戻す
+            if previous is not None and not os.path.lexists(install_path):
+                os.rename(previous, install_path)
+            raise
+
+        if previous is not None:
+            # 保存したリリースのファイルしかないことは確認済みなので、退避したフォルダは不要
+            _remove(previous)
+            log(f"既存のフォルダを削除しました: {previous}")
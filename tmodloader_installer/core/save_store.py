@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+ワールド・プレイヤーデータのバージョン管理
+ファイルを内容で区切ったチャンク（content-defined chunking）に分割してハッシュで保存し、
+スナップショットごとにファイルとチャンクの対応を記録する。変更のないチャンクは共有される。
+"""
+
+import hashlib
+import json
+import os
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+from tmodloader_installer.utils.config import load_config
+from tmodloader_installer.utils.helpers import get_app_base_path
+
+# チャンクサイズ（最小・平均・最大）
+MIN_CHUNK_SIZE = 16 * 1024
+AVG_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 256 * 1024
+
+# 境界の判定に使うハッシュのビット（平均チャンクサイズに対応）
+_BOUNDARY_MASK = AVG_CHUNK_SIZE - 1
+
+# ローリングハッシュ（Gear）のテーブル（実行ごとに同じ境界になるよう固定値から生成）
+_GEAR = [
+    int.from_bytes(hashlib.sha256(i.to_bytes(2, "little")).digest()[:4], "little")
+    for i in range(256)
+]
+
+# 読み込み単位
+READ_SIZE = 4 * 1024 * 1024
+
+
+def chunk_boundaries(data: bytes):
+    """データをチャンクに区切る位置（各チャンクの終端）を列挙"""
+    gear = _GEAR
+    mask = _BOUNDARY_MASK
+    length = len(data)
+    start = 0
+    while start < length:
+        end = min(start + MAX_CHUNK_SIZE, length)
+        # 最小サイズまでは境界を探さない
+        position = start + MIN_CHUNK_SIZE
+        if position >= end:
+            yield end
+            start = end
+            continue
+
+        h = 0
+        boundary = end
+        for index in range(position, end):
+            h = ((h << 1) + gear[data[index]]) & 0xFFFFFFFF
+            if not h & mask:
+                boundary = index + 1
+                break
+        yield boundary
+        start = boundary
+
+
+def iter_chunks(path):
+    """ファイルを内容で区切ったチャンクを順に返す"""
+    with open(path, "rb") as f:
+        buffer = b""
+        eof = False
+        while not eof:
+            data = f.read(READ_SIZE)
+            eof = not data
+            buffer += data
+            start = 0
+            for end in chunk_boundaries(buffer):
+                # 末尾のチャンクは続きを読み込んでから区切り直す
+                if end == len(buffer) and not eof:
+                    break
+                yield buffer[start:end]
+                start = end
+            buffer = buffer[start:]
+
+
+class SaveStore:
+    """チャンク単位で重複を除いたセーブデータのスナップショット保存領域"""
+
+    def __init__(self, store_dir=None, folders=None):
+        self.store_dir = (
+            Path(store_dir) if store_dir else get_app_base_path() / "saves"
+        )
+        self.folders = list(folders or load_config()["saves"]["folders"])
+        self.chunks_dir = self.store_dir / "chunks"
+        self.snapshots_dir = self.store_dir / "snapshots"
+
+    def _chunk_path(self, digest: str) -> Path:
+        return self.chunks_dir / digest[:2] / digest
+
+    def _store_chunk(self, data: bytes):
+        """チャンクを保存（保存済みなら何もしない）。戻り値: (ハッシュ, 新規に保存したか)"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._chunk_path(digest)
+        if path.exists():
+            return digest, False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, "wb") as f:
+            f.write(zlib.compress(data, 1))
+        os.replace(temp_path, path)
+        return digest, True
+
+    def _read_chunk(self, digest: str) -> bytes:
+        with open(self._chunk_path(digest), "rb") as f:
+            data = zlib.decompress(f.read())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"チャンクが破損しています: {digest}")
+        return data
+
+    def snapshots(self):
+        """スナップショットの一覧（新しい順）"""
+        if not self.snapshots_dir.exists():
+            return []
+        manifests = []
+        for path in self.snapshots_dir.glob("*.json"):
+            with open(path, "r", encoding="utf-8") as f:
+                manifests.append(json.load(f))
+        manifests.sort(key=lambda m: m["id"], reverse=True)
+        return manifests
+
+    def load_snapshot(self, snapshot_id: str):
+        """スナップショットのマニフェストを読み込み"""
+        path = self.snapshots_dir / f"{snapshot_id}.json"
+        if not path.exists():
+            raise ValueError(f"スナップショットが見つかりません: {snapshot_id}")
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _iter_files(self, install_path: Path):
+        for folder in self.folders:
+            root = install_path / folder
+            if not root.is_dir():
+                continue
+            for dirpath, _, filenames in os.walk(root):
+                for name in sorted(filenames):
+                    path = Path(dirpath) / name
+                    yield path, path.relative_to(install_path).as_posix()
+
+    def snapshot(self, install_path, label: str = None, log=print):
+        """Worlds・Playersなどのスナップショットを作成
+
+        前回のスナップショットからサイズ・更新日時が変わっていないファイルは読み込まない。
+        """
+        install_path = Path(install_path)
+        previous = self.snapshots()
+        previous_files = {f["path"]: f for f in previous[0]["files"]} if previous else {}
+
+        snapshot_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        manifest = {
+            "id": snapshot_id,
+            "label": label,
+            "created_at": datetime.now().isoformat(),
+            "source": str(install_path),
+            "files": [],
+        }
+        new_bytes = 0
+        for path, rel_path in self._iter_files(install_path):
+            stat = path.stat()
+            known = previous_files.get(rel_path)
+            if known and known["size"] == stat.st_size and known["mtime"] == stat.st_mtime:
+                manifest["files"].append(known)
+                continue
+
+            chunks = []
+            for data in iter_chunks(path):
+                digest, created = self._store_chunk(data)
+                chunks.append(digest)
+                if created:
+                    new_bytes += len(data)
+            manifest["files"].append(
+                {
+                    "path": rel_path,
+                    "size": stat.st_size,
+                    "mtime": stat.st_mtime,
+                    "chunks": chunks,
+                }
+            )
+
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        path = self.snapshots_dir / f"{snapshot_id}.json"
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+        log(
+            f"スナップショット {snapshot_id} を作成しました"
+            f"（{len(manifest['files'])}ファイル、新規チャンク {new_bytes}バイト）"
+        )
+        return manifest
+
+    def restore(self, snapshot_id: str, install_path, log=print):
+        """スナップショットからファイルを復元（チャンクを順に書き出す）"""
+        install_path = Path(install_path)
+        manifest = self.load_snapshot(snapshot_id)
+        for entry in manifest["files"]:
+            target = install_path / entry["path"]
+            target.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = target.with_name(target.name + ".restore")
+            with open(temp_path, "wb") as f:
+                for digest in entry["chunks"]:
+                    f.write(self._read_chunk(digest))
+            os.replace(temp_path, target)
+            os.utime(target, (entry["mtime"], entry["mtime"]))
+        log(f"スナップショット {snapshot_id} から {len(manifest['files'])} ファイルを復元しました")
+        return manifest
+
+    def prune(self, keep: int, log=print):
+        """新しい順にkeep件を残してスナップショットを削除し、参照されないチャンクを削除"""
+        snapshots = self.snapshots()
+        for manifest in snapshots[keep:]:
+            (self.snapshots_dir / f"{manifest['id']}.json").unlink()
+
+        referenced = {
+            digest
+            for manifest in snapshots[:keep]
+            for entry in manifest["files"]
+            for digest in entry["chunks"]
+        }
+        removed = 0
+        if self.chunks_dir.exists():
+            for path in self.chunks_dir.glob("*/*"):
+                if path.name not in referenced:
+                    path.unlink()
+                    removed += 1
+        log(f"スナップショット {max(len(snapshots) - keep, 0)} 件、チャンク {removed} 個を削除しました")
+        return removed
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+ジョブのスケジューラ
+インストール・復元などの作業を上限付きのワーカーで順番に実行する。
+インストール先ごとの排他ロックと、ディスク・ネットワークを多く使う作業の同時実行数の
+上限はロックファイルで管理するため、別のプロセス（CLIやもう1つのGUI）とも共有される。
+"""
+
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from tmodloader_installer.core.cancel import CancelToken, OperationCancelled
+from tmodloader_installer.core.file_lock import FileLock, SlotLock
+from tmodloader_installer.utils.config import load_config
+from tmodloader_installer.utils.helpers import get_app_base_path
+
+# 同時実行数を制限する資源の種類
+RESOURCES = ("disk", "network")
+
+_job_ids = itertools.count(1)
+
+
+def lock_dir() -> Path:
+    """同時実行数の枠のロックファイルの保存先"""
+    return get_app_base_path() / "locks"
+
+
+def install_lock(install_path, description: str = "") -> FileLock:
+    """インストール先の排他ロック（インストール先と同じ場所のロックファイル）"""
+    install_path = Path(install_path).resolve()
+    return FileLock(install_path.with_name(f"{install_path.name}.installer.lock"), description)
+
+
+def lock_timeout():
+    """config.yamlのjobs.lock_timeout（0以下は無制限に待つ）"""
+    timeout = load_config()["jobs"]["lock_timeout"]
+    return timeout if timeout and timeout > 0 else None
+
+
+def _describe_owner(owner):
+    if not owner:
+        return "別のプロセス"
+    return f"PID {owner.get('pid')} の{owner.get('description') or '作業'}（{owner.get('since')}から）"
+
+
+@contextmanager
+def job_resources(
+    paths=(),
+    description: str = "",
+    disk: bool = False,
+    network: bool = False,
+    cancel=None,
+    timeout: float = None,
+    log=print,
+):
+    """同時実行数の枠とインストール先のロックを取得して保持する
+
+    枠（ディスク、ネットワークの順）を先に、ロックはパスの順に取得するため、
+    複数のジョブが同じ資源を待ってもデッドロックしない。
+    """
+    config = load_config()["jobs"]
+    if timeout is None:
+        timeout = lock_timeout()
+    with ExitStack() as stack:
+        for resource, needed in zip(RESOURCES, (disk, network)):
+            if not needed:
+                continue
+            slots = SlotLock(lock_dir(), resource, config[f"{resource}_jobs"], description)
+            held = slots.acquire(
+                timeout,
+                cancel,
+                on_wait=lambda owners, resource=resource: log(
+                    f"{resource}を使う作業の同時実行数の上限に達しているため待機しています"
+                ),
+            )
+            if held is not None:
+                stack.callback(held.release)
+
+        for path in sorted({Path(p).resolve() for p in paths}):
+            lock = install_lock(path, description)
+            lock.acquire(
+                timeout,
+                cancel,
+                on_wait=lambda owner, path=path: log(
+                    f"{_describe_owner(owner)}が使用中のため待機しています: {path}"
+                ),
+            )
+            stack.callback(lock.release)
+        yield
+
+
+class Job:
+    """スケジューラに登録された作業"""
+
+    def __init__(
+        self, name: str, func, paths=(), disk: bool = False, network: bool = False, cancel=None
+    ):
+        self.id = next(_job_ids)
+        self.name = name
+        self.func = func
+        self.paths = [Path(p) for p in paths]
+        self.disk = disk
+        self.network = network
+        self.cancel = cancel or CancelToken()
+        # queued -> waiting（枠・ロック待ち） -> running -> done / cancelled / error
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.finished = threading.Event()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.finished.wait(timeout)
+
+
+class JobScheduler:
+    """上限付きのワーカーとキューでジョブを実行する
+
+    ジョブの関数はキャンセルの指示（CancelToken）を引数に呼ばれる。
+    """
+
+    def __init__(self, workers: int = None, log=print):
+        self.workers = workers or load_config()["jobs"]["workers"]
+        self.log = log
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="tmodloader-job"
+        )
+        self._jobs = []
+        self._lock = threading.Lock()
+
+    def submit(
+        self, name: str, func, paths=(), disk: bool = False, network: bool = False, cancel=None
+    ) -> Job:
+        """ジョブをキューに追加（pathsはロックするインストール先、cancelは省略時に作成）"""
+        job = Job(name, func, paths, disk, network, cancel)
+        with self._lock:
+            self._jobs = [j for j in self._jobs if not j.finished.is_set()]
+            self._jobs.append(job)
+        self._executor.submit(self._run, job)
+        return job
+
+    def _run(self, job: Job):
+        job.status = "waiting"
+        try:
+            with job_resources(
+                job.paths, job.name, job.disk, job.network, job.cancel, log=self.log
+            ):
+                job.status = "running"
+                job.result = job.func(job.cancel)
+            job.status = "done"
+        except OperationCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "error"
+            job.error = e
+            self.log(f"エラーが発生しました: {e}")
+        finally:
+            job.finished.set()
+
+    def jobs(self):
+        """終了していないジョブ"""
+        with self._lock:
+            return [job for job in self._jobs if not job.finished.is_set()]
+
+    def busy(self) -> bool:
+        return bool(self.jobs())
+
+    def cancel_all(self):
+        for job in self.jobs():
+            job.cancel.cancel()
+
+    def shutdown(self, wait: bool = True):
+        """新しいジョブの受け付けを終了（wait=Falseの場合は実行中のジョブもキャンセル）"""
+        if not wait:
+            self.cancel_all()
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+プロセス間で共有するダウンロード
+同じURLを複数のプロセスが同時にインストールする場合、最初のプロセスだけがロックを
+保持してプロセスごとの一時ファイルにダウンロードし、完了したファイルを他のプロセスが使う。
+使っているプロセスは参照ファイルを登録し、最後のプロセスが参照を外した時に削除する。
+参照ファイルはFileLockで保持するため、異常終了したプロセスの参照は数えない。
+"""
+
+import hashlib
+import os
+import uuid
+from pathlib import Path
+
+from tmodloader_installer.core.file_lock import FileLock
+from tmodloader_installer.core.integrity import DIGEST_RECORD_SUFFIX
+
+
+def shared_download_path(directory, url: str) -> Path:
+    """URLごとに決まるダウンロード先（同じURLなら全プロセスで同じファイル）"""
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+    return Path(directory) / f"tModLoader_{key}.zip"
+
+
+def _sibling(path: Path, suffix: str) -> Path:
+    return path.with_name(path.name + suffix)
+
+
+class SharedDownload:
+    """複数のプロセスで共有するダウンロード済みファイル"""
+
+    def __init__(self, path, description: str = "ダウンロード"):
+        self.path = Path(path)
+        self.lock = FileLock(_sibling(self.path, ".lock"), description)
+        self.refs_dir = _sibling(self.path, ".refs")
+        self.downloaded = False
+        self._ref = None
+
+    def acquire(self, download, cancel=None, on_wait=None, finish=None) -> Path:
+        """参照を登録し、まだダウンロードされていなければダウンロード
+
+        download: 一時ファイルのパスを受け取り、そこにダウンロードする関数
+            （例外を送出した場合は一時ファイルを削除して参照を外す）
+        finish: ダウンロードしたファイルのパスを受け取り、ロックの保持中に呼ぶ関数
+            （待っていたプロセスより先に検証結果を記録するなど）
+        他のプロセスがダウンロード中の場合は完了するまで待ってから、そのファイルを使う。
+        """
+        # 待っている間に他のプロセスが参照を外してもファイルが削除されないよう先に登録
+        self._add_ref()
+        try:
+            self.lock.acquire(cancel=cancel, on_wait=on_wait)
+        except BaseException:
+            self._drop_ref()
+            raise
+        try:
+            if self.path.is_file():
+                return self.path
+
+            self._remove_stale_parts()
+            part = _sibling(self.path, f".{os.getpid()}_{uuid.uuid4().hex[:8]}.part")
+            try:
+                download(part)
+                os.replace(part, self.path)
+                if finish:
+                    finish(self.path)
+            except BaseException:
+                part.unlink(missing_ok=True)
+                self._drop_ref()
+                raise
+            self.downloaded = True
+            return self.path
+        finally:
+            self.lock.release()
+
+    def reserve(self):
+        """ダウンロードより前に参照だけを登録
+
+        同時実行数の枠を待つ間に、先に終わったプロセスがファイルを削除しないようにする。
+        その後のacquireは同じ参照を使う。
+        """
+        self._add_ref()
+
+    def release(self, delete: bool = True):
+        """参照を外す（deleteの場合は他に使っているプロセスがなければファイルを削除）"""
+        with self.lock:
+            self._drop_ref()
+            if delete:
+                discard_unused(self.path, locked=True)
+            elif not live_refs(self.path):
+                _remove_refs_dir(self.path)
+
+    def _add_ref(self):
+        if self._ref is None:
+            ref = FileLock(self.refs_dir / f"{os.getpid()}_{uuid.uuid4().hex[:8]}.ref")
+            ref.try_acquire()
+            self._ref = ref
+
+    def _drop_ref(self):
+        if self._ref is not None:
+            self._ref.release()
+            self._ref.path.unlink(missing_ok=True)
+            self._ref = None
+
+    def _remove_stale_parts(self):
+        """異常終了したプロセスが残した一時ファイルを削除（ロックの保持中のみ呼ぶ）"""
+        for part in self.path.parent.glob(f"{self.path.name}.*.part"):
+            part.unlink(missing_ok=True)
+
+
+def _remove_refs_dir(path: Path):
+    try:
+        _sibling(path, ".refs").rmdir()
+    except OSError:
+        pass
+
+
+def live_refs(path) -> int:
+    """ファイルを使っているプロセスの数（異常終了したプロセスの参照は削除する）"""
+    refs_dir = _sibling(Path(path), ".refs")
+    if not refs_dir.is_dir():
+        return 0
+    count = 0
+    for ref_path in refs_dir.glob("*.ref"):
+        ref = FileLock(ref_path)
+        if ref.try_acquire():
+            ref.release()
+            ref_path.unlink(missing_ok=True)
+        else:
+            count += 1
+    return count
+
+
+def discard_unused(path, locked: bool = False) -> bool:
+    """使っているプロセスがなければファイルと検証結果の記録を削除（戻り値: 削除したか）
+
+    locked: 呼び出し側がすでにダウンロードのロックを保持している場合はTrue
+    """
+    path = Path(path)
+    lock = FileLock(_sibling(path, ".lock"), "ダウンロードの削除")
+    if not locked:
+        lock.acquire()
+    try:
+        if live_refs(path):
+            return False
+        path.unlink(missing_ok=True)
+        _sibling(path, DIGEST_RECORD_SUFFIX).unlink(missing_ok=True)
+        _remove_refs_dir(path)
+        return True
+    finally:
+        if not locked:
+            lock.release()
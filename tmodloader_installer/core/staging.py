@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+ステージングディレクトリを使った切り替えインストール
+インストール先と同じ階層に新しいツリーを組み立て、ディレクトリ名の変更だけで切り替える
+"""
+
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+from tmodloader_installer.utils.constants import INSTALLED_MARKER_NAME
+
+
+def staging_path(install_path) -> Path:
+    """インストール先と同じ階層のステージングディレクトリ"""
+    install_path = Path(install_path)
+    return install_path.with_name(f"{install_path.name}.staging")
+
+
+def link_or_copy(src, dst):
+    """ハードリンクを作成（別ファイルシステムなどで失敗した場合はコピー）"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def link_missing_files(live_dir, staging_dir, skip=()):
+    """ステージングに存在しないファイル（ユーザーデータなど）を既存フォルダからリンク
+
+    シンボリックリンク（別のドライブに置いたModsやWorldsなど）は辿らずにリンクとして作り直す。
+    バージョンの記録は新しいツリーで書き直すため引き継がない（リンクすると既存フォルダの記録まで
+    書き換わる）。
+    skip: 引き継がないファイルの相対パス（/区切り、以前のバージョンのファイルなど）
+    戻り値: リンク・コピーしたファイル数
+    """
+    live_dir = Path(live_dir)
+    staging_dir = Path(staging_dir)
+    count = 0
+
+    for root, dirs, files in os.walk(live_dir):
+        target_root = staging_dir / Path(root).relative_to(live_dir)
+        target_root.mkdir(parents=True, exist_ok=True)
+        rel_root = Path(root).relative_to(live_dir).as_posix()
+        for name in dirs + files:
+            source = Path(root) / name
+            target = target_root / name
+            is_link = source.is_symlink()
+            if name in dirs and not is_link:
+                continue
+            rel_path = name if rel_root == "." else f"{rel_root}/{name}"
+            if os.path.lexists(target) or rel_path in skip or rel_path == INSTALLED_MARKER_NAME:
+                continue
+            if is_link:
+                os.symlink(os.readlink(source), target, target_is_directory=name in dirs)
+            else:
+                link_or_copy(source, target)
+            count += 1
+
+    return count
+
+
+def swap_directories(staging_dir, install_path, previous=None):
+    """ステージングディレクトリとインストール先をリネームで入れ替え
+
+    previous: 旧インストール先の退避先（省略時は日時から決定）
+    戻り値: 退避した旧インストール先のパス（新規インストールの場合はNone）
+    """
+    staging_dir = Path(staging_dir)
+    install_path = Path(install_path)
+
+    if not install_path.exists():
+        os.rename(staging_dir, install_path)
+        return None
+
+    if previous is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        previous = install_path.with_name(f"{install_path.name}.old_{timestamp}")
+
+    os.rename(install_path, previous)
+    try:
+        os.rename(staging_dir, install_path)
+    except OSError:
+        # 切り替えに失敗した場合は元に戻す
+        os.rename(previous, install_path)
+        raise
+
+    return previous
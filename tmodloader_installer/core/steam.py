@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Steamライブラリからのインストール先の検出
+libraryfolders.vdfとappmanifest_<appid>.acfを解析して全てのライブラリフォルダから
+tModLoaderのインストール先を探す。結果は参照したファイルの更新日時と共にキャッシュする。
+"""
+
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+from tmodloader_installer.utils.config import load_config
+from tmodloader_installer.utils.constants import DEFAULT_INSTALL_PATH, TMODLOADER_APP_ID
+from tmodloader_installer.utils.helpers import get_app_base_path
+
+_VDF_TOKEN = re.compile(r'"((?:[^"\\]|\\.)*)"|([{}])|//[^\n]*')
+
+
+def parse_vdf(text: str):
+    """Valveのキー・値形式（VDF/ACF）を辞書に変換"""
+    root = {}
+    stack = [root]
+    key = None
+    for match in _VDF_TOKEN.finditer(text):
+        string, brace = match.groups()
+        if string is not None:
+            value = string.replace("\\\\", "\\")
+            if key is None:
+                key = value
+            else:
+                stack[-1][key] = value
+                key = None
+        elif brace == "{":
+            child = {}
+            stack[-1][key] = child
+            stack.append(child)
+            key = None
+        elif brace == "}" and len(stack) > 1:
+            stack.pop()
+    return root
+
+
+def _read_vdf(path: Path):
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return parse_vdf(f.read())
+    except OSError:
+        return {}
+
+
+def steam_roots():
+    """Steamのインストール先の候補"""
+    home = Path.home()
+    candidates = []
+    if sys.platform == "win32":
+        try:
+            import winreg
+
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Valve\Steam") as key:
+                candidates.append(Path(winreg.QueryValueEx(key, "SteamPath")[0]))
+        except OSError:
+            pass
+        candidates += [
+            Path("C:/Program Files (x86)/Steam"),
+            Path("C:/Program Files/Steam"),
+        ]
+    elif sys.platform == "darwin":
+        candidates.append(home / "Library" / "Application Support" / "Steam")
+    else:
+        candidates += [
+            home / ".steam" / "steam",
+            home / ".local" / "share" / "Steam",
+            home / ".var" / "app" / "com.valvesoftware.Steam" / ".local" / "share" / "Steam",
+            home / "snap" / "steam" / "common" / ".local" / "share" / "Steam",
+        ]
+
+    # config.yamlのSteam実行ファイルの場所からも探す
+    for exe_path in load_config()["steam"].get("steam_exe_paths") or []:
+        candidates.append(Path(exe_path).parent)
+
+    roots = []
+    seen = set()
+    for candidate in candidates:
+        try:
+            resolved = candidate.resolve()
+        except OSError:
+            continue
+        if resolved not in seen and (resolved / "steamapps").is_dir():
+            seen.add(resolved)
+            roots.append(resolved)
+    return roots
+
+
+def _mtime(path: Path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+class SteamDiscovery:
+    """Steamライブラリ・config.yamlの候補からtModLoaderのインストール先を検出"""
+
+    def __init__(self, cache_file=None, app_id: int = TMODLOADER_APP_ID):
+        self.cache_file = (
+            Path(cache_file) if cache_file else get_app_base_path() / "cache" / "steam.json"
+        )
+        self.app_id = app_id
+
+    def _scan(self):
+        """ライブラリを走査。戻り値: (インストール先のリスト, {参照したパス: 更新日時})"""
+        installs = []
+        sources = {}
+
+        for root in steam_roots():
+            library_file = root / "steamapps" / "libraryfolders.vdf"
+            sources[str(library_file)] = _mtime(library_file)
+            folders = _read_vdf(library_file).get("libraryfolders", {})
+            libraries = [root]
+            for entry in folders.values():
+                # 新しい形式は {"path": ...}、古い形式はパスの文字列
+                path = entry.get("path") if isinstance(entry, dict) else entry
+                if path:
+                    libraries.append(Path(path))
+
+            for library in libraries:
+                manifest = library / "steamapps" / f"appmanifest_{self.app_id}.acf"
+                sources[str(manifest)] = _mtime(manifest)
+                state = _read_vdf(manifest).get("AppState", {})
+                install_dir = state.get("installdir")
+                if install_dir:
+                    installs.append(str(library / "steamapps" / "common" / install_dir))
+
+        for path in load_config()["steam"].get("common_paths") or []:
+            sources[path] = _mtime(Path(path))
+            if Path(path).is_dir():
+                installs.append(str(Path(path)))
+
+        unique = []
+        for path in installs:
+            if path not in unique and Path(path).is_dir():
+                unique.append(path)
+        return unique, sources
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _cache_valid(self, cache):
+        """参照したファイルの更新日時が変わっていないか"""
+        if not cache or cache.get("app_id") != self.app_id:
+            return False
+        return all(_mtime(Path(path)) == mtime for path, mtime in cache["sources"].items())
+
+    def installs(self, refresh: bool = False):
+        """検出したインストール先の一覧"""
+        cache = None if refresh else self._load_cache()
+        if self._cache_valid(cache):
+            return cache["installs"]
+
+        installs, sources = self._scan()
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.cache_file.with_suffix(".tmp")
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"app_id": self.app_id, "installs": installs, "sources": sources},
+                    f,
+                    ensure_ascii=False,
+                    indent=2,
+                )
+            os.replace(temp_file, self.cache_file)
+        except OSError:
+            pass
+        return installs
+
+
+def default_install_path():
+    """既定のインストール先（検出できない場合は組み込みの既定値）"""
+    try:
+        installs = SteamDiscovery().installs()
+    except Exception:
+        installs = []
+    return installs[0] if installs else DEFAULT_INSTALL_PATH
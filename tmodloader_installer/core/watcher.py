@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+リリース監視デーモン
+新しいリリースを検出したら事前にダウンロード・展開しておき、
+メンテナンス時はファイルの差し替えだけで更新できるようにする
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import zipfile
+from pathlib import Path
+
+from tmodloader_installer.core.archive_cache import ArchiveCache
+from tmodloader_installer.core.backup import installed_tag
+from tmodloader_installer.core.bandwidth import get_limiter
+from tmodloader_installer.core.installer import SimpleInstaller
+from tmodloader_installer.core.integrity import (
+    expected_digest,
+    load_pinned_digests,
+    verify_digest,
+)
+from tmodloader_installer.core.release_index import parse_version
+from tmodloader_installer.core.staging import staging_path
+from tmodloader_installer.utils.config import load_config
+from tmodloader_installer.utils.constants import (
+    GITHUB_API_REPO_URL,
+    RELEASE_ASSET_NAME,
+    WATCH_INTERVAL,
+    WATCH_MAX_BACKOFF,
+    WATCH_MIN_INTERVAL,
+)
+from tmodloader_installer.utils.helpers import get_app_base_path
+
+
+class ReleaseWatcher:
+    """GitHubの最新リリースを監視して事前展開するウォッチャー"""
+
+    def __init__(
+        self,
+        state_dir=None,
+        current_tag: str = None,
+        interval: int = WATCH_INTERVAL,
+        install_path=None,
+        log=print,
+    ):
+        self.state_dir = Path(state_dir) if state_dir else get_app_base_path() / "staging"
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.state_file = self.state_dir / "watch_state.json"
+        self.interval = interval
+        self.log = log
+        self.failures = 0
+        self.state = self._load_state()
+        if current_tag:
+            self.state["known_tag"] = current_tag
+        elif install_path is not None:
+            # インストール済みのバージョンは準備し直さない
+            tag = installed_tag(install_path)
+            if tag and self._is_newer(tag):
+                self.state["known_tag"] = tag
+
+    def _load_state(self):
+        """監視状態を読み込み"""
+        if not self.state_file.exists():
+            return {}
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            self.log(f"監視状態の読み込みに失敗: {e}")
+            return {}
+
+    def _save_state(self):
+        """監視状態を保存（一時ファイル経由で置き換え）"""
+        temp_file = self.state_file.with_suffix(".tmp")
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(temp_file, self.state_file)
+
+    def _is_newer(self, tag):
+        """既知のタグより新しいか判定"""
+        known_tag = self.state.get("known_tag")
+        if not known_tag:
+            return True
+        return parse_version(tag) > parse_version(known_tag)
+
+    def poll(self):
+        """最新リリースを確認（ETagで変更がなければNone）
+
+        戻り値: (新しいリリース情報またはNone, 次回までの待機秒数)
+        """
+        import requests
+
+        headers = {"Accept": "application/vnd.github+json"}
+        if self.state.get("etag"):
+            headers["If-None-Match"] = self.state["etag"]
+
+        response = requests.get(
+            f"{GITHUB_API_REPO_URL}/releases/latest", headers=headers, timeout=30
+        )
+        wait = self._next_interval(response)
+
+        # 304は変更なし（レート制限にもカウントされない）
+        if response.status_code == 304:
+            return None, wait
+        if response.status_code in (403, 429):
+            self.log(f"レート制限中です。{wait:.0f}秒後に再試行します")
+            return None, wait
+        response.raise_for_status()
+
+        self.state["etag"] = response.headers.get("ETag")
+        self._save_state()
+
+        release_data = response.json()
+        if not self._is_newer(release_data.get("tag_name", "")):
+            return None, wait
+        return release_data, wait
+
+    def _next_interval(self, response):
+        """レート制限ヘッダーを考慮して次回のポーリングまでの秒数を決定"""
+        interval = self._min_interval()
+
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return max(interval, int(retry_after))
+
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        if remaining is not None and reset and reset.isdigit():
+            until_reset = max(int(reset) - time.time(), 0)
+            if int(remaining) == 0:
+                return max(interval, until_reset + 1)
+            # 残り回数をリセットまでの時間に均等に割り振る
+            return max(interval, until_reset / int(remaining))
+
+        return interval
+
+    def _min_interval(self):
+        """下限を適用したポーリング間隔"""
+        return max(self.interval, WATCH_MIN_INTERVAL)
+
+    def _retry_interval(self):
+        """失敗が続くほど待機時間を倍にする（上限あり）"""
+        interval = self._min_interval()
+        return min(interval * 2 ** (self.failures - 1), max(interval, WATCH_MAX_BACKOFF))
+
+    def prepare(self, release_data):
+        """リリースをダウンロードして事前に展開"""
+        import requests
+
+        tag = release_data["tag_name"]
+        asset = next(
+            (a for a in release_data.get("assets", []) if a["name"] == RELEASE_ASSET_NAME),
+            None,
+        )
+        if asset is None:
+            raise ValueError(f"{tag} に{RELEASE_ASSET_NAME}が見つかりません")
+
+        release_dir = self.state_dir / tag
+        archive_path = release_dir / RELEASE_ASSET_NAME
+        extract_dir = release_dir / "extracted"
+        if release_dir.exists():
+            shutil.rmtree(release_dir)
+        release_dir.mkdir(parents=True)
+
+        self.log(f"事前ダウンロード中: {asset['browser_download_url']}")
+        digest = hashlib.sha256()
+        with requests.get(asset["browser_download_url"], stream=True, timeout=30) as response:
+            response.raise_for_status()
+            with open(archive_path, "wb") as f:
+                chunks = response.iter_content(chunk_size=1024 * 1024)
+                for chunk in get_limiter().throttle(chunks):
+                    digest.update(chunk)
+                    f.write(chunk)
+
+        # 破損したアーカイブは展開しない
+        pinned = load_pinned_digests(load_config()["download"].get("digest_manifest"))
+        expected, _ = expected_digest(release_data, tag, pinned)
+        try:
+            verify_digest(digest.hexdigest(), expected, asset["browser_download_url"])
+        except ValueError:
+            shutil.rmtree(release_dir, ignore_errors=True)
+            raise
+
+        self.log(f"事前展開中: {extract_dir}")
+        with zipfile.ZipFile(archive_path, "r") as zip_ref:
+            zip_ref.extractall(extract_dir)
+
+        self.state["known_tag"] = tag
+        self.state["prepared"] = {
+            "tag": tag,
+            "path": str(extract_dir),
+            "html_url": release_data.get("html_url", ""),
+            "download_url": asset["browser_download_url"],
+            "prepared_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self._save_state()
+        self.log(f"{tag} の準備が完了しました")
+        return extract_dir
+
+    def run(self, once: bool = False):
+        """新しいリリースを監視し続ける"""
+        import requests
+
+        while True:
+            try:
+                release_data, wait = self.poll()
+                if release_data:
+                    self.log(f"新しいリリースを検出: {release_data['tag_name']}")
+                    self.prepare(release_data)
+                self.failures = 0
+            except (requests.RequestException, OSError, ValueError, zipfile.BadZipFile) as e:
+                self.log(f"リリース確認・準備に失敗: {e}")
+                # 次回のポーリングで304にならないようETagを破棄して再取得させる
+                self.state.pop("etag", None)
+                self._save_state()
+                self.failures += 1
+                wait = self._retry_interval()
+
+            if once:
+                return self.state.get("prepared")
+            time.sleep(wait)
+
+    def apply_prepared(self, install_path, backup: bool = True):
+        """事前展開済みのリリースをインストール先に差し替え
+
+        ステージングに移してからフォルダ名の変更で切り替えるため、新しいリリースで
+        削除されたファイルは残らず、中断されても次回の起動時に元に戻すか確定できる。
+        """
+        from tmodloader_installer.core.copy_engine import ParallelCopier
+        from tmodloader_installer.core.journal import ExtractJob
+
+        prepared = self.state.get("prepared")
+        if not prepared:
+            raise ValueError("事前展開済みのリリースがありません")
+
+        extract_dir = Path(prepared["path"])
+        if not extract_dir.exists():
+            self._forget_prepared()
+            raise ValueError(f"事前展開済みのフォルダが見つかりません: {extract_dir}")
+
+        installer = SimpleInstaller(
+            prepared["html_url"], install_path, download_url=prepared["download_url"]
+        )
+        installer.release_tag = prepared["tag"]
+        backup_path = installer.create_backup() if backup else None
+
+        # インストール済みのバージョンのアーカイブがあれば、そのファイルは引き継がない
+        cache = ArchiveCache()
+        previous_tag = installer.installed_tag()
+        staging_dir = staging_path(installer.install_path)
+        if staging_dir.exists():
+            shutil.rmtree(staging_dir)
+
+        self.log(f"差し替え中: {installer.install_path}")
+        job = ExtractJob.start(
+            archive=None,
+            dest_dir=staging_dir,
+            install_path=installer.install_path,
+            # 事前展開したツリーを移すためメンバーの一覧は記録しない
+            members=[],
+            in_place=False,
+            tag=prepared["tag"],
+            skip=_archive_files(cache.path(previous_tag)) if cache.has(previous_tag) else None,
+            log=self.log,
+        )
+        try:
+            job.copy_from(extract_dir, ParallelCopier(), move=True)
+            job.finish()
+        except Exception:
+            job.rollback()
+            # 移した後に元に戻すと事前展開したツリーも消えるため、準備し直させる
+            if not extract_dir.exists():
+                self._forget_prepared()
+            raise
+
+        # 次の差し替え・差分更新で以前のバージョンとして使えるようにキャッシュ
+        archive_path = extract_dir.parent / RELEASE_ASSET_NAME
+        if archive_path.is_file():
+            cache.store(prepared["tag"], archive_path)
+        shutil.rmtree(extract_dir.parent, ignore_errors=True)
+        self.state["applied"] = prepared
+        del self.state["prepared"]
+        self._save_state()
+        self.log(f"{prepared['tag']} への差し替えが完了しました")
+        return backup_path
+
+    def _forget_prepared(self):
+        """使えなくなった事前展開を破棄し、次回のポーリングで準備し直させる"""
+        prepared = self.state.pop("prepared", None)
+        if prepared:
+            shutil.rmtree(Path(prepared["path"]).parent, ignore_errors=True)
+            if self.state.get("known_tag") == prepared["tag"]:
+                self.state.pop("known_tag")
+        # ETagが残っていると304になり、同じリリースを取得し直せない
+        self.state.pop("etag", None)
+        self._save_state()
+
+
+def _archive_files(archive):
+    """アーカイブに含まれるファイルの相対パス"""
+    with zipfile.ZipFile(archive, "r") as zip_ref:
+        return {info.filename for info in zip_ref.infolist() if not info.is_dir()}
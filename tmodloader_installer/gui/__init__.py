@@ -1,10 +1,32 @@
 #!/usr/bin/env python3
 """
 GUIモジュール
+
+tkinterはGUIを使うときだけ読み込むため、各クラスは最初に参照されたときに読み込む。
 """
 
-from .main_window import MainWindow
-from .dialogs import BackupSelectionDialog
-from .widgets import LogWindow
+import importlib
+
+# 公開名 -> 定義しているサブモジュール
+_EXPORTS = {
+    "MainWindow": ".main_window",
+    "BackupSelectionDialog": ".dialogs",
+    "VersionSelectionDialog": ".dialogs",
+    "LogWindow": ".widgets",
+    "StatsWindow": ".widgets",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = ["MainWindow", "BackupSelectionDialog", "LogWindow"]
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
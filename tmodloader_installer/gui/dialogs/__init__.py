@@ -4,5 +4,6 @@
 """
 
 from .backup_dialog import BackupSelectionDialog
+from .version_dialog import VersionSelectionDialog
 
-__all__ = ["BackupSelectionDialog"]
+__all__ = ["BackupSelectionDialog", "VersionSelectionDialog"]
@@ -8,6 +8,7 @@ from tkinter import ttk, messagebox
 import datetime
 import shutil
 from pathlib import Path
+from tmodloader_installer.core.backup import read_backup_info
 from tmodloader_installer.utils import natural_sort_key, BACKUP_DIALOG_SIZE
 
 
@@ -81,7 +82,11 @@ class BackupSelectionDialog:
         for backup_dir in self.backup_dirs:
             # 作成日時を表示
             mtime = datetime.datetime.fromtimestamp(backup_dir.stat().st_mtime)
-            display_text = f"{backup_dir.name} ({mtime.strftime('%Y-%m-%d %H:%M:%S')})"
+            profile = read_backup_info(backup_dir)["profile"]
+            display_text = (
+                f"{backup_dir.name} ({mtime.strftime('%Y-%m-%d %H:%M:%S')})"
+                f" [{profile.name}]"
+            )
             self.listbox.insert(tk.END, display_text)
 
     def _on_ok(self):
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+バージョン選択ダイアログ
+"""
+
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox
+from tmodloader_installer.utils import VERSION_DIALOG_SIZE
+
+
+class VersionSelectionDialog:
+    """リリースインデックスからバージョンを選択するダイアログ"""
+
+    def __init__(self, parent, release_index):
+        """初期化"""
+        self.parent = parent
+        self.release_index = release_index
+        self.releases = []
+        self.selected_release = None
+        self.log_callback = None
+
+    def set_log_callback(self, log_callback):
+        """ログコールバックを設定"""
+        self.log_callback = log_callback
+
+    def log(self, message):
+        """ログメッセージを出力"""
+        if self.log_callback:
+            self.log_callback(message)
+        else:
+            print(message)
+
+    def show(self):
+        """ダイアログを表示"""
+        self.dialog = tk.Toplevel(self.parent)
+        self.dialog.title("バージョン選択")
+        self.dialog.geometry(VERSION_DIALOG_SIZE)
+        self.dialog.transient(self.parent)
+        self.dialog.grab_set()
+
+        self._setup_ui()
+        self._populate_list()
+
+        # キャッシュが空の場合は自動で取得
+        if not self.release_index.data["releases"]:
+            self._on_sync()
+
+        self.dialog.wait_window()
+
+        return self.selected_release
+
+    def _setup_ui(self):
+        """UIをセットアップ"""
+        list_frame = ttk.Frame(self.dialog, padding="10")
+        list_frame.pack(fill=tk.BOTH, expand=True)
+
+        filter_frame = ttk.Frame(list_frame)
+        filter_frame.pack(fill=tk.X)
+        ttk.Label(filter_frame, text="絞り込み (例: 2025.06.*):").pack(side=tk.LEFT)
+        self.pattern_var = tk.StringVar(value="")
+        ttk.Entry(filter_frame, textvariable=self.pattern_var, width=20).pack(
+            side=tk.LEFT, padx=(5, 0)
+        )
+        self.pattern_var.trace("w", lambda *args: self._populate_list())
+
+        self.prerelease_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            filter_frame,
+            text="プレリリースを含む",
+            variable=self.prerelease_var,
+            command=self._populate_list,
+        ).pack(side=tk.LEFT, padx=(10, 0))
+
+        self.listbox = tk.Listbox(list_frame)
+        self.listbox.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
+        self.listbox.bind("<Double-Button-1>", lambda event: self._on_ok())
+
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(list_frame, textvariable=self.status_var).pack(anchor=tk.W)
+
+        # ボタン
+        button_frame = ttk.Frame(self.dialog)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+
+        ttk.Button(button_frame, text="OK", command=self._on_ok).pack(
+            side=tk.RIGHT, padx=(5, 0)
+        )
+        ttk.Button(button_frame, text="キャンセル", command=self._on_cancel).pack(
+            side=tk.RIGHT, padx=(5, 0)
+        )
+        self.sync_button = ttk.Button(
+            button_frame, text="一覧を更新", command=self._on_sync
+        )
+        self.sync_button.pack(side=tk.LEFT)
+
+    def _populate_list(self):
+        """キャッシュからリストを更新"""
+        pattern = self.pattern_var.get().strip() or None
+        self.releases = self.release_index.releases(
+            include_prerelease=self.prerelease_var.get(), pattern=pattern
+        )
+
+        self.listbox.delete(0, tk.END)
+        for release in self.releases:
+            published = (release.get("published_at") or "")[:10]
+            label = " (プレリリース)" if release.get("prerelease") else ""
+            self.listbox.insert(tk.END, f"{release['tag_name']}  {published}{label}")
+
+        synced_at = self.release_index.data.get("synced_at") or "未取得"
+        self.status_var.set(f"{len(self.releases)}件 (最終更新: {synced_at})")
+
+    def _on_sync(self):
+        """GitHubから新しいリリースを取得"""
+        self.sync_button.config(state="disabled")
+        self.status_var.set("リリース一覧を取得中...")
+
+        def sync():
+            try:
+                added = self.release_index.sync()
+                self.log(f"リリース一覧を更新しました（新規 {added} 件）")
+            except Exception as e:
+                self.log(f"リリース一覧の更新に失敗: {e}")
+            self.dialog.after(0, self._on_sync_complete)
+
+        thread = threading.Thread(target=sync)
+        thread.daemon = True
+        thread.start()
+
+    def _on_sync_complete(self):
+        """取得完了時の処理"""
+        if not self.dialog.winfo_exists():
+            return
+        self.sync_button.config(state="normal")
+        self._populate_list()
+
+    def _on_ok(self):
+        """OKボタンの処理"""
+        selection = self.listbox.curselection()
+        if not selection:
+            messagebox.showwarning("警告", "バージョンを選択してください", parent=self.dialog)
+            return
+        self.selected_release = self.releases[selection[0]]
+        self.dialog.destroy()
+
+    def _on_cancel(self):
+        """キャンセルボタンの処理"""
+        self.selected_release = None
+        self.dialog.destroy()
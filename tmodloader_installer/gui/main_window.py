@@ -9,19 +9,26 @@ import threading
 import json
 import shutil
 import sys
+import time
 from pathlib import Path
 
-from tmodloader_installer.core import SimpleInstaller
+from tmodloader_installer.core.backup import (
+    get_backup_profile,
+    list_backup_profiles,
+    restore_backup,
+)
+from tmodloader_installer.core.steam import default_install_path
 from tmodloader_installer.utils import (
+    DEFAULT_COPY_WORKERS,
     DEFAULT_GITHUB_URL,
-    DEFAULT_INSTALL_PATH,
     WINDOW_SIZE,
     PROGRESS_MAX,
     ProgressStage,
     natural_sort_key,
+    split_install_paths,
 )
-from tmodloader_installer.gui.dialogs import BackupSelectionDialog
-from tmodloader_installer.gui.widgets import LogWindow
+from tmodloader_installer.gui.dialogs import BackupSelectionDialog, VersionSelectionDialog
+from tmodloader_installer.gui.widgets import LogWindow, StatsWindow
 
 
 class MainWindow:
@@ -43,6 +50,13 @@ class MainWindow:
         # ログメッセージの保存用
         self.log_messages = []
 
+        # インストール・復元を実行するスケジューラと、実行中のジョブ・キャンセルの指示
+        from tmodloader_installer.core.scheduler import JobScheduler
+
+        self.scheduler = JobScheduler(log=self.log)
+        self.job = None
+        self.cancel_token = None
+
         self.setup_gui()
         self.load_config()
 
@@ -84,20 +98,30 @@ class MainWindow:
         url_frame = ttk.LabelFrame(main_frame, text="GitHub Release URL", padding="10")
         url_frame.pack(fill=tk.X, pady=(0, 10))
 
+        url_input_frame = ttk.Frame(url_frame)
+        url_input_frame.pack(fill=tk.X)
+
         self.url_var = tk.StringVar(value=DEFAULT_GITHUB_URL)
-        url_entry = ttk.Entry(url_frame, textvariable=self.url_var, width=60)
-        url_entry.pack(fill=tk.X)
+        url_entry = ttk.Entry(url_input_frame, textvariable=self.url_var, width=50)
+        url_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
         # 入力変更時に自動保存
         self.url_var.trace("w", lambda *args: self.save_config())
 
+        version_button = ttk.Button(
+            url_input_frame, text="バージョン選択", command=self.select_version
+        )
+        version_button.pack(side=tk.RIGHT, padx=(10, 0))
+
         # インストール先パス設定
-        path_frame = ttk.LabelFrame(main_frame, text="インストール先パス", padding="10")
+        path_frame = ttk.LabelFrame(
+            main_frame, text="インストール先パス（複数指定は ; 区切り）", padding="10"
+        )
         path_frame.pack(fill=tk.X, pady=(0, 10))
 
         path_input_frame = ttk.Frame(path_frame)
         path_input_frame.pack(fill=tk.X)
 
-        self.path_var = tk.StringVar(value=DEFAULT_INSTALL_PATH)
+        self.path_var = tk.StringVar(value=default_install_path())
         path_entry = ttk.Entry(path_input_frame, textvariable=self.path_var, width=50)
         path_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
         # 入力変更時に自動保存
@@ -108,6 +132,40 @@ class MainWindow:
         )
         browse_button.pack(side=tk.RIGHT, padx=(10, 0))
 
+        # バックアッププロファイル
+        profile_frame = ttk.Frame(path_frame)
+        profile_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Label(profile_frame, text="バックアップ:").pack(side=tk.LEFT)
+        self.profile_var = tk.StringVar(value=get_backup_profile().name)
+        profile_combo = ttk.Combobox(
+            profile_frame,
+            textvariable=self.profile_var,
+            values=list_backup_profiles(),
+            state="readonly",
+            width=15,
+        )
+        profile_combo.pack(side=tk.LEFT, padx=(5, 0))
+        self.profile_var.trace("w", lambda *args: self.save_config())
+
+        # コピー並列数
+        ttk.Label(profile_frame, text="コピー並列数:").pack(side=tk.LEFT, padx=(15, 0))
+        self.workers_var = tk.IntVar(value=DEFAULT_COPY_WORKERS)
+        workers_spinbox = ttk.Spinbox(
+            profile_frame, from_=1, to=64, textvariable=self.workers_var, width=5
+        )
+        workers_spinbox.pack(side=tk.LEFT, padx=(5, 0))
+
+        # 帯域制限（インストール中の変更もダウンロードに反映、0はconfig.yamlの設定に従う）
+        limit_frame = ttk.Frame(path_frame)
+        limit_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Label(limit_frame, text="帯域制限 (MB/s、0で設定ファイルに従う):").pack(side=tk.LEFT)
+        self.limit_var = tk.StringVar(value="0")
+        limit_spinbox = ttk.Spinbox(
+            limit_frame, from_=0, to=1000, increment=0.5, textvariable=self.limit_var, width=7
+        )
+        limit_spinbox.pack(side=tk.LEFT, padx=(5, 0))
+        self.limit_var.trace("w", lambda *args: self._apply_bandwidth_limit())
+
         # ボタン
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill=tk.X, pady=(20, 0))
@@ -125,11 +183,21 @@ class MainWindow:
         )
         self.restore_button.pack(side=tk.LEFT, padx=(10, 0))
 
+        self.cancel_button = ttk.Button(
+            button_frame, text="キャンセル", command=self.cancel_operation, state="disabled"
+        )
+        self.cancel_button.pack(side=tk.LEFT, padx=(10, 0))
+
         self.log_button = ttk.Button(
             button_frame, text="ログ表示", command=self.show_log_window
         )
         self.log_button.pack(side=tk.LEFT, padx=(10, 0))
 
+        self.stats_button = ttk.Button(
+            button_frame, text="統計", command=self.show_stats_window
+        )
+        self.stats_button.pack(side=tk.LEFT, padx=(10, 0))
+
         # プログレスバー
         progress_frame = ttk.Frame(main_frame)
         progress_frame.pack(fill=tk.X, pady=(20, 0))
@@ -155,6 +223,16 @@ class MainWindow:
         if path:
             self.path_var.set(path)
 
+    def select_version(self):
+        """バージョン選択ダイアログ"""
+        from tmodloader_installer.core.release_index import ReleaseIndex
+
+        dialog = VersionSelectionDialog(self.root, ReleaseIndex(log=self.log))
+        dialog.set_log_callback(self.log)
+        release = dialog.show()
+        if release:
+            self.url_var.set(release["html_url"])
+
     def log(self, message):
         """ログにメッセージを追加"""
         self.log_messages.append(message)
@@ -169,6 +247,11 @@ class MainWindow:
         log_window = LogWindow(self.root, self.log_messages)
         log_window.show()
 
+    def show_stats_window(self):
+        """操作の履歴の統計ウィンドウを開く"""
+        stats_window = StatsWindow(self.root)
+        stats_window.show()
+
     def start_install(self):
         """インストール開始"""
         github_url = self.url_var.get().strip()
@@ -183,56 +266,195 @@ class MainWindow:
         # ボタンを無効化
         self.install_button.config(state="disabled")
         self.progress_bar["value"] = 0
-        self.progress_var.set("インストール開始...")
+        self.progress_var.set("事前確認中...")
 
-        # 別スレッドでインストール実行
+        # 別スレッドで見積もりを作成してから確認
+        install_paths = split_install_paths(install_path)
         thread = threading.Thread(
-            target=self.run_install, args=(github_url, install_path)
+            target=self.run_plan,
+            args=(github_url, install_paths, self.profile_var.get()),
         )
         thread.daemon = True
         thread.start()
 
-    def run_install(self, github_url, install_path):
+    def run_plan(self, github_url, install_paths, backup_profile):
+        """インストールの見積もりを作成"""
+        from tmodloader_installer.core import SimpleInstaller
+        from tmodloader_installer.core.planner import plan_install
+
+        lines = []
+        ok = True
+        try:
+            for install_path in install_paths:
+                installer = SimpleInstaller(
+                    github_url, install_path, backup_profile=backup_profile
+                )
+                plan = plan_install(installer)
+                lines.append(f"[{install_path}]")
+                lines.extend(plan.lines())
+                ok = ok and plan.ok
+            for line in lines:
+                self.log(line)
+        except Exception as e:
+            self.log(f"見積もりの作成に失敗: {e}")
+            lines = [f"見積もりを作成できませんでした: {e}"]
+
+        self.root.after(
+            0,
+            lambda: self._confirm_install(
+                github_url, install_paths, backup_profile, lines, ok
+            ),
+        )
+
+    def _confirm_install(self, github_url, install_paths, backup_profile, lines, ok):
+        """見積もりを表示してインストールを開始するか確認"""
+        message = "\n".join(lines)
+        if not ok:
+            message += "\n\n空き容量が不足しています。"
+        if not messagebox.askyesno("インストール確認", f"{message}\n\nインストールを開始しますか？"):
+            self.install_button.config(state="normal")
+            self.progress_var.set("準備完了")
+            return
+
+        self.progress_var.set("インストール開始...")
+
+        # 別スレッドでインストール実行
+        if len(install_paths) > 1:
+            self._start_worker(
+                "インストール",
+                install_paths,
+                self.run_multi_install,
+                github_url,
+                install_paths,
+                backup_profile,
+                network=True,
+            )
+        else:
+            self._start_worker(
+                "インストール",
+                install_paths,
+                self.run_install,
+                github_url,
+                install_paths[0],
+                backup_profile,
+                network=True,
+            )
+
+    def _start_worker(self, name, paths, target, *args, network=False):
+        """キャンセルできる処理をスケジューラで開始（インストール先は他の処理・プロセスと排他）"""
+        from tmodloader_installer.core.cancel import CancelToken
+
+        self.cancel_token = CancelToken()
+        self.cancel_button.config(state="normal")
+        self.job = self.scheduler.submit(
+            name,
+            lambda cancel: target(*args),
+            paths=paths,
+            disk=True,
+            network=network,
+            cancel=self.cancel_token,
+        )
+        self._watch_job()
+
+    def _watch_job(self):
+        """ロック待ちの表示と、処理を始める前に終わったジョブ（待機中のキャンセルなど）の後始末"""
+        job = self.job
+        if not job.finished.is_set():
+            if job.status == "waiting":
+                self.progress_var.set("他の処理の終了を待っています...")
+            self.root.after(200, self._watch_job)
+            return
+        if job.status == "cancelled":
+            self.operation_cancelled()
+        elif job.status == "error":
+            self.job_error(job.error)
+
+    def job_error(self, error):
+        """処理を開始できなかった"""
+        self._finish_worker()
+        self.progress_bar["value"] = 0
+        self.progress_var.set("エラーが発生しました")
+        self.install_button.config(state="normal")
+        self.restore_button.config(state="normal")
+        messagebox.showerror("エラー", f"処理を開始できませんでした: {error}")
+
+    def _finish_worker(self):
+        """処理の終了時にキャンセルボタンを無効化"""
+        self.cancel_button.config(state="disabled")
+
+    def cancel_operation(self):
+        """実行中のインストール・復元をキャンセル（行った分だけ元に戻す）"""
+        if self.cancel_token is None or self.cancel_token.cancelled:
+            return
+        self.cancel_token.cancel()
+        self.cancel_button.config(state="disabled")
+        self.progress_var.set("キャンセル中...")
+        self.log("キャンセルしています。行った作業を元に戻します...")
+
+    def operation_cancelled(self):
+        """キャンセル完了"""
+        self._finish_worker()
+        self.progress_bar["value"] = 0
+        self.progress_var.set("キャンセルしました")
+        self.install_button.config(state="normal")
+        self.restore_button.config(state="normal")
+
+    def run_install(self, github_url, install_path, backup_profile=None):
         """インストール実行"""
+        from tmodloader_installer.core import OperationCancelled, SimpleInstaller
+
+        installer = backup_path = None
         try:
             self.log("=== tModLoader インストール開始 ===")
             self._update_progress_async(
                 ProgressStage.BACKUP_START, "バックアップ作成中..."
             )
 
-            installer = SimpleInstaller(github_url, install_path)
+            installer = SimpleInstaller(
+                github_url,
+                install_path,
+                backup_profile=backup_profile,
+                copy_workers=self._copy_workers(),
+                progress_callback=self._copy_progress_callback(
+                    ProgressStage.BACKUP_START, "バックアップ作成中"
+                ),
+                io_governor=self._io_governor(),
+                cancel=self.cancel_token,
+            )
 
-            # バックアップ作成
-            self.log("既存フォルダのバックアップを作成中...")
-            backup_path = installer.create_backup()
-            if backup_path:
-                self.log(f"バックアップ完了: {backup_path}")
-            else:
-                self.log("既存フォルダが見つかりません。新規インストールします。")
+            # 所要時間・結果を履歴に記録
+            with installer.record_history():
+                # バックアップ作成
+                self.log("既存フォルダのバックアップを作成中...")
+                backup_path = installer.create_backup()
+                if backup_path:
+                    self.log(f"バックアップ完了: {backup_path}")
+                else:
+                    self.log("既存フォルダが見つかりません。新規インストールします。")
 
-            self._update_progress_async(
-                ProgressStage.DOWNLOAD_PREP, "ダウンロード準備中..."
-            )
+                self._update_progress_async(
+                    ProgressStage.DOWNLOAD_PREP, "ダウンロード準備中..."
+                )
 
-            # ダウンロード
-            self.log(f"ダウンロード中: {installer.download_url}")
-            self._update_progress_async(
-                ProgressStage.DOWNLOAD_START, "ダウンロード中..."
-            )
-            response = installer._download_file()
-            self.log("ダウンロード完了")
+                # ダウンロード
+                self.log(f"ダウンロード中: {installer.download_url}")
+                self._update_progress_async(
+                    ProgressStage.DOWNLOAD_START, "ダウンロード中..."
+                )
+                response = installer._download_file()
+                self.log("ダウンロード完了")
 
-            self._update_progress_async(
-                ProgressStage.DOWNLOAD_COMPLETE, "ダウンロード完了"
-            )
+                self._update_progress_async(
+                    ProgressStage.DOWNLOAD_COMPLETE, "ダウンロード完了"
+                )
 
-            # 展開
-            self.log(f"展開中: {install_path}")
-            self._update_progress_async(
-                ProgressStage.EXTRACT_START, "ファイル展開中..."
-            )
-            installer._extract_files()
-            self.log("展開完了")
+                # 展開
+                self.log(f"展開中: {install_path}")
+                self._update_progress_async(
+                    ProgressStage.EXTRACT_START, "ファイル展開中..."
+                )
+                installer._extract_files()
+                self.log("展開完了")
 
             self._update_progress_async(ProgressStage.FINAL_PROCESS, "最終処理中...")
 
@@ -244,6 +466,57 @@ class MainWindow:
             self._update_progress_async(ProgressStage.COMPLETE, "インストール完了！")
             self.root.after(0, self.install_complete)
 
+        except OperationCancelled:
+            # 展開した分は元に戻っているため、この実行で作成したバックアップも削除
+            if installer is not None:
+                installer.discard_backup(backup_path)
+            self.log("インストールをキャンセルしました")
+            self.root.after(0, self.operation_cancelled)
+        except Exception as e:
+            self.log(f"エラー: {e}")
+            self.root.after(0, self.install_error)
+
+    def run_multi_install(self, github_url, install_paths, backup_profile=None):
+        """複数インストール先へのインストール実行"""
+        from tmodloader_installer.core import MultiTargetInstaller, OperationCancelled
+
+        installer = None
+        try:
+            self.log(f"=== tModLoader インストール開始 ({len(install_paths)}個) ===")
+            self._update_progress_async(
+                ProgressStage.DOWNLOAD_PREP, "ダウンロード準備中..."
+            )
+            installer = MultiTargetInstaller(
+                github_url,
+                install_paths,
+                backup_profile=backup_profile,
+                copy_workers=self._copy_workers(),
+                io_governor=self._io_governor(),
+                log=self.log,
+                cancel=self.cancel_token,
+            )
+
+            self._update_progress_async(
+                ProgressStage.DOWNLOAD_START, "ダウンロード・展開中..."
+            )
+            results = installer.download_and_install()
+            for line in installer.summary_lines():
+                self.log(line)
+
+            if not all(result.succeeded for result in results):
+                self.root.after(0, self.install_error)
+                return
+
+            self.log("=== インストール完了！ ===")
+            self._update_progress_async(ProgressStage.COMPLETE, "インストール完了！")
+            self.root.after(0, self.install_complete)
+
+        except OperationCancelled:
+            if installer is not None:
+                for line in installer.summary_lines():
+                    self.log(line)
+            self.log("インストールをキャンセルしました（配置済みのインストール先はバックアップから戻せます）")
+            self.root.after(0, self.operation_cancelled)
         except Exception as e:
             self.log(f"エラー: {e}")
             self.root.after(0, self.install_error)
@@ -252,6 +525,54 @@ class MainWindow:
         """プログレスバーとメッセージを非同期で更新"""
         self.root.after(0, lambda: self.update_progress(value, message))
 
+    def _copy_workers(self):
+        """設定されたコピー並列数（不正な値の場合は既定値）"""
+        try:
+            return max(1, int(self.workers_var.get()))
+        except (tk.TclError, ValueError):
+            return DEFAULT_COPY_WORKERS
+
+    def _io_governor(self):
+        """config.yamlのioに従ったディスクI/Oの制限（制限がない場合はNone）"""
+        from tmodloader_installer.core.io_governor import get_io_governor
+
+        governor = get_io_governor()
+        if governor:
+            self.log(f"ディスクI/Oの制限: {governor.describe()}")
+        return governor
+
+    def _bandwidth_limit(self):
+        """設定された帯域制限（MB/s、不正な値の場合はNone）"""
+        try:
+            return max(0.0, float(self.limit_var.get()))
+        except ValueError:
+            return None
+
+    def _apply_bandwidth_limit(self):
+        """帯域制限をこのプロセスの通信に反映"""
+        from tmodloader_installer.core.bandwidth import format_rate, get_limiter
+
+        limit = self._bandwidth_limit()
+        if limit is None:
+            return
+        limiter = get_limiter()
+        limiter.set_limit(int(limit * 1024 * 1024) if limit else None)
+        self.log(f"帯域制限: {format_rate(limiter.rate)}")
+        self.save_config()
+
+    def _copy_progress_callback(self, value, message, interval=0.2):
+        """コピーの進捗（ファイル数・バイト数）をメッセージに表示する関数を作成"""
+        last = [0.0]
+
+        def callback(progress):
+            now = time.monotonic()
+            if now - last[0] < interval:
+                return
+            last[0] = now
+            self._update_progress_async(value, f"{message}: {progress.describe()}")
+
+        return callback
+
     def update_progress(self, value, message):
         """プログレスバーとメッセージを更新"""
         self.progress_bar["value"] = value
@@ -262,6 +583,7 @@ class MainWindow:
         self.progress_bar["value"] = 100
         self.progress_var.set("インストール完了！ (100%)")
         self.install_button.config(state="normal")
+        self._finish_worker()
         messagebox.showinfo("完了", "インストールが正常に完了しました！")
 
     def install_error(self):
@@ -269,13 +591,20 @@ class MainWindow:
         self.progress_bar["value"] = 0
         self.progress_var.set("エラーが発生しました")
         self.install_button.config(state="normal")
+        self._finish_worker()
         messagebox.showerror(
             "エラー", "インストール中にエラーが発生しました。ログを確認してください。"
         )
 
     def save_config(self):
         """設定を保存"""
-        config = {"github_url": self.url_var.get(), "install_path": self.path_var.get()}
+        config = {
+            "github_url": self.url_var.get(),
+            "install_path": self.path_var.get(),
+            "backup_profile": self.profile_var.get(),
+            "copy_workers": self._copy_workers(),
+            "bandwidth_limit": self._bandwidth_limit() or 0,
+        }
 
         try:
             with open(self.config_file, "w", encoding="utf-8") as f:
@@ -298,6 +627,12 @@ class MainWindow:
                 self.url_var.set(config["github_url"])
             if "install_path" in config:
                 self.path_var.set(config["install_path"])
+            if config.get("backup_profile") in list_backup_profiles():
+                self.profile_var.set(config["backup_profile"])
+            if isinstance(config.get("copy_workers"), int):
+                self.workers_var.set(max(1, config["copy_workers"]))
+            if isinstance(config.get("bandwidth_limit"), (int, float)) and config["bandwidth_limit"]:
+                self.limit_var.set(str(config["bandwidth_limit"]))
 
         except (OSError, IOError) as e:
             self.log(f"設定ファイルの読み込みに失敗: {e}")
@@ -307,8 +642,23 @@ class MainWindow:
             self.log(f"予期しないエラーが発生しました: {e}")
 
     def on_closing(self):
-        """ウィンドウが閉じられる時の処理"""
+        """ウィンドウが閉じられる時の処理（実行中の処理はキャンセルして元に戻してから閉じる）"""
         self.save_config()
+        if self.scheduler.busy():
+            self.cancel_operation()
+            self.scheduler.cancel_all()
+            self._close_when_idle()
+            return
+        self._close()
+
+    def _close_when_idle(self):
+        if self.scheduler.busy():
+            self.root.after(100, self._close_when_idle)
+            return
+        self._close()
+
+    def _close(self):
+        self.scheduler.shutdown(wait=False)
         self.root.destroy()
 
     def start_restore(self):
@@ -348,11 +698,7 @@ class MainWindow:
         self.progress_bar["value"] = 0
         self.progress_var.set("復元開始...")
 
-        thread = threading.Thread(
-            target=self.run_restore, args=(backup_path, install_path)
-        )
-        thread.daemon = True
-        thread.start()
+        self._start_worker("復元", [install_path], self.run_restore, backup_path, install_path)
 
     def find_backup_dirs(self, install_path):
         """バックアップフォルダを検索"""
@@ -381,27 +727,30 @@ class MainWindow:
 
     def run_restore(self, backup_path, install_path):
         """バックアップから復元実行"""
+        from tmodloader_installer.core.cancel import OperationCancelled
+
         try:
             self.log("=== バックアップから復元開始 ===")
             self.log(f"復元元: {backup_path}")
             self.log(f"復元先: {install_path}")
             self._update_progress_async(ProgressStage.RESTORE_PREP, "復元準備中...")
 
-            # 既存のインストール先を削除
-            install_path = Path(install_path)
-            if install_path.exists():
-                self.log("既存のフォルダを削除中...")
-                self._update_progress_async(
-                    ProgressStage.RESTORE_DELETE, "既存フォルダ削除中..."
-                )
-                shutil.rmtree(install_path)
-
-            # バックアップから復元
-            self.log("バックアップから復元中...")
+            # バックアップのプロファイルに従って復元
             self._update_progress_async(
                 ProgressStage.RESTORE_COPY, "バックアップから復元中..."
             )
-            shutil.copytree(backup_path, install_path)
+            profile = restore_backup(
+                backup_path,
+                install_path,
+                log=self.log,
+                workers=self._copy_workers(),
+                progress_callback=self._copy_progress_callback(
+                    ProgressStage.RESTORE_COPY, "バックアップから復元中"
+                ),
+                governor=self._io_governor(),
+                cancel=self.cancel_token,
+            )
+            self.log(f"プロファイル: {profile.name}")
             self._update_progress_async(ProgressStage.RESTORE_FINAL, "復元処理中...")
 
             self.log("=== 復元完了！ ===")
@@ -410,6 +759,9 @@ class MainWindow:
             self._update_progress_async(ProgressStage.RESTORE_COMPLETE, "復元完了！")
             self.root.after(0, self.restore_complete)
 
+        except OperationCancelled:
+            self.log("復元をキャンセルし、復元前の状態に戻しました")
+            self.root.after(0, self.operation_cancelled)
         except Exception as e:
             self.log(f"復元エラー: {e}")
             self.root.after(0, self.restore_error)
@@ -419,6 +771,7 @@ class MainWindow:
         self.progress_bar["value"] = 100
         self.progress_var.set("復元完了！ (100%)")
         self.restore_button.config(state="normal")
+        self._finish_worker()
         messagebox.showinfo("完了", "バックアップからの復元が正常に完了しました！")
 
     def restore_error(self):
@@ -426,10 +779,63 @@ class MainWindow:
         self.progress_bar["value"] = 0
         self.progress_var.set("復元エラー")
         self.restore_button.config(state="normal")
+        self._finish_worker()
         messagebox.showerror(
             "エラー", "復元中にエラーが発生しました。ログを確認してください。"
         )
 
     def run(self):
         """アプリケーション実行"""
+        # ウィンドウの表示後にネットワーク関連のモジュールを裏で読み込んでおく
+        self.root.after_idle(self._preload_modules)
+        self.root.after_idle(self._check_interrupted_jobs)
         self.root.mainloop()
+
+    def _check_interrupted_jobs(self):
+        """前回中断された展開・復元があれば再開するか元に戻すかを確認"""
+        from tmodloader_installer.core.journal import pending_journals, recover_jobs
+
+        pending = pending_journals()
+        if not pending:
+            return
+        resume = messagebox.askyesno(
+            "中断された作業",
+            f"前回中断されたインストール・復元が{len(pending)}件あります。\n\n"
+            "「はい」で続きから再開し、「いいえ」で作業前の状態に戻します。",
+        )
+        self.install_button.config(state="disabled")
+        self.restore_button.config(state="disabled")
+        self.progress_var.set("中断された作業を処理中...")
+
+        def recover(cancel):
+            try:
+                recover_jobs(
+                    "resume" if resume else "rollback",
+                    governor=self._io_governor(),
+                    log=self.log,
+                )
+                self.log("中断された作業の処理が完了しました")
+            except Exception as e:
+                self.log(f"中断された作業を処理できませんでした: {e}")
+            self.root.after(0, self._recover_complete)
+
+        # 作業ごとのインストール先のロックはrecover_jobsが取得する
+        self.scheduler.submit("中断された作業の処理", recover, disk=True)
+
+    def _recover_complete(self):
+        self.install_button.config(state="normal")
+        self.restore_button.config(state="normal")
+        self.progress_var.set("準備完了")
+
+    def _preload_modules(self):
+        """インストール開始時の待ち時間を減らすため重いモジュールを先に読み込む"""
+
+        def preload():
+            try:
+                import requests  # noqa: F401
+                import tmodloader_installer.core.installer  # noqa: F401
+            except ImportError:
+                pass
+
+        thread = threading.Thread(target=preload, daemon=True)
+        thread.start()
@@ -4,5 +4,6 @@
 """
 
 from .log_window import LogWindow
+from .stats_window import StatsWindow
 
-__all__ = ["LogWindow"]
+__all__ = ["LogWindow", "StatsWindow"]
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+統計表示ウィンドウ
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from tmodloader_installer.utils import STATS_WINDOW_SIZE
+
+# 推移グラフの大きさと余白
+CHART_HEIGHT = 160
+CHART_MARGIN = 30
+
+# ホストごとの線の色
+CHART_COLORS = ("#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b")
+
+
+class StatsWindow:
+    """操作の履歴から所要時間の推移とパーセンタイルを表示するウィンドウ"""
+
+    def __init__(self, parent):
+        """初期化"""
+        self.parent = parent
+        self.window = None
+        self.text = None
+        self.canvas = None
+        self.kind_var = None
+        self.period_var = None
+
+    def show(self):
+        """統計ウィンドウを表示"""
+        # 既に開いている場合はフォーカスを移す
+        if self.window and self.window.winfo_exists():
+            self.window.lift()
+            return
+
+        self.window = tk.Toplevel(self.parent)
+        self.window.title("統計")
+        self.window.geometry(STATS_WINDOW_SIZE)
+        self.window.transient(self.parent)
+
+        self._setup_ui()
+        self._update_display()
+
+    def _setup_ui(self):
+        """UIをセットアップ"""
+        from tmodloader_installer.core.history import KINDS, PERIODS
+
+        option_frame = ttk.Frame(self.window, padding="10 10 10 0")
+        option_frame.pack(fill=tk.X)
+
+        ttk.Label(option_frame, text="操作:").pack(side=tk.LEFT)
+        self.kind_var = tk.StringVar(value="install")
+        kind_combo = ttk.Combobox(
+            option_frame, textvariable=self.kind_var, values=KINDS, state="readonly", width=10
+        )
+        kind_combo.pack(side=tk.LEFT, padx=(5, 15))
+        kind_combo.bind("<<ComboboxSelected>>", lambda event: self._update_display())
+
+        ttk.Label(option_frame, text="集計単位:").pack(side=tk.LEFT)
+        self.period_var = tk.StringVar(value="week")
+        period_combo = ttk.Combobox(
+            option_frame,
+            textvariable=self.period_var,
+            values=sorted(PERIODS),
+            state="readonly",
+            width=8,
+        )
+        period_combo.pack(side=tk.LEFT, padx=(5, 0))
+        period_combo.bind("<<ComboboxSelected>>", lambda event: self._update_display())
+
+        # 推移グラフ（期間ごとの所要時間の中央値）
+        self.canvas = tk.Canvas(self.window, height=CHART_HEIGHT, background="white")
+        self.canvas.pack(fill=tk.X, padx=10, pady=10)
+
+        # 統計テキスト
+        text_frame = ttk.Frame(self.window, padding="10 0 10 0")
+        text_frame.pack(fill=tk.BOTH, expand=True)
+        self.text = tk.Text(text_frame, height=15, width=80, wrap=tk.NONE)
+        scrollbar = ttk.Scrollbar(text_frame, orient=tk.VERTICAL, command=self.text.yview)
+        self.text.configure(yscrollcommand=scrollbar.set)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # ボタン
+        button_frame = ttk.Frame(self.window)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Button(button_frame, text="閉じる", command=self.close).pack(side=tk.RIGHT)
+        ttk.Button(button_frame, text="更新", command=self._update_display).pack(
+            side=tk.RIGHT, padx=(0, 10)
+        )
+
+    def _update_display(self):
+        """履歴を読み込み直して表示を更新"""
+        from tmodloader_installer.core.history import load_operations, report_lines, trend
+
+        try:
+            operations = load_operations()
+            lines = report_lines(operations, self.period_var.get())
+        except Exception as e:
+            operations = []
+            lines = [f"履歴を読み込めませんでした: {e}"]
+
+        self.text.delete(1.0, tk.END)
+        self.text.insert(tk.END, "\n".join(lines))
+
+        kind = self.kind_var.get()
+        series = {
+            host: rows
+            for (host, row_kind), rows in trend(operations, self.period_var.get()).items()
+            if row_kind == kind
+        }
+        self._draw_chart(series)
+
+    def _draw_chart(self, series):
+        """ホストごとに期間ごとの所要時間の中央値を折れ線で描画"""
+        self.canvas.delete("all")
+        self.window.update_idletasks()
+        width = self.canvas.winfo_width()
+        labels = sorted({label for rows in series.values() for label, *_ in rows})
+        if not labels:
+            self.canvas.create_text(
+                width / 2, CHART_HEIGHT / 2, text="記録された操作はありません", fill="gray"
+            )
+            return
+
+        peak = max(p50 for rows in series.values() for _, _, p50, _ in rows) or 1.0
+        step = (width - CHART_MARGIN * 2) / max(1, len(labels) - 1)
+        bottom = CHART_HEIGHT - CHART_MARGIN
+
+        def point(label, seconds):
+            x = CHART_MARGIN + labels.index(label) * step
+            y = bottom - (bottom - CHART_MARGIN / 2) * seconds / peak
+            return x, y
+
+        self.canvas.create_line(CHART_MARGIN, bottom, width - CHART_MARGIN, bottom, fill="gray")
+        self.canvas.create_text(
+            CHART_MARGIN, CHART_MARGIN / 2, text=f"{peak:.0f}秒", anchor=tk.W, fill="gray"
+        )
+        for label in (labels[0], labels[-1]):
+            x, _ = point(label, 0)
+            self.canvas.create_text(x, bottom + 12, text=label, fill="gray")
+
+        for index, (host, rows) in enumerate(sorted(series.items())):
+            color = CHART_COLORS[index % len(CHART_COLORS)]
+            points = [point(label, p50) for label, _, p50, _ in rows]
+            if len(points) > 1:
+                self.canvas.create_line(*[c for xy in points for c in xy], fill=color, width=2)
+            for x, y in points:
+                self.canvas.create_oval(x - 3, y - 3, x + 3, y + 3, fill=color, outline=color)
+            self.canvas.create_text(
+                width - CHART_MARGIN, CHART_MARGIN / 2 + index * 14, text=host, fill=color, anchor=tk.E
+            )
+
+    def close(self):
+        """統計ウィンドウを閉じる"""
+        if self.window:
+            self.window.destroy()
+            self.window = None
@@ -4,15 +4,32 @@
 """
 
 from .constants import *
-from .helpers import natural_sort_key
+from .helpers import natural_sort_key, format_size, get_app_base_path, split_install_paths
 
 __all__ = [
     "DEFAULT_GITHUB_URL",
     "DEFAULT_INSTALL_PATH",
+    "TMODLOADER_APP_ID",
+    "GITHUB_API_REPO_URL",
+    "RELEASE_ASSET_NAME",
+    "INSTALLED_MARKER_NAME",
+    "SPOOL_THRESHOLD_MB",
+    "DEFAULT_COPY_WORKERS",
+    "COPY_LARGE_FILE_THRESHOLD",
+    "COPY_CHUNK_SIZE",
+    "WATCH_INTERVAL",
+    "WATCH_MIN_INTERVAL",
+    "DEFAULT_SERVE_PORT",
+    "SERVE_SYNC_INTERVAL",
     "WINDOW_SIZE",
     "LOG_WINDOW_SIZE",
+    "STATS_WINDOW_SIZE",
     "BACKUP_DIALOG_SIZE",
+    "VERSION_DIALOG_SIZE",
     "PROGRESS_MAX",
     "ProgressStage",
     "natural_sort_key",
+    "format_size",
+    "get_app_base_path",
+    "split_install_paths",
 ]
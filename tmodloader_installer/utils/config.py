@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+設定ファイル（config.yaml）の読み込み
+PyYAMLがインストールされていない場合は警告を表示して既定値を使用する
+"""
+
+import copy
+import os
+from pathlib import Path
+
+from .helpers import get_app_base_path
+
+# config.yamlが見つからない場合の既定値
+DEFAULT_CONFIG = {
+    "download": {
+        "release_source": "",
+        "digest_manifest": "",
+    },
+    "delta": {
+        "store_dir": "",
+    },
+    "bandwidth": {
+        "limit": "",
+        "schedule": [],
+    },
+    "io": {
+        "limit": "",
+        "ops": 0,
+        "background": {"limit": "20M", "ops": 200, "workers": 2},
+    },
+    "backup": {
+        "backup_dir": "./backups",
+        "prefix": "tModLoader_backup",
+        "include_folders": ["Players", "Worlds", "Mods", "tModLoader"],
+        "default_profile": "full",
+        "exclude_folders": [],
+        "exclude_patterns": [],
+        "profiles": {},
+    },
+    "saves": {
+        "folders": ["Worlds", "Players"],
+        "keep": 50,
+    },
+    "steam": {
+        "common_paths": [],
+        "steam_exe_paths": [],
+    },
+    "history": {
+        "host": "",
+        "recent_days": 7,
+        "degraded_ratio": 0.7,
+    },
+    "release_store": {
+        "link_mode": "auto",
+    },
+    "jobs": {
+        "workers": 2,
+        "disk_jobs": 1,
+        "network_jobs": 2,
+        "lock_timeout": 0,
+    },
+    "general": {
+        "tmodloader_path": "",
+        "download_timeout": 300,
+        "interrupted_jobs": "resume",
+    },
+}
+
+_config_cache = {}
+
+
+def find_config_file():
+    """config.yamlを検索（実行ファイルと同じ場所、開発環境のルート、カレントディレクトリの順）"""
+    base_path = get_app_base_path()
+    candidates = [
+        os.environ.get("TMODLOADER_INSTALLER_CONFIG"),
+        base_path / "config.yaml",
+        base_path.parent / "config.yaml",
+        Path.cwd() / "config.yaml",
+    ]
+    for candidate in candidates:
+        if candidate and Path(candidate).is_file():
+            return Path(candidate)
+    return None
+
+
+def _merge(base, override):
+    """辞書を再帰的にマージ"""
+    for key, value in (override or {}).items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+def load_config(path=None):
+    """設定を読み込み（既定値にconfig.yamlの内容を上書き）"""
+    path = Path(path) if path else find_config_file()
+    key = str(path)
+    if key in _config_cache:
+        return _config_cache[key]
+
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    if path is not None:
+        try:
+            import yaml
+        except ImportError:
+            yaml = None
+            # 独自のプロファイルなどが黙って無視されないよう知らせる
+            print(
+                f"PyYAMLがインストールされていないため設定ファイルを読み込めません。"
+                f"既定値を使用します: {path}（pip install pyyaml）"
+            )
+
+        if yaml is not None:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    _merge(config, yaml.safe_load(f))
+            except (OSError, yaml.YAMLError) as e:
+                print(f"設定ファイルの読み込みに失敗: {e}")
+
+    _config_cache[key] = config
+    return config
@@ -9,10 +9,39 @@ DEFAULT_GITHUB_URL = (
 )
 DEFAULT_INSTALL_PATH = "C:\\Program Files (x86)\\Steam\\steamapps\\common\\tModLoader"
 
+# SteamのtModLoaderのアプリID
+TMODLOADER_APP_ID = 1281930
+
+# GitHub API設定
+GITHUB_API_REPO_URL = "https://api.github.com/repos/tModLoader/tModLoader"
+RELEASE_ASSET_NAME = "tModLoader.zip"
+
+# インストール済みバージョンの記録ファイル（インストール先に作成）
+INSTALLED_MARKER_NAME = ".tmodloader_installer.json"
+
+# メモリ上のダウンロードバッファの既定の上限（超えた分はディスクへ退避）
+SPOOL_THRESHOLD_MB = 512
+
+# 並列コピー設定
+DEFAULT_COPY_WORKERS = 8
+COPY_LARGE_FILE_THRESHOLD = 256 * 1024 * 1024  # これ以上のファイルはチャンクに分割
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+
+# リリース監視設定
+WATCH_INTERVAL = 600  # ポーリング間隔（秒）
+WATCH_MIN_INTERVAL = 60  # ポーリング間隔の下限（秒）
+WATCH_MAX_BACKOFF = 3600  # 失敗が続いた時の待機時間の上限（秒）
+
+# キャッシュサーバー設定
+DEFAULT_SERVE_PORT = 8765
+SERVE_SYNC_INTERVAL = 300  # リリース一覧をGitHubから取得し直す間隔（秒）
+
 # ウィンドウサイズ
-WINDOW_SIZE = "600x350"
+WINDOW_SIZE = "600x420"
 LOG_WINDOW_SIZE = "700x500"
+STATS_WINDOW_SIZE = "720x560"
 BACKUP_DIALOG_SIZE = "600x400"
+VERSION_DIALOG_SIZE = "500x450"
 
 # プログレスバー設定
 PROGRESS_MAX = 100
@@ -4,6 +4,8 @@
 """
 
 import re
+import sys
+from pathlib import Path
 
 
 def natural_sort_key(text):
@@ -13,3 +15,27 @@ def natural_sort_key(text):
         return int(text) if text.isdigit() else text.lower()
 
     return [convert(c) for c in re.split("([0-9]+)", text)]
+
+
+def format_size(size: float) -> str:
+    """バイト数を読みやすい単位に変換"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}TB"
+
+
+def get_app_base_path():
+    """downloads/backups/configを置くベースディレクトリを取得"""
+    # PyInstallerでパッケージ化された場合の対応
+    if getattr(sys, "frozen", False):
+        # 実行ファイルの場合、実行ファイルと同じディレクトリ
+        return Path(sys.executable).parent
+    # 開発環境の場合
+    return Path(__file__).parent.parent
+
+
+def split_install_paths(text):
+    """「;」区切りのインストール先パス文字列をリストに分割"""
+    return [part.strip() for part in text.split(";") if part.strip()]